@@ -0,0 +1,416 @@
+"""
+Automatic batching of single item RPC calls
+
+The node has batch actions (`accounts_balances`, `accounts_frontiers`,
+`accounts_pending`, `blocks`, `blocks_info`) but application code usually
+asks for one account or block at a time. A :py:class:`Batcher` collects the
+single item calls issued within a short **window** (or until
+**max_batch_size** items are queued), dispatches one batch call and hands
+each caller its own entry.
+
+>>> from nano.rpc import Client
+>>> from nano.batching import Batcher
+>>> batcher = Batcher(Client('http://localhost:7076'), window=0.01)
+
+Threads calling the blocking methods concurrently share batch calls:
+
+>>> batcher.account_balance('xrb_3e3j5tkog48pnny9dmfzj1r16pg8t1e76dz5tmac6iq689wyjfpi00000000')
+{'balance': 10000, 'pending': 10000}
+
+asyncio code awaits :py:meth:`Batcher.asubmit`, batch calls always run in a
+background thread, including full batches, so the event loop is never
+blocked:
+
+>>> await batcher.asubmit('block', '000D1BAEC8EC208142C99059B393051BAC8380F9B5A2E6B2489A277D81789F3F')
+{'account': 'xrb_3e3j5tkog48pnny9dmfzj1r16pg8t1e76dz5tmac6iq689wyjfpi00000000', ...}
+
+If a batch call fails (eg. the node rejects the whole batch because one
+block does not exist) it is split in halves which are retried until the
+failing items are isolated. Items alone in a failed batch or missing from a
+batch result are retried concurrently with the equivalent single item call so
+that each caller gets its own result or error, in the same form as a batch
+entry.
+
+A batch call runs with the latest deadline of its callers, or no deadline if
+one of them has none, and with the most urgent priority set by its callers,
+see :py:func:`nano.timeouts.deadline` and :py:func:`nano.scheduling.priority`.
+"""
+
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from .identifiers import account_to_bytes, hash_to_bytes
+from .results import Balance
+from .rpc import RPCException
+from .scheduling import current_priority, priority
+from .timeouts import current_deadline, deadline
+
+
+def _identity(value):
+    return value
+
+
+def _latest(deadlines):
+    """
+    Returns the deadline leaving the most time of **deadlines**, None if one
+    of them is unbounded
+    """
+    if not deadlines or None in deadlines:
+        return None
+    return max(deadlines)
+
+
+def _most_urgent(levels):
+    """
+    Returns the most urgent of the priorities **levels** set by the callers,
+    None if none of them set one
+    """
+    levels = [level for level in levels if level is not None]
+    return min(levels) if levels else None
+
+
+class _Loader(object):
+    """
+    Queues keys for one batch function and dispatches them together,
+    **result_key** maps a key to its key in the batch results and up to
+    **workers** single item calls run at once
+    """
+
+    def __init__(
+        self, batch, single, window, max_batch_size, result_key=_identity, workers=1
+    ):
+        self.batch = batch
+        self.single = single
+        self.result_key = result_key
+        self.workers = workers
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self._queue = OrderedDict()
+        self._deadlines = []
+        self._priorities = []
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def load(self, key):
+        dispatch = None
+
+        with self._lock:
+            future = self._queue.get(key)
+            if future is None:
+                future = self._queue[key] = Future()
+            self._deadlines.append(current_deadline())
+            self._priorities.append(current_priority())
+
+            if len(self._queue) >= self.max_batch_size:
+                dispatch = self._take()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.window, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+        if dispatch is not None:
+            # never run the batch call in the caller's thread, which may be
+            # running an event loop
+            thread = threading.Thread(target=self._run, args=dispatch)
+            thread.daemon = True
+            thread.start()
+
+        return future
+
+    def _take(self):
+        """
+        Returns the queued keys and the deadline and priority of their batch
+        call, which runs until the last of the callers gives up and with the
+        most urgent of their priorities
+        """
+        queue, self._queue = self._queue, OrderedDict()
+        deadlines, self._deadlines = self._deadlines, []
+        levels, self._priorities = self._priorities, []
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return queue, _latest(deadlines), _most_urgent(levels)
+
+    def flush(self):
+        """
+        Dispatches the queued keys now instead of waiting for the window
+        """
+        with self._lock:
+            queue, at, level = self._take()
+        if queue:
+            self._run(queue, at, level)
+
+    def _run(self, queue, at=None, level=None):
+        with deadline(at=at), priority(level):
+            self._call(queue)
+
+    def _call(self, queue):
+        results, singles = {}, []
+        try:
+            self._fetch(list(queue), results, singles)
+        except Exception as e:
+            for future in queue.values():
+                future.set_exception(e)
+            return
+
+        for key, future in queue.items():
+            result_key = self.result_key(key)
+            if result_key in results:
+                future.set_result(results[result_key])
+
+        if len(singles) <= 1 or self.workers == 1:
+            for key in singles:
+                self._resolve(key, queue[key])
+            return
+
+        at, level = current_deadline(), current_priority()
+
+        def run(key):
+            with deadline(at=at), priority(level):
+                self._resolve(key, queue[key])
+
+        executor = ThreadPoolExecutor(max_workers=min(self.workers, len(singles)))
+        try:
+            list(executor.map(run, singles))
+        finally:
+            executor.shutdown()
+
+    def _fetch(self, keys, results, singles):
+        """
+        Adds the batch results of **keys** to **results**, splitting batches
+        the node rejects in halves, and the keys left for a single item call
+        to **singles**
+        """
+        if len(keys) == 1:
+            singles.append(keys[0])
+            return
+        try:
+            batch = self.batch(keys)
+        except RPCException:
+            middle = len(keys) // 2
+            self._fetch(keys[:middle], results, singles)
+            self._fetch(keys[middle:], results, singles)
+            return
+        results.update(batch)
+        singles.extend(key for key in keys if self.result_key(key) not in batch)
+
+    def _resolve(self, key, future):
+        try:
+            future.set_result(self.single(key))
+        except Exception as e:
+            future.set_exception(e)
+
+
+class Batcher(object):
+    """
+    Coalesces single item calls into batch RPC calls
+
+    :param rpc: client used to make the batch calls
+    :type rpc: :py:class:`nano.rpc.Client`
+
+    :param window: seconds to wait for more calls before dispatching a batch
+    :type window: float
+
+    :param max_batch_size: dispatch immediately once this many distinct items
+                           are queued
+    :type max_batch_size: int
+
+    :param workers: max number of concurrent single item calls made for the
+                    items a batch call did not return
+    :type workers: int
+    """
+
+    def __init__(self, rpc, window=0.01, max_batch_size=1000, workers=8):
+        self.rpc = rpc
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self.workers = workers
+        self._loaders = {}
+        self._lock = threading.Lock()
+        # batch results are keyed by bytes in bytes identifiers mode, whether
+        # items are submitted as bytes or strings
+        bytes_ids = getattr(rpc, 'identifiers', None) is not None
+        self._account_key = account_to_bytes if bytes_ids else _identity
+        self._hash_key = hash_to_bytes if bytes_ids else _identity
+
+    def _loader(self, method, options):
+        loader_key = (method, options)
+        with self._lock:
+            loader = self._loaders.get(loader_key)
+            if loader is None:
+                batch, single, result_key = getattr(self, '_' + method)(**dict(options))
+                loader = self._loaders[loader_key] = _Loader(
+                    batch,
+                    single,
+                    self.window,
+                    self.max_batch_size,
+                    result_key,
+                    self.workers,
+                )
+        return loader
+
+    def _balance(self, account):
+        balance = self.rpc.account_balance(account=account)
+        # typed like the `accounts_balances` entries
+        if getattr(self.rpc, 'typed_results', False):
+            return Balance.from_dict(balance)
+        return balance
+
+    def _account_balance(self):
+        return (
+            lambda accounts: self.rpc.accounts_balances(accounts=accounts),
+            self._balance,
+            self._account_key,
+        )
+
+    def _account_frontier(self):
+        return (
+            lambda accounts: self.rpc.accounts_frontiers(accounts=accounts),
+            lambda account: self.rpc.account_info(account=account)['frontier'],
+            self._account_key,
+        )
+
+    def _pending(self, count=None, threshold=None, source=False):
+        options = dict(count=count, threshold=threshold, source=source)
+        return (
+            lambda accounts: self.rpc.accounts_pending(accounts=accounts, **options),
+            # `pending` returns typed entries and {} for no blocks, unlike
+            # `accounts_pending`
+            lambda account: self.rpc.accounts_pending(accounts=[account], **options)[
+                self._account_key(account)
+            ],
+            self._account_key,
+        )
+
+    def _block(self):
+        return (
+            lambda hashes: self.rpc.blocks(hashes=hashes),
+            lambda hash: self.rpc.block(hash=hash),
+            self._hash_key,
+        )
+
+    def _block_info(self, pending=False, source=False):
+        options = dict(pending=pending, source=source)
+        return (
+            lambda hashes: self.rpc.blocks_info(hashes=hashes, **options),
+            lambda hash: self.rpc.blocks_info(hashes=[hash], **options)[
+                self._hash_key(hash)
+            ],
+            self._hash_key,
+        )
+
+    def submit(self, method, key, **options):
+        """
+        Queues a single item call and returns a future for its result
+
+        :param method: one of `account_balance`, `account_frontier`,
+                       `pending`, `block` or `block_info`
+        :type method: str
+
+        :param key: account or block hash to get the result for
+        :type key: str
+
+        :param options: extra arguments of the batch call eg. `threshold`,
+                        items are only batched with items sharing the same
+                        options
+
+        :rtype: :py:class:`concurrent.futures.Future`
+        """
+        options = tuple(sorted(options.items()))
+        return self._loader(method, options).load(key)
+
+    def asubmit(self, method, key, loop=None, **options):
+        """
+        Same as :py:meth:`submit` but returns an :py:class:`asyncio.Future`
+        attached to **loop**, defaults to the current event loop
+        """
+        import asyncio
+
+        return asyncio.wrap_future(self.submit(method, key, **options), loop=loop)
+
+    def flush(self):
+        """
+        Dispatches all queued calls without waiting for the window to end
+        """
+        with self._lock:
+            loaders = list(self._loaders.values())
+        for loader in loaders:
+            loader.flush()
+
+    def account_balance(self, account):
+        """
+        Returns the balance and pending amount of **account** like
+        :py:meth:`nano.rpc.Client.account_balance` using `accounts_balances`
+
+        >>> batcher.account_balance(
+        ...     account="xrb_3e3j5tkog48pnny9dmfzj1r16pg8t1e76dz5tmac6iq689wyjfpi00000000"
+        ... )
+        {
+          "balance": 10000,
+          "pending": 10000
+        }
+        """
+        return self.submit('account_balance', account).result()
+
+    def account_frontier(self, account):
+        """
+        Returns the frontier block hash of **account** using
+        `accounts_frontiers`
+
+        >>> batcher.account_frontier(
+        ...     account="xrb_3t6k35gi95xu6tergt6p69ck76ogmitsa8mnijtpxm9fkcm736xtoncuohr3"
+        ... )
+        "791AF413173EEE674A6FCF633B5DFC0F3C33F397F0DA08E987D9E0741D40D81A"
+        """
+        return self.submit('account_frontier', account).result()
+
+    def pending(self, account, count=None, threshold=None, source=False):
+        """
+        Returns the pending blocks of **account** like
+        :py:meth:`nano.rpc.Client.pending` using `accounts_pending`
+
+        >>> batcher.pending(
+        ...     account="xrb_1111111111111111111111111111111111111111111111111117353trpda"
+        ... )
+        [
+            "000D1BAEC8EC208142C99059B393051BAC8380F9B5A2E6B2489A277D81789F3F"
+        ]
+        """
+        return self.submit(
+            'pending', account, count=count, threshold=threshold, source=source
+        ).result()
+
+    def block(self, hash):
+        """
+        Returns the contents of block **hash** like
+        :py:meth:`nano.rpc.Client.block` using `blocks`
+
+        >>> batcher.block(
+        ...     hash="000D1BAEC8EC208142C99059B393051BAC8380F9B5A2E6B2489A277D81789F3F"
+        ... )
+        {
+            "account": "xrb_3e3j5tkog48pnny9dmfzj1r16pg8t1e76dz5tmac6iq689wyjfpi00000000",
+            "work": "0000000000000000",
+            "source": "FA5B51D063BADDF345EFD7EF0D3C5FB115C85B1EF4CDE89D8B7DF3EAF60A04A4",
+            "representative": "xrb_3e3j5tkog48pnny9dmfzj1r16pg8t1e76dz5tmac6iq689wyjfpi00000000",
+            "signature": "00000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000",
+            "type": "open"
+        }
+        """
+        return self.submit('block', hash).result()
+
+    def block_info(self, hash, pending=False, source=False):
+        """
+        Returns the `blocks_info` entry for block **hash**
+
+        >>> batcher.block_info(
+        ...     hash="000D1BAEC8EC208142C99059B393051BAC8380F9B5A2E6B2489A277D81789F3F"
+        ... )
+        {
+            "block_account": "xrb_3e3j5tkog48pnny9dmfzj1r16pg8t1e76dz5tmac6iq689wyjfpi00000000",
+            "amount": 1000000000000000000000000000000,
+            "contents": {...}
+        }
+        """
+        return self.submit('block_info', hash, pending=pending, source=source).result()
@@ -1,4 +1,81 @@
+import json
+
+try:
+    from collections.abc import Mapping
+except ImportError:  # pragma: no cover
+    from collections import Mapping
+
 #: Genesis block hash
 GENESIS_BLOCK_HASH = (
     '991CF190094C00F0B68E2E5F75F6BEE95A2E0BD93CEAA4A6734DB9F19B728948'
 )  # pragma: no cover
+
+#: Block contents are decoded into a dict when received
+EAGER = 'eager'
+
+#: Block contents are decoded on first access, see :py:class:`LazyBlock`
+LAZY = 'lazy'
+
+#: Block contents are returned as the JSON string sent by the node
+RAW = 'raw'
+
+
+class LazyBlock(Mapping):
+    """
+    Read only mapping of block contents which only decodes the JSON string
+    sent by the node the first time a field is accessed
+
+    >>> block = LazyBlock('{"type": "open", "account": "xrb_1"}')
+    >>> block.raw
+    '{"type": "open", "account": "xrb_1"}'
+    >>> block['type']
+    'open'
+    >>> block == {'type': 'open', 'account': 'xrb_1'}
+    True
+    """
+
+    __slots__ = ('raw', '_contents')
+
+    def __init__(self, raw):
+        self.raw = raw
+        self._contents = None
+
+    @property
+    def contents(self):
+        """
+        Decoded block contents
+        """
+        if self._contents is None:
+            self._contents = json.loads(self.raw)
+        return self._contents
+
+    def __getitem__(self, key):
+        return self.contents[key]
+
+    def __iter__(self):
+        return iter(self.contents)
+
+    def __len__(self):
+        return len(self.contents)
+
+    def __repr__(self):
+        return 'LazyBlock(%r)' % self.raw
+
+
+def decode_block(contents, mode=EAGER):
+    """
+    Decodes block **contents** as sent by the node according to **mode**,
+    one of :py:data:`EAGER`, :py:data:`LAZY` or :py:data:`RAW`
+
+    >>> decode_block('{"type": "open"}')
+    {'type': 'open'}
+    >>> decode_block('{"type": "open"}', mode=LAZY)
+    LazyBlock('{"type": "open"}')
+    """
+    if mode == EAGER:
+        return json.loads(contents)
+    if mode == LAZY:
+        return LazyBlock(contents)
+    if mode == RAW:
+        return contents
+    raise ValueError('invalid block contents mode: %r' % mode)
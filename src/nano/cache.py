@@ -0,0 +1,544 @@
+"""
+Response caching for the RPC client
+
+Many node responses never change once they exist (block contents, the
+account owning a block, key/address conversions) and others can be reused
+for a few seconds (representative weights, peers). A
+:py:class:`ResponseCache` decides per RPC action how long a response may be
+reused and stores the raw response bodies in a pluggable backend.
+
+Policies map an action to one of:
+
+- ``FOREVER``: the response is immutable and is kept until evicted
+- a number of seconds: the response is reused for that long
+- ``NEVER``: the response is never cached
+- ``FRONTIER``: the response is kept until the account it was requested for
+  changes, see :py:meth:`ResponseCache.revalidate`
+- a callable taking the request params and returning one of the above
+
+>>> from nano.rpc import Client
+>>> from nano.cache import ResponseCache, MemoryBackend
+>>> cache = ResponseCache(MemoryBackend(max_entries=100000, max_bytes=64 * 2**20))
+>>> rpc = Client('http://localhost:7076', cache=cache)
+>>> rpc.block_account(hash='991CF190094C00F0B68E2E5F75F6BEE95A2E0BD93CEAA4A6734DB9F19B728948')
+'xrb_3t6k35gi95xu6tergt6p69ck76ogmitsa8mnijtpxm9fkcm736xtoncuohr3'
+>>> cache.stats()['hits']
+0
+
+Account level results only change when the account's frontier moves or new
+pending blocks arrive for it. With :py:data:`FRONTIER_POLICIES` these are
+kept indefinitely and a whole set of cached accounts is revalidated with a
+handful of batch calls, dropping only the accounts that changed:
+
+>>> cache = ResponseCache(policies=FRONTIER_POLICIES)
+>>> rpc = Client('http://localhost:7076', cache=cache)
+>>> rpc.account_info(account='xrb_3t6k35gi95xu6tergt6p69ck76ogmitsa8mnijtpxm9fkcm736xtoncuohr3')
+{...}
+>>> cache.revalidate(rpc)
+set()
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from .identifiers import account_to_bytes, bytes_to_hash, hash_to_bytes
+
+#: Cache the response until it is evicted by the backend
+FOREVER = 'forever'
+
+#: Never cache the response
+NEVER = 'never'
+
+#: Cache the response until the frontier or pending blocks of its account change
+FRONTIER = 'frontier'
+
+# marks an account frontier or pending blocks as not yet observed
+_UNKNOWN = object()
+
+
+def _unless_param(param, policy):
+    """
+    Returns a policy that applies `policy` unless the request sets `param`,
+    eg. `blocks_info` contents are immutable but its `pending` flag is not
+    """
+
+    def wrapper(params):
+        if params.get(param) in ('true', True):
+            return NEVER
+        return policy
+
+    return wrapper
+
+
+#: Default caching policies, any action not listed here is never cached
+DEFAULT_POLICIES = {
+    # immutable once the block exists
+    'block': FOREVER,
+    'blocks': FOREVER,
+    'blocks_info': _unless_param('pending', FOREVER),
+    'block_account': FOREVER,
+    'chain': FOREVER,
+    # pure computations done by the node
+    'account_key': FOREVER,
+    'account_get': FOREVER,
+    'deterministic_key': FOREVER,
+    'key_expand': FOREVER,
+    'validate_account_number': FOREVER,
+    'mrai_from_raw': FOREVER,
+    'mrai_to_raw': FOREVER,
+    'krai_from_raw': FOREVER,
+    'krai_to_raw': FOREVER,
+    'rai_from_raw': FOREVER,
+    'rai_to_raw': FOREVER,
+    # tolerate a little staleness
+    'representatives': 60,
+    'available_supply': 60,
+    'peers': 10,
+    'version': 60,
+}
+
+#: Policies caching account level results until the account changes,
+#: account weights depend on delegators so are never cached
+FRONTIER_POLICIES = {
+    'account_info': _unless_param('weight', FRONTIER),
+    'account_balance': FRONTIER,
+    'account_block_count': FRONTIER,
+    'account_history': FRONTIER,
+    'account_representative': FRONTIER,
+    'pending': FRONTIER,
+}
+
+
+def _depends_on_pending(action, params):
+    """
+    Returns True if a response changes when pending blocks arrive
+    """
+    if action in ('account_balance', 'pending'):
+        return True
+    return action == 'account_info' and params.get('pending') in ('true', True)
+
+
+def _pending_signature(blocks):
+    """
+    Returns a compact signature of the pending blocks of an account
+    """
+    h = hashlib.sha1()
+    # hex hashes and hashes as bytes sort the same and give the same signature
+    for block in sorted(blocks or ()):
+        h.update(hash_to_bytes(block))
+    return h.digest()
+
+
+class MemoryBackend(object):
+    """
+    In memory least recently used cache backend
+
+    :param max_entries: maximum number of entries to keep, unbounded if None
+    :type max_entries: int
+
+    :param max_bytes: maximum total size of keys and values to keep,
+                      unbounded if None
+    :type max_bytes: int
+    """
+
+    def __init__(self, max_entries=None, max_bytes=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, now):
+        """
+        Returns the value stored for `key` or None if missing or expired
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= now:
+                self.size -= len(key) + len(value)
+                return None
+
+            self._entries[key] = entry  # mark as most recently used
+            return value
+
+    def set(self, key, value, expires_at):
+        """
+        Stores `value` for `key` until `expires_at` (None for no expiry)
+        """
+        entry_size = len(key) + len(value)
+        if self.max_bytes is not None and entry_size > self.max_bytes:
+            return
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size -= len(key) + len(old[1])
+
+            self._entries[key] = (expires_at, value)
+            self.size += entry_size
+
+            while (
+                self.max_entries is not None and len(self._entries) > self.max_entries
+            ) or (self.max_bytes is not None and self.size > self.max_bytes):
+                old_key, (_, old_value) = self._entries.popitem(last=False)
+                self.size -= len(old_key) + len(old_value)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self.size -= len(key) + len(entry[1])
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+class DiskBackend(object):
+    """
+    Local on-disk cache backend storing one file per entry in **path**
+
+    Entries survive process restarts which makes it suitable for immutable
+    responses such as blocks.
+
+    :param path: directory to store cache entries in, created if missing
+    :type path: str
+    """
+
+    def __init__(self, path):
+        self.path = path
+        if not os.path.isdir(path):
+            os.makedirs(path)
+
+    def _filename(self, key):
+        return os.path.join(
+            self.path, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.cache'
+        )
+
+    def get(self, key, now):
+        """
+        Returns the value stored for `key` or None if missing or expired
+        """
+        filename = self._filename(key)
+        try:
+            with open(filename, 'rb') as f:
+                data = f.read()
+        except (IOError, OSError):
+            return None
+
+        header, _, value = data.partition(b'\n')
+        if header and float(header.decode('ascii')) <= now:
+            self.delete(key)
+            return None
+
+        return value
+
+    def set(self, key, value, expires_at):
+        """
+        Stores `value` for `key` until `expires_at` (None for no expiry)
+        """
+        header = '' if expires_at is None else repr(float(expires_at))
+        fd, tmp_filename = tempfile.mkstemp(dir=self.path)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(header.encode('ascii') + b'\n' + value)
+        os.rename(tmp_filename, self._filename(key))
+
+    def delete(self, key):
+        try:
+            os.unlink(self._filename(key))
+        except (IOError, OSError):
+            pass
+
+    def clear(self):
+        for filename in os.listdir(self.path):
+            if filename.endswith('.cache'):
+                os.unlink(os.path.join(self.path, filename))
+
+
+class ResponseCache(object):
+    """
+    Caches raw RPC response bodies according to per action policies
+
+    :param backend: storage backend, defaults to an unbounded
+                    :py:class:`MemoryBackend`
+    :type backend: :py:class:`MemoryBackend` or :py:class:`DiskBackend`
+
+    :param policies: mapping of action to policy, updates
+                     :py:data:`DEFAULT_POLICIES`
+    :type policies: dict
+
+    :param clock: function returning the current time in seconds
+    :type clock: callable
+    """
+
+    def __init__(self, backend=None, policies=None, clock=time.time):
+        self.backend = backend if backend is not None else MemoryBackend()
+        self.policies = dict(DEFAULT_POLICIES)
+        self.policies.update(policies or {})
+        self.clock = clock
+        self._stats = {}
+        self._accounts = {}
+        self._lock = threading.Lock()
+
+    def policy(self, action, params):
+        """
+        Returns the policy for a request: FOREVER, NEVER or a ttl in seconds
+        """
+        policy = self.policies.get(action, NEVER)
+        if callable(policy):
+            policy = policy(params)
+        return policy
+
+    @staticmethod
+    def key(params):
+        """
+        Returns the cache key for request `params` (including the action)
+        """
+        return json.dumps(params, sort_keys=True, separators=(',', ':'))
+
+    def _count(self, action, stat):
+        with self._lock:
+            counts = self._stats.setdefault(action, {'hits': 0, 'misses': 0})
+            counts[stat] += 1
+
+    def get(self, action, params):
+        """
+        Returns the cached response body for a request or None
+        """
+        policy = self.policy(action, params)
+        if policy == NEVER:
+            return None
+
+        key = self.key(params)
+        if policy == FRONTIER and not self._is_tracked(params['account'], key):
+            value = None  # eg. left in a disk backend by a previous process
+        else:
+            value = self.backend.get(key, self.clock())
+
+        self._count(action, 'misses' if value is None else 'hits')
+        return value
+
+    def state(self, action, params):
+        """
+        Returns the state of the account a FRONTIER response to a request
+        depends on, to be passed to :py:meth:`set` with the response so that
+        it is cached against the state from before the request was sent
+        """
+        if self.policy(action, params) != FRONTIER:
+            return None
+        with self._lock:
+            state = self._accounts.get(params['account'])
+            if state is None:
+                return (_UNKNOWN, _UNKNOWN)
+            return (state['frontier'], state['pending'])
+
+    def set(self, action, params, body, state=None):
+        """
+        Stores the response body for a request if its policy allows it
+
+        :param state: account state from :py:meth:`state` taken before the
+                      request was sent, defaults to the current state
+        """
+        policy = self.policy(action, params)
+        if policy == NEVER:
+            return
+
+        key = self.key(params)
+        if policy == FRONTIER:
+            self._track(action, params, key, body, state)
+            expires_at = None
+        else:
+            expires_at = None if policy == FOREVER else self.clock() + policy
+        self.backend.set(key, body, expires_at)
+
+    def _is_tracked(self, account, key):
+        with self._lock:
+            state = self._accounts.get(account)
+            return state is not None and key in state['keys']
+
+    def _track(self, action, params, key, body, snapshot=None):
+        """
+        Records the account state a FRONTIER response was cached against
+        """
+        account = params['account']
+        with self._lock:
+            state = self._accounts.setdefault(
+                account, {'frontier': _UNKNOWN, 'pending': _UNKNOWN, 'keys': {}}
+            )
+            if snapshot is None:
+                snapshot = (state['frontier'], state['pending'])
+            frontier = snapshot[0]
+            if action == 'account_info':
+                frontier = json.loads(body.decode('utf-8'))['frontier']
+
+            pending = None
+            if _depends_on_pending(action, params):
+                pending = snapshot[1]
+
+            state['keys'][key] = (frontier, pending)
+
+    def revalidate(self, rpc, accounts=None, batch_size=1000):
+        """
+        Checks cached accounts against the node and drops the cached results
+        of accounts whose frontier or pending blocks changed
+
+        Uses one `accounts_frontiers` call (and one `accounts_pending` call
+        for accounts with pending dependent results) per **batch_size**
+        accounts instead of refetching every cached result.
+
+        :param rpc: client used to query the node
+        :type rpc: :py:class:`nano.rpc.Client`
+
+        :param accounts: accounts to revalidate, defaults to all cached accounts
+        :type accounts: list of str
+
+        :param batch_size: max number of accounts per batch call
+        :type batch_size: int
+
+        :return: accounts whose cached results were dropped
+        :rtype: set of str
+
+        >>> cache.revalidate(rpc)
+        {'xrb_3t6k35gi95xu6tergt6p69ck76ogmitsa8mnijtpxm9fkcm736xtoncuohr3'}
+        """
+
+        with self._lock:
+            if accounts is None:
+                accounts = list(self._accounts)
+            else:
+                accounts = [a for a in accounts if a in self._accounts]
+
+        # cached requests hold accounts and hashes as strings, the responses
+        # of a client in bytes identifiers mode hold them as bytes
+        bytes_ids = getattr(rpc, 'identifiers', None) is not None
+
+        changed = set()
+        for i in range(0, len(accounts), batch_size):
+            batch = accounts[i : i + batch_size]
+            frontiers = rpc.accounts_frontiers(accounts=batch)
+
+            with self._lock:
+                pending_accounts = [
+                    account
+                    for account in batch
+                    if account in self._accounts
+                    and any(
+                        p is not None
+                        for _, p in self._accounts[account]['keys'].values()
+                    )
+                ]
+            pending = {}
+            if pending_accounts:
+                pending = rpc.accounts_pending(accounts=pending_accounts)
+
+            for account in batch:
+                key = account_to_bytes(account) if bytes_ids else account
+                frontier = frontiers.get(key)
+                if bytes_ids and frontier is not None:
+                    frontier = bytes_to_hash(frontier)
+                signature = None
+                if account in pending_accounts:
+                    signature = _pending_signature(pending.get(key))
+                if self._update_account(account, frontier, signature):
+                    changed.add(account)
+
+        return changed
+
+    def _update_account(self, account, frontier, pending):
+        """
+        Stores the current state of an account and drops stale results,
+        returns True if any result was dropped
+        """
+        with self._lock:
+            state = self._accounts.get(account)
+            if state is None:
+                return False
+
+            state['frontier'] = frontier
+            if pending is not None:
+                state['pending'] = pending
+
+            stale = [
+                key
+                for key, (cached_frontier, cached_pending) in state['keys'].items()
+                if cached_frontier != frontier
+                or (cached_pending is not None and cached_pending != pending)
+            ]
+            for key in stale:
+                del state['keys'][key]
+
+        for key in stale:
+            self.backend.delete(key)
+
+        return bool(stale)
+
+    def invalidate_account(self, account):
+        """
+        Drops all FRONTIER cached results for **account**
+        """
+        with self._lock:
+            state = self._accounts.pop(account, None)
+
+        for key in state['keys'] if state else ():
+            self.backend.delete(key)
+
+    def invalidate(self, action, params):
+        """
+        Removes the cached response for a request
+        """
+        self.backend.delete(self.key(params))
+
+    def clear(self):
+        """
+        Removes all cached responses and resets statistics
+        """
+        self.backend.clear()
+        with self._lock:
+            self._stats = {}
+            self._accounts = {}
+
+    def stats(self):
+        """
+        Returns hit/miss counts and hit rates, overall and per action
+
+        >>> cache.stats()
+        {
+            'hits': 3,
+            'misses': 1,
+            'hit_rate': 0.75,
+            'actions': {
+                'block': {'hits': 3, 'misses': 1, 'hit_rate': 0.75}
+            }
+        }
+        """
+
+        def _rate(counts):
+            total = counts['hits'] + counts['misses']
+            counts['hit_rate'] = float(counts['hits']) / total if total else 0.0
+            return counts
+
+        with self._lock:
+            actions = dict((k, _rate(dict(v))) for k, v in self._stats.items())
+
+        result = {
+            'hits': sum(v['hits'] for v in actions.values()),
+            'misses': sum(v['misses'] for v in actions.values()),
+        }
+        _rate(result)
+        result['actions'] = actions
+        return result
@@ -0,0 +1,213 @@
+"""
+Chunked, concurrent execution of oversized batch calls
+
+Passing hundreds of thousands of accounts or hashes to a batch action such as
+`accounts_balances` or `blocks_info` produces one huge request that the node
+handles slowly or times out on. A :py:class:`Chunker` attached to the client
+transparently splits the input of batch methods into chunks, runs them on a
+bounded number of threads and merges the results into one mapping.
+
+The chunk size adapts to the observed latency per item so that each request
+takes roughly **target_latency** seconds, is capped so that requests stay
+below **max_request_bytes** and is halved when a chunk times out.
+
+>>> from nano.rpc import Client
+>>> from nano.chunking import Chunker
+>>> rpc = Client('http://localhost:7076', chunker=Chunker(max_workers=4))
+>>> balances = rpc.accounts_balances(accounts=five_hundred_thousand_accounts)
+>>> len(balances)
+500000
+
+Results can also be consumed chunk by chunk as they arrive:
+
+>>> for balances in rpc.chunker.stream(rpc.accounts_balances, accounts):
+...     process(balances)
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+
+from .scheduling import current_priority, priority
+from .timeouts import DeadlineExceeded, current_deadline, deadline
+
+
+class Chunker(object):
+    """
+    Splits batch calls into adaptively sized chunks run concurrently
+
+    :param chunk_size: initial number of items per request
+    :type chunk_size: int
+
+    :param min_chunk_size: chunk size never shrinks below this
+    :type min_chunk_size: int
+
+    :param max_chunk_size: chunk size never grows above this
+    :type max_chunk_size: int
+
+    :param max_workers: max number of chunk requests in flight
+    :type max_workers: int
+
+    :param target_latency: seconds each chunk request should take, keep this
+                           well below the client timeout
+    :type target_latency: float
+
+    :param max_request_bytes: approximate max size of a chunk request
+    :type max_request_bytes: int
+    """
+
+    def __init__(
+        self,
+        chunk_size=1000,
+        min_chunk_size=10,
+        max_chunk_size=50000,
+        max_workers=4,
+        target_latency=1.0,
+        max_request_bytes=4 * 2**20,
+        clock=time.time,
+    ):
+        self.chunk_size = chunk_size
+        self.min_chunk_size = min_chunk_size
+        self.max_chunk_size = max_chunk_size
+        self.max_workers = max_workers
+        self.target_latency = target_latency
+        self.max_request_bytes = max_request_bytes
+        self.clock = clock
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def should_split(self, items):
+        """
+        Returns True if a batch call for **items** should be chunked
+
+        Calls made for a chunk are never split again.
+        """
+        if getattr(self._local, 'active', False):
+            return False
+        return len(items) > self._size_for(items)
+
+    def _size_for(self, items):
+        """
+        Returns the chunk size to use for **items** capped by request size
+        """
+        size = self.chunk_size
+        if self.max_request_bytes and items:
+            item_bytes = len(items[0]) + 4  # quotes, comma and space
+            size = min(size, max(1, self.max_request_bytes // item_bytes))
+        return max(1, size)
+
+    def _observe(self, count, elapsed):
+        """
+        Moves the chunk size halfway towards the size that would have taken
+        **target_latency** seconds for the observed per item latency
+        """
+        if elapsed <= 0:
+            ideal = self.max_chunk_size
+        else:
+            ideal = self.target_latency * count / elapsed
+
+        with self._lock:
+            size = int((self.chunk_size + ideal) / 2)
+            self.chunk_size = min(max(size, self.min_chunk_size), self.max_chunk_size)
+
+    def _shrink(self, count):
+        with self._lock:
+            self.chunk_size = max(min(self.chunk_size, count // 2), self.min_chunk_size)
+
+    def _call(self, func, chunk, kwargs):
+        was_active = getattr(self._local, 'active', False)
+        self._local.active = True
+        start = self.clock()
+        try:
+            result = func(chunk, **kwargs)
+        except DeadlineExceeded:
+            raise
+        except requests.exceptions.Timeout:
+            if len(chunk) <= self.min_chunk_size:
+                raise
+            self._shrink(len(chunk))
+            half = len(chunk) // 2
+            result = self._call(func, chunk[:half], kwargs)
+            result.update(self._call(func, chunk[half:], kwargs))
+            return result
+        finally:
+            self._local.active = was_active
+
+        self._observe(len(chunk), self.clock() - start)
+        return result
+
+    def stream(self, func, items, ordered=True, **kwargs):
+        """
+        Calls batch method **func** for chunks of **items** and yields the
+        result of each chunk
+
+        :param func: batch method taking the list of items as first argument
+                     eg. :py:meth:`nano.rpc.Client.accounts_balances`
+        :type func: callable
+
+        :param items: accounts or block hashes
+        :type items: list of str
+
+        :param ordered: if True results are yielded in input order, otherwise
+                        as soon as each chunk completes
+        :type ordered: bool
+
+        :param kwargs: extra arguments passed to **func** for every chunk
+
+        Chunks run with the deadline and priority of the calling thread, see
+        :py:func:`nano.timeouts.deadline` and
+        :py:func:`nano.scheduling.priority`.
+
+        >>> for chunk in rpc.chunker.stream(rpc.blocks_info, hashes, source=True):
+        ...     print(len(chunk))
+        1000
+        1200
+        """
+
+        items = list(items)
+        at, level = current_deadline(), current_priority()
+
+        def call(chunk):
+            with deadline(at=at), priority(level):
+                return self._call(func, chunk, kwargs)
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        in_flight = deque()
+        position = 0
+
+        try:
+            while position < len(items) or in_flight:
+                while position < len(items) and len(in_flight) < self.max_workers:
+                    size = self._size_for(items)
+                    chunk = items[position : position + size]
+                    position += size
+                    in_flight.append(executor.submit(call, chunk))
+
+                if ordered:
+                    yield in_flight.popleft().result()
+                    continue
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    in_flight.remove(future)
+                    yield future.result()
+        finally:
+            for future in in_flight:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def merge(self, func, items, **kwargs):
+        """
+        Calls batch method **func** for chunks of **items** and merges the
+        resulting mappings
+
+        :return: the combined result of all chunks
+        :rtype: dict
+        """
+        result = {}
+        for chunk_result in self.stream(func, items, **kwargs):
+            result.update(chunk_result)
+        return result
@@ -0,0 +1,226 @@
+"""
+JSON decoding of RPC responses
+
+The node encodes amounts, counts and timestamps as strings. Responses are
+decoded with the fastest JSON library available (`orjson` if installed,
+otherwise the standard library `json`) and the numeric fields of each action
+are then converted to `int` by a coercion function compiled once per action
+from the paths listed in :py:data:`COERCIONS`, visiting only those fields.
+`orjson` decodes JSON numbers beyond 64 bits to floats, which the node never
+sends, so they are only decoded exactly at the top level of a response.
+
+>>> from nano.codec import Codec
+>>> codec = Codec()
+>>> codec.decode('delegators', b'{"delegators": {"xrb_1": "100"}}')
+{'delegators': {'xrb_1': 100}}
+
+A different library can be plugged in through the client:
+
+>>> import ujson
+>>> from nano.rpc import Client
+>>> rpc = Client(codec=Codec(loads=ujson.loads))
+"""
+
+import json
+
+import six
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+#: Matches any value of an object
+ANY = '*'
+
+#: Matches any item of an array
+EACH = '[]'
+
+#: Matches the keys of an object
+KEYS = '{}'
+
+_PENDING = [('blocks', ANY, ANY), ('blocks', ANY, ANY, 'amount')]
+
+#: Paths of the string fields converted to `int` in the response of each
+#: action, a path ending on an object or array converts nothing
+COERCIONS = {
+    'account_history': [('history', EACH, 'amount')],
+    'accounts_balances': [('balances', ANY, ANY)],
+    'accounts_pending': _PENDING,
+    'blocks_info': [('blocks', ANY, 'amount'), ('blocks', ANY, 'pending')],
+    'delegators': [('delegators', ANY)],
+    'history': [('history', EACH, 'amount')],
+    'ledger': [
+        ('accounts', ANY, key)
+        for key in ('balance', 'modified_timestamp', 'block_count', 'weight', 'pending')
+    ],
+    'peers': [('peers', ANY)],
+    'pending': [('blocks', ANY), ('blocks', ANY, 'amount')],
+    'representatives': [('representatives', ANY)],
+    'wallet_balances': [('balances', ANY, ANY)],
+    'wallet_pending': _PENDING,
+}
+
+
+def _stdlib_loads(body):
+    if isinstance(body, bytes):
+        body = body.decode('utf-8')
+    return json.loads(body)
+
+
+def _orjson_loads(body):
+    if isinstance(body, six.text_type):
+        body = body.encode('utf-8')
+    result = orjson.loads(body)
+    # orjson decodes integers outside of the 64 bit range as floats. The node
+    # sends numbers as strings, so only top level numbers are checked, which
+    # keeps the decoding a single pass over the document
+    if isinstance(result, float) or (
+        isinstance(result, dict) and float in set(map(type, result.values()))
+    ):
+        return _stdlib_loads(body)
+    return result
+
+
+def _identity(value):
+    return value
+
+
+def compile_coercion(paths, convert=int):
+    """
+    Compiles **paths** into a function converting the matching string fields
+    of a decoded response to `int` in place, see :py:data:`COERCIONS`
+
+    :param paths: tuples of object keys, :py:data:`ANY`, :py:data:`EACH` or
+                  :py:data:`KEYS` as last step
+    :type paths: list of tuple
+
+    :param convert: function applied to the matching non empty strings
+    :type convert: callable
+
+    :rtype: callable
+
+    >>> coerce = compile_coercion([('history', EACH, 'amount')])
+    >>> coerce({'history': [{'hash': 'A', 'amount': '1'}]})
+    {'history': [{'hash': 'A', 'amount': 1}]}
+    """
+    tree = {}
+    for path in paths:
+        node = tree
+        for step in path:
+            node = node.setdefault(step, {})
+        node[None] = convert
+    return _compile_node(tree)
+
+
+def _is_leaf(tree):
+    return list(tree) == [None]
+
+
+def _compile_node(tree):
+    convert = tree.get(None)
+    children = [(k, v) for k, v in tree.items() if k not in (None, ANY, EACH, KEYS)]
+    # fields converted directly, sparing a function call per field
+    leaves = [(k, v[None]) for k, v in children if _is_leaf(v)]
+    keys = [(k, _compile_node(v)) for k, v in children if not _is_leaf(v)]
+    any_convert = any_value = None
+    if ANY in tree:
+        if _is_leaf(tree[ANY]):
+            any_convert = tree[ANY][None]
+        else:
+            any_value = _compile_node(tree[ANY])
+    each_item = _compile_node(tree[EACH]) if EACH in tree else None
+    convert_key = tree[KEYS].get(None) if KEYS in tree else None
+    # objects that only have fields converted are coerced in place by the
+    # loop over their parent, sparing a function call per object
+    any_fields = getattr(any_value, 'fields', None)
+    any_leaves = getattr(any_value, 'leaves', None)
+    each_fields = getattr(each_item, 'fields', None)
+    strings = six.string_types
+
+    def coerce_fields(value):
+        for key, leaf_convert in leaves:
+            if key in value:
+                item = value[key]
+                if item and isinstance(item, strings):
+                    value[key] = leaf_convert(item)
+        for key, child in keys:
+            if key in value:
+                value[key] = child(value[key])
+
+    def coerce(value):
+        if isinstance(value, strings):
+            return convert(value) if convert and value else value
+        if isinstance(value, dict):
+            coerce_fields(value)
+            if any_convert is not None:
+                for key, item in value.items():
+                    if item and isinstance(item, strings):
+                        value[key] = any_convert(item)
+            elif any_leaves is not None:
+                for item in value.values():
+                    if isinstance(item, dict):
+                        for key, leaf_convert in any_leaves:
+                            if key in item:
+                                field = item[key]
+                                if field and isinstance(field, strings):
+                                    item[key] = leaf_convert(field)
+            elif any_fields is not None:
+                for item in value.values():
+                    if isinstance(item, dict):
+                        any_fields(item)
+            elif any_value is not None:
+                for key, item in value.items():
+                    value[key] = any_value(item)
+            if convert_key is not None:
+                value = dict((convert_key(k), v) for k, v in value.items())
+        elif isinstance(value, list) and each_fields is not None:
+            for item in value:
+                if isinstance(item, dict):
+                    each_fields(item)
+        elif isinstance(value, list) and each_item is not None:
+            for index, item in enumerate(value):
+                value[index] = each_item(item)
+        return value
+
+    if not (convert or any_convert or any_value or each_item or convert_key):
+        coerce.fields = coerce_fields
+        if not keys:
+            coerce.leaves = leaves
+    return coerce
+
+
+class Codec(object):
+    """
+    Decodes RPC responses and coerces their numeric fields
+
+    :param loads: function decoding a JSON document from bytes, defaults to
+                  `orjson.loads` if available, otherwise `json.loads`
+    :type loads: callable
+
+    :param coercions: mapping of action to coerced field paths, defaults to
+                      :py:data:`COERCIONS`
+    :type coercions: dict
+    """
+
+    def __init__(self, loads=None, coercions=None):
+        if loads is None:
+            loads = _orjson_loads if orjson is not None else _stdlib_loads
+        self.loads = loads
+        self.coercions = dict(
+            (action, compile_coercion(paths))
+            for action, paths in (coercions or COERCIONS).items()
+        )
+
+    def coerce(self, action, result):
+        """
+        Converts the numeric fields of the decoded response of **action**
+        """
+        return self.coercions.get(action, _identity)(result)
+
+    def decode(self, action, body):
+        """
+        Decodes response **body** of **action** and converts its numeric
+        fields
+        """
+        return self.coerce(action, self.loads(body))
@@ -0,0 +1,275 @@
+"""
+Columnar export of bulk RPC results to NumPy arrays
+
+Results of `ledger`, `accounts_balances`, `representatives` and `delegators`
+are converted into one NumPy array per field, accounts and hashes as fixed
+width byte strings, amounts split into two `uint64` columns holding the high
+and low 64 bits of the 128 bit raw amount and counts and timestamps as
+`int64`. The 32 byte identifiers of bytes identifiers mode are stored as
+`V32` rather than byte strings, which would drop trailing NUL bytes. Rows are appended in chunks so only one chunk of rows exists as
+Python objects at any time, which allows building columns page by page from
+the streaming iterators.
+
+NumPy is an optional dependency, install it with `pip install numpy`.
+
+>>> from nano.columnar import LEDGER, ColumnBuilder, u128_to_float
+>>> from nano.iterators import iter_ledger
+>>> builder = ColumnBuilder(LEDGER)
+>>> builder.extend(iter_ledger(rpc, page_size=10000))
+>>> columns = builder.build()
+>>> rich = columns['account'][u128_to_float(columns['balance_hi'], columns['balance_lo']) > 1e36]
+
+Streamed responses can be consumed the same way:
+
+>>> from nano.columnar import WEIGHTS, ColumnBuilder
+>>> from nano.streaming import stream_call
+>>> builder = ColumnBuilder(WEIGHTS)
+>>> builder.extend(stream_call(rpc, 'delegators', {'account': representative}))
+>>> columns = builder.build()
+>>> u128_sum(columns['weight_hi'], columns['weight_lo'])
+1461647970820730000000000000000000000
+"""
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+#: Column source for the key of a mapping entry
+KEY = '<key>'
+
+#: Column source for the value of a mapping entry
+VALUE = '<value>'
+
+#: Column kind holding accounts or hashes as fixed width byte strings
+BYTES = 'bytes'
+
+#: Column kind holding 128 bit amounts as `<name>_hi` and `<name>_lo` uint64
+U128 = 'u128'
+
+#: Column kind holding `int64` integers
+INT64 = 'int64'
+
+#: Columns of `ledger` results, (column, source, kind)
+LEDGER = [
+    ('account', KEY, BYTES),
+    ('frontier', 'frontier', BYTES),
+    ('open_block', 'open_block', BYTES),
+    ('representative_block', 'representative_block', BYTES),
+    ('balance', 'balance', U128),
+    ('modified_timestamp', 'modified_timestamp', INT64),
+    ('block_count', 'block_count', INT64),
+    ('representative', 'representative', BYTES),
+    ('weight', 'weight', U128),
+    ('pending', 'pending', U128),
+]
+
+#: Columns of `accounts_balances` results
+BALANCES = [
+    ('account', KEY, BYTES),
+    ('balance', 'balance', U128),
+    ('pending', 'pending', U128),
+]
+
+#: Columns of `representatives` and `delegators` results
+WEIGHTS = [('account', KEY, BYTES), ('weight', VALUE, U128)]
+
+_U64_MASK = 2**64 - 1
+
+#: NumPy type of the 32 byte identifiers of bytes identifiers mode
+ID_DTYPE = 'V32'
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError('numpy is required for columnar results')
+
+
+def _field(value, source):
+    if source == VALUE:
+        return value
+    return value.get(source)
+
+
+def _is_id(value):
+    return isinstance(value, bytes) and len(value) == 32
+
+
+def _to_bytes(value):
+    if isinstance(value, bytes):
+        return value
+    return value.encode('ascii')
+
+
+class ColumnBuilder(object):
+    """
+    Builds NumPy columns from (key, value) entries of a bulk result
+
+    Columns whose source field is missing from the first entry are left out,
+    eg. `representative` of a `ledger` called without `representative=True`.
+    :py:data:`BYTES` columns holding `bytes` in the first entry are
+    :py:data:`ID_DTYPE` columns, with zero bytes for missing values.
+
+    :param schema: list of (column, source, kind), see :py:data:`LEDGER`
+    :type schema: list
+
+    :param chunk_size: number of rows buffered as Python objects before they
+                       are converted to arrays
+    :type chunk_size: int
+
+    :raises: :py:exc:`ImportError` if NumPy is not installed
+    """
+
+    def __init__(self, schema, chunk_size=65536):
+        _require_numpy()
+        self.schema = schema
+        self.chunk_size = chunk_size
+        self.columns = None
+        self._ids = None
+        self._rows = []
+        self._chunks = []
+        self._count = 0
+
+    def _select_columns(self, key, value):
+        self.columns = [
+            (name, source, kind)
+            for name, source, kind in self.schema
+            if source == KEY or _field(value, source) is not None
+        ]
+        self._ids = set(
+            name
+            for name, source, kind in self.columns
+            if kind == BYTES and _is_id(key if source == KEY else _field(value, source))
+        )
+
+    def append(self, key, value):
+        """
+        Appends the row for entry **key**, **value**
+        """
+        if self.columns is None:
+            self._select_columns(key, value)
+        self._rows.append((key, value))
+        if len(self._rows) >= self.chunk_size:
+            self._flush()
+
+    def extend(self, entries):
+        """
+        Appends rows for **entries**, a mapping or an iterable of
+        (key, value) pairs such as :py:func:`nano.iterators.iter_ledger`
+        """
+        if hasattr(entries, 'items'):
+            entries = entries.items()
+        for key, value in entries:
+            self.append(key, value)
+
+    def _flush(self):
+        if not self._rows:
+            return
+        chunk = {}
+        for name, source, kind in self.columns:
+            if source == KEY:
+                values = [key for key, _ in self._rows]
+            else:
+                values = [_field(value, source) for _, value in self._rows]
+
+            if kind == BYTES and name in self._ids:
+                chunk[name] = np.array(
+                    [v if v is not None else b'' for v in values], dtype=ID_DTYPE
+                )
+            elif kind == BYTES:
+                chunk[name] = np.array(
+                    [_to_bytes(v) if v is not None else b'' for v in values],
+                    dtype=bytes,
+                )
+            elif kind == INT64:
+                chunk[name] = np.array(
+                    [int(v) if v is not None else 0 for v in values], dtype=np.int64
+                )
+            elif kind == U128:
+                amounts = [int(v) if v is not None else 0 for v in values]
+                chunk[name + '_hi'] = np.array(
+                    [amount >> 64 for amount in amounts], dtype=np.uint64
+                )
+                chunk[name + '_lo'] = np.array(
+                    [amount & _U64_MASK for amount in amounts], dtype=np.uint64
+                )
+            else:
+                raise ValueError('invalid column kind: %r' % kind)
+        self._chunks.append(chunk)
+        self._count += len(self._rows)
+        self._rows = []
+
+    def __len__(self):
+        return self._count + len(self._rows)
+
+    def build(self):
+        """
+        Returns the columns of all rows appended so far as a dict of arrays
+
+        :rtype: dict
+        """
+        self._flush()
+        if not self._chunks:
+            return {}
+        if len(self._chunks) == 1:
+            return dict(self._chunks[0])
+        return dict(
+            (name, np.concatenate([chunk[name] for chunk in self._chunks]))
+            for name in self._chunks[0]
+        )
+
+
+def to_columns(schema, entries):
+    """
+    Converts a bulk result **entries** to NumPy columns
+
+    :param schema: list of (column, source, kind), see :py:data:`LEDGER`
+    :type schema: list
+
+    :param entries: result mapping or iterable of (key, value) pairs
+    :type entries: dict
+
+    :rtype: dict
+
+    >>> to_columns(BALANCES, rpc.accounts_balances(accounts))
+    {'account': array([b'xrb_3e3j5tkog48pnny9dmfzj1r16pg8t1e76dz5tmac6iq689wyjfpi00000000'], dtype='|S64'),
+     'balance_hi': array([0], dtype=uint64),
+     'balance_lo': array([10000], dtype=uint64),
+     'pending_hi': array([0], dtype=uint64),
+     'pending_lo': array([10000], dtype=uint64)}
+    """
+    builder = ColumnBuilder(schema)
+    builder.extend(entries)
+    return builder.build()
+
+
+def u128_to_float(hi, lo):
+    """
+    Returns a `float64` array of 128 bit amounts split in **hi** and **lo**,
+    precise enough for filtering and ranking
+    """
+    _require_numpy()
+    return hi.astype(np.float64) * 2.0**64 + lo.astype(np.float64)
+
+
+def u128_to_int(hi, lo):
+    """
+    Returns an object array of the exact Python int amounts
+    """
+    _require_numpy()
+    return (hi.astype(object) << 64) + lo.astype(object)
+
+
+def u128_sum(hi, lo):
+    """
+    Returns the exact sum of 128 bit amounts split in **hi** and **lo** as a
+    Python int, sums up to 2 ** 32 rows without overflowing
+    """
+    _require_numpy()
+    low_words = lo & np.uint64(0xFFFFFFFF)
+    high_words = lo >> np.uint64(32)
+    return (
+        (int(hi.sum(dtype=np.uint64)) << 64)
+        + (int(high_words.sum(dtype=np.uint64)) << 32)
+        + int(low_words.sum(dtype=np.uint64))
+    )
@@ -0,0 +1,215 @@
+"""
+Bytes identifiers mode
+
+Block hashes, public keys and accounts are exchanged with the node as 64
+character hex strings or addresses, three to four times the size of the 32
+bytes they encode. With `nano.rpc.Client(bytes_ids=True)` methods accept
+32 byte `bytes` for these arguments and return `bytes` for the hashes and
+accounts found in the responses of the actions listed in
+:py:data:`IDENTIFIERS`, converting at the transport boundary only.
+
+Accounts are converted to their public key, the checksum of addresses
+received from the node is not verified. Private keys, wallet ids, work
+values and the contents of blocks (`block`, `blocks`, the `contents` of
+`blocks_info`, the `block` of `block_create`) are left as returned by the
+node.
+
+>>> from nano.rpc import Client
+>>> rpc = Client('http://localhost:7076', bytes_ids=True)
+>>> rpc.chain(block=frontier, count=2)
+[b'\\x00\\r\\x1b\\xae\\xc8\\xec \\x81B\\xc9\\x90Y\\xb3\\x93\\x05\\x1b\\xac\\x83\\x80\\xf9\\xb5\\xa2\\xe6\\xb2H\\x9a\\'}\\x81x\\x9f?',
+ b'\\xe7\\x1a\\xf3\\xe9\\xdd\\x86\\xbb\\xd8\\xb4b\\x0e\\xfac\\xe0e\\xb3M5\\x8c\\xfc\\t\\x1a\\xcbN\\x10;\\x96_\\x95x3!']
+"""
+
+from binascii import hexlify, unhexlify
+
+from .accounts import public_key_to_xrb_address
+from .codec import ANY, EACH, KEYS, compile_coercion
+from .crypto import b32xrb_decode
+
+#: Argument types of :py:meth:`nano.rpc.Client._process_value` holding
+#: accounts
+ACCOUNT_TYPES = ('account', 'accounts')
+
+#: Argument types of :py:meth:`nano.rpc.Client._process_value` holding block
+#: hashes or public keys
+HASH_TYPES = ('block', 'blocks', 'publickey')
+
+_ACCOUNT = 'account'
+_HASH = 'hash'
+
+_HISTORY = [
+    (_HASH, ('history', EACH, 'hash')),
+    (_ACCOUNT, ('history', EACH, 'account')),
+]
+_FRONTIERS = [(_ACCOUNT, ('frontiers', KEYS)), (_HASH, ('frontiers', ANY))]
+_ACCOUNTS_PENDING = [
+    (_ACCOUNT, ('blocks', KEYS)),
+    (_HASH, ('blocks', ANY, EACH)),
+    (_HASH, ('blocks', ANY, KEYS)),
+    (_ACCOUNT, ('blocks', ANY, ANY, 'source')),
+]
+_KEY = [(_HASH, ('public',)), (_ACCOUNT, ('account',))]
+_ACCOUNT_INFO = [
+    (_HASH, ('frontier',)),
+    (_HASH, ('open_block',)),
+    (_HASH, ('representative_block',)),
+    (_ACCOUNT, ('representative',)),
+]
+
+#: Kind and path of the identifiers converted to bytes in the response of
+#: each action, see :py:func:`nano.codec.compile_coercion`
+IDENTIFIERS = {
+    'account_create': [(_ACCOUNT, ('account',))],
+    'account_get': [(_ACCOUNT, ('account',))],
+    'account_history': _HISTORY,
+    'account_info': _ACCOUNT_INFO,
+    'account_key': [(_HASH, ('key',))],
+    'account_list': [(_ACCOUNT, ('accounts', EACH))],
+    'account_representative': [(_ACCOUNT, ('representative',))],
+    'account_representative_set': [(_HASH, ('block',))],
+    'accounts_create': [(_ACCOUNT, ('accounts', EACH))],
+    'accounts_balances': [(_ACCOUNT, ('balances', KEYS))],
+    'accounts_frontiers': _FRONTIERS,
+    'accounts_pending': _ACCOUNTS_PENDING,
+    'block_account': [(_ACCOUNT, ('account',))],
+    'block_create': [(_HASH, ('hash',))],
+    'blocks': [(_HASH, ('blocks', KEYS))],
+    'blocks_info': [
+        (_HASH, ('blocks', KEYS)),
+        (_ACCOUNT, ('blocks', ANY, 'block_account')),
+        (_ACCOUNT, ('blocks', ANY, 'source_account')),
+    ],
+    'chain': [(_HASH, ('blocks', EACH))],
+    'delegators': [(_ACCOUNT, ('delegators', KEYS))],
+    'deterministic_key': _KEY,
+    'frontiers': _FRONTIERS,
+    'history': _HISTORY,
+    'key_create': _KEY,
+    'key_expand': _KEY,
+    'ledger': [
+        (_ACCOUNT, ('accounts', KEYS)),
+        (_ACCOUNT, ('accounts', ANY, 'representative')),
+    ]
+    + [
+        (_HASH, ('accounts', ANY, key))
+        for key in ('frontier', 'open_block', 'representative_block')
+    ],
+    'payment_begin': [(_ACCOUNT, ('account',))],
+    'pending': [
+        (_HASH, ('blocks', KEYS)),
+        (_HASH, ('blocks', EACH)),
+        (_ACCOUNT, ('blocks', ANY, 'source')),
+    ],
+    'process': [(_HASH, ('hash',))],
+    'receive': [(_HASH, ('block',))],
+    'representatives': [(_ACCOUNT, ('representatives', KEYS))],
+    'republish': [(_HASH, ('blocks', EACH))],
+    'send': [(_HASH, ('block',))],
+    'successors': [(_HASH, ('blocks', EACH))],
+    'wallet_add': [(_ACCOUNT, ('account',))],
+    'wallet_balances': [(_ACCOUNT, ('balances', KEYS))],
+    'wallet_frontiers': _FRONTIERS,
+    'wallet_pending': _ACCOUNTS_PENDING,
+    'wallet_representative': [(_ACCOUNT, ('representative',))],
+}
+
+
+def account_to_bytes(account):
+    """
+    Returns the public key of **account** without verifying its checksum,
+    values which are not addresses are returned unchanged
+
+    >>> account_to_bytes('xrb_1111111111111111111111111111111111111111111111111111hifc8npp')
+    b'\\x00\\x00\\x00\\x00\\x00\\x00\\x00\\x00\\x00\\x00\\x00\\x00\\x00\\x00\\x00\\x00\\x00\\x00\\x00\\x00\\x00\\x00\\x00\\x00\\x00\\x00\\x00\\x00\\x00\\x00\\x00\\x00'
+    """
+    if len(account) not in (64, 65) or account[-61] != '_':
+        return account
+    return b32xrb_decode(b'1111' + account[-60:-8].encode('ascii'))[3:]
+
+
+def bytes_to_account(key):
+    """
+    Returns the address of public key **key**
+    """
+    return public_key_to_xrb_address(key)
+
+
+def hash_to_bytes(value):
+    """
+    Returns the bytes of hex block hash or public key **value**, values which
+    are not 64 hex characters are returned unchanged
+    """
+    if len(value) != 64:
+        return value
+    try:
+        return unhexlify(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def bytes_to_hash(value):
+    """
+    Returns the upper case hex representation of **value**
+    """
+    return hexlify(value).decode('ascii').upper()
+
+
+_DECODERS = {_ACCOUNT: account_to_bytes, _HASH: hash_to_bytes}
+
+
+def _compile(identifiers):
+    steps = []
+    for name, decoder in _DECODERS.items():
+        paths = [path for kind, path in identifiers if kind == name]
+        if paths:
+            steps.append(compile_coercion(paths, decoder))
+
+    def convert(result):
+        for step in steps:
+            result = step(result)
+        return result
+
+    return convert
+
+
+class BytesIdentifiers(object):
+    """
+    Converts identifiers of requests from and responses to bytes
+
+    :param identifiers: mapping of action to the kind and path of the
+                        identifiers in its response, defaults to
+                        :py:data:`IDENTIFIERS`
+    :type identifiers: dict
+    """
+
+    def __init__(self, identifiers=None):
+        self.identifiers = dict(
+            (action, _compile(paths))
+            for action, paths in (identifiers or IDENTIFIERS).items()
+        )
+
+    def encode(self, value, type):
+        """
+        Converts argument **value** of **type** to the representation
+        expected by the node if it is given as bytes
+        """
+        if isinstance(value, list):
+            return [self.encode(item, type) for item in value]
+        if not isinstance(value, bytes) or len(value) != 32:
+            return value
+        if type in ACCOUNT_TYPES:
+            return bytes_to_account(value)
+        if type in HASH_TYPES:
+            return bytes_to_hash(value)
+        return value
+
+    def decode(self, action, result):
+        """
+        Converts the identifiers in decoded response **result** of **action**
+        to bytes
+        """
+        convert = self.identifiers.get(action)
+        if convert is None:
+            return result
+        return convert(result)
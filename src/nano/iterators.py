@@ -0,0 +1,748 @@
+"""
+Iterators streaming large RPC results page by page
+
+>>> from nano.rpc import Client
+>>> from nano.iterators import iter_ledger
+>>> rpc = Client('http://localhost:7076')
+>>> for account, info in iter_ledger(rpc, page_size=1000, pending=True):
+...     print(account, info['balance'], info['pending'])
+
+The account key space can be split into ranges walked concurrently:
+
+>>> from nano.iterators import LedgerScanner
+>>> scanner = LedgerScanner(rpc, shards=16, sample=True)
+>>> scanner.run(sink=lambda account, info: db.save(account, info))
+1048576
+
+Account history is paged backwards from the frontier, stopping at the last
+block already synced:
+
+>>> from nano.iterators import iter_account_history
+>>> for entry in iter_account_history(rpc, account, until_hash=last_synced):
+...     db.save(entry)
+
+Account chains are walked with the block contents fetched ahead:
+
+>>> from nano.iterators import iter_chain
+>>> for hash, info in iter_chain(rpc, frontier, source=True):
+...     audit(hash, info['contents'])
+"""
+
+import threading
+import time
+from binascii import hexlify, unhexlify
+from concurrent.futures import ThreadPoolExecutor
+
+from six.moves import queue
+
+import requests
+
+from .accounts import public_key_to_xrb_address, xrb_address_to_public_key
+from .identifiers import account_to_bytes, hash_to_bytes
+from .scheduling import current_priority, priority
+from .timeouts import DeadlineExceeded, current_deadline, deadline, resolve_deadline
+
+#: Largest possible account public key as an integer
+MAX_ACCOUNT_KEY = 2**256 - 1
+
+
+def account_to_key(account):
+    """
+    Returns the public key of **account** as an integer, **account** can also
+    be given as public key bytes
+
+    Accounts order the same way as their keys which is the order the node
+    walks the ledger in.
+
+    >>> account_to_key('xrb_1111111111111111111111111111111111111111111111111113b8661hfk')
+    1
+    """
+    if isinstance(account, bytes):
+        return int(hexlify(account), 16)
+    return int(hexlify(xrb_address_to_public_key(account)), 16)
+
+
+def key_to_account(key):
+    """
+    Returns the account for public key **key** given as an integer
+
+    >>> key_to_account(0)
+    'xrb_1111111111111111111111111111111111111111111111111111hifc8npp'
+    """
+    return public_key_to_xrb_address(unhexlify('%064x' % key))
+
+
+def _sort_key(account):
+    # the encoded key part of an address sorts like the key itself,
+    # regardless of the xrb_ / nano_ prefix, public key bytes sort as they are
+    if isinstance(account, bytes):
+        return account
+    return account[-60:-8]
+
+
+def _retrying(func, retries, retry_delay, at=None):
+    """
+    Calls **func** retrying transport errors with exponential backoff, the
+    requests it makes are bounded by the deadline timestamp **at**
+    """
+    attempt = 0
+    while True:
+        try:
+            with deadline(at=at):
+                return func()
+        except DeadlineExceeded:
+            raise
+        except requests.exceptions.RequestException:
+            delay = retry_delay * 2**attempt
+            if attempt >= retries or (at is not None and time.time() + delay >= at):
+                raise
+            time.sleep(delay)
+            attempt += 1
+
+
+class LedgerIterator(object):
+    """
+    Iterates over (account, info) pairs of the whole ledger in key order,
+    see :py:func:`iter_ledger`
+
+    :py:attr:`checkpoint` is the first account that has not been fully
+    processed yet: the account last yielded until the next one is requested.
+    Pass it as **start** to resume an interrupted scan.
+
+    If **end** is given, iteration stops before the first account whose key is
+    greater or equal to it.
+
+    If **deadline** is given, the whole iteration must complete within that
+    many seconds, see :py:mod:`nano.timeouts`.
+    """
+
+    def __init__(
+        self,
+        rpc,
+        start=None,
+        end=None,
+        page_size=1000,
+        representative=False,
+        weight=False,
+        pending=False,
+        prefetch=True,
+        retries=3,
+        retry_delay=1.0,
+        deadline=None,
+    ):
+        self.rpc = rpc
+        self.page_size = page_size
+        self.options = dict(
+            representative=representative, weight=weight, pending=pending
+        )
+        self.prefetch = prefetch
+        self.retries = retries
+        self.retry_delay = retry_delay
+        # accounts are public key bytes in bytes identifiers mode
+        self._bytes_ids = getattr(rpc, 'identifiers', None) is not None
+        self.checkpoint = start or self._account(0)
+        if self._bytes_ids and end is not None and not isinstance(end, bytes):
+            end = account_to_bytes(end)
+        self.end = end
+        self.deadline = deadline
+        self._at = None
+
+    def _account(self, key):
+        """
+        Returns the account for public key **key** given as an integer, as
+        the client returns accounts
+        """
+        if self._bytes_ids:
+            return unhexlify('%064x' % key)
+        return key_to_account(key)
+
+    def _fetch(self, cursor):
+        return _retrying(
+            lambda: self.rpc.ledger(
+                account=cursor, count=self.page_size, **self.options
+            ),
+            self.retries,
+            self.retry_delay,
+            self._at,
+        )
+
+    def _next_cursor(self, page):
+        """
+        Returns the account right after the last one of **page** or None if
+        the ledger has been fully walked
+        """
+        if len(page) < self.page_size:
+            return None
+        last_key = account_to_key(max(page, key=_sort_key))
+        if last_key >= MAX_ACCOUNT_KEY:
+            return None
+        cursor = self._account(last_key + 1)
+        if self._past_end(cursor):
+            return None
+        return cursor
+
+    def _past_end(self, account):
+        return self.end is not None and _sort_key(account) >= _sort_key(self.end)
+
+    def __iter__(self):
+        self._at = resolve_deadline(self.deadline)
+        executor = ThreadPoolExecutor(max_workers=1) if self.prefetch else None
+        cursor = self.checkpoint
+        try:
+            page = self._fetch(cursor)
+            while True:
+                cursor = self._next_cursor(page)
+                next_page = None
+                if cursor is not None and executor is not None:
+                    next_page = executor.submit(self._fetch, cursor)
+
+                for account in sorted(page, key=_sort_key):
+                    if self._past_end(account):
+                        cursor = None
+                        break
+                    self.checkpoint = account
+                    yield account, page[account]
+
+                if cursor is None:
+                    self.checkpoint = None
+                    return
+
+                self.checkpoint = cursor
+                if next_page is not None:
+                    page = next_page.result()
+                else:
+                    page = self._fetch(cursor)
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False)
+
+
+def iter_ledger(
+    rpc,
+    start=None,
+    end=None,
+    page_size=1000,
+    representative=False,
+    weight=False,
+    pending=False,
+    prefetch=True,
+    retries=3,
+    retry_delay=1.0,
+    deadline=None,
+):
+    """
+    Streams (account, info) pairs for every account in the ledger using
+    paginated `ledger` calls, only holding one page (plus the prefetched
+    next one) in memory
+
+    :param rpc: client to use
+    :type rpc: :py:class:`nano.rpc.Client`
+
+    :param start: account to start at (inclusive), defaults to the lowest
+                  possible account
+    :type start: str
+
+    :param end: account to stop before (exclusive), defaults to the end of
+                the ledger
+    :type end: str
+
+    :param page_size: number of accounts to request per `ledger` call
+    :type page_size: int
+
+    :param representative: If true, returns the representative as well
+    :type representative: bool
+
+    :param weight: If true, returns the voting weight as well
+    :type weight: bool
+
+    :param pending: If true, returns the pending amount as well
+    :type pending: bool
+
+    :param prefetch: If true, fetches the next page in a background thread
+                     while the current one is being consumed
+    :type prefetch: bool
+
+    :param retries: number of times a page is retried after a transport error
+    :type retries: int
+
+    :param retry_delay: seconds to wait before the first retry, doubled for
+                        every following retry
+    :type retry_delay: float
+
+    :param deadline: seconds the whole iteration must complete in, requests
+                     raise :py:exc:`nano.timeouts.DeadlineExceeded` after
+    :type deadline: float
+
+    :rtype: :py:class:`LedgerIterator`
+
+    >>> ledger = iter_ledger(rpc, page_size=2)
+    >>> for account, info in ledger:
+    ...     save(account, info)
+    ...     store_checkpoint(ledger.checkpoint)
+    >>> next(iter(iter_ledger(rpc, start=load_checkpoint())))
+    ('xrb_11119gbh8hb4hj1duf7fdtfyf5s75okzxdgupgpgm1bj78ex3kgy7frt3s9n',
+     {'frontier': 'E71AF3E9DD86BBD8B4620EFA63E065B34D358CFC091ACB4E103B965F95783321',
+      'open_block': '643B77F1ECEFBDBE1CC909872964C1DBBE23A6149BD3CEF2B50B76044659B60F',
+      'representative_block': '643B77F1ECEFBDBE1CC909872964C1DBBE23A6149BD3CEF2B50B76044659B60F',
+      'balance': 0,
+      'modified_timestamp': 1511476234,
+      'block_count': 2})
+    """
+    return LedgerIterator(
+        rpc,
+        start=start,
+        end=end,
+        page_size=page_size,
+        representative=representative,
+        weight=weight,
+        pending=pending,
+        prefetch=prefetch,
+        retries=retries,
+        retry_delay=retry_delay,
+        deadline=deadline,
+    )
+
+
+_DONE = object()
+
+
+def _put(output, item, stop):
+    """
+    Puts **item** on the bounded **output** queue unless **stop** gets set
+    while waiting for room, returns False in that case
+    """
+    while not stop.is_set():
+        try:
+            output.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+class LedgerScanner(object):
+    """
+    Scans the whole ledger by splitting the account key space into
+    **shards** ranges which are walked concurrently, each with its own
+    `ledger` cursor, so that the node's RPC worker threads are all put to use
+
+    Account keys are uniformly distributed so ranges of equal key width hold
+    about the same number of accounts. With **sample** set, a quick sampling
+    pass of small `ledger` calls estimates the account density instead and
+    sizes the ranges to hold equal estimated counts.
+
+    The shards run with the deadline and priority of the thread starting the
+    scan, see :py:func:`nano.timeouts.deadline` and
+    :py:func:`nano.scheduling.priority`.
+
+    :param rpc: client to use
+    :type rpc: :py:class:`nano.rpc.Client`
+
+    :param shards: number of ranges walked concurrently
+    :type shards: int
+
+    :param page_size: number of accounts per `ledger` call
+    :type page_size: int
+
+    :param sample: if True, sizes ranges from a sampling pass
+    :type sample: bool
+
+    :param samples_per_shard: number of sampling probes per shard
+    :type samples_per_shard: int
+
+    :param sample_size: number of accounts requested per sampling probe
+    :type sample_size: int
+
+    :param queue_size: max number of entries buffered per shard before the
+                       shard waits for the consumer
+    :type queue_size: int
+
+    Other keyword arguments (`representative`, `weight`, `pending`,
+    `retries`, `retry_delay`, `deadline`) are passed to
+    :py:class:`LedgerIterator`.
+    """
+
+    def __init__(
+        self,
+        rpc,
+        shards=8,
+        page_size=1000,
+        sample=False,
+        samples_per_shard=4,
+        sample_size=100,
+        queue_size=10000,
+        **options
+    ):
+        self.rpc = rpc
+        self.shards = shards
+        self.page_size = page_size
+        self.sample = sample
+        self.samples_per_shard = samples_per_shard
+        self.sample_size = sample_size
+        self.queue_size = queue_size
+        self.options = options
+
+    def boundaries(self):
+        """
+        Returns the key ranges as a list of (start, end) integer keys, start
+        inclusive and end exclusive
+
+        >>> LedgerScanner(rpc, shards=2).boundaries()
+        [(0, 57896044618658097711785492504343953926634992332820282019728792003956564819968),
+         (57896044618658097711785492504343953926634992332820282019728792003956564819968,
+          115792089237316195423570985008687907853269984665640564039457584007913129639936)]
+        """
+        if self.sample:
+            starts = self._sampled_starts()
+        else:
+            width = (MAX_ACCOUNT_KEY + 1) // self.shards
+            starts = [i * width for i in range(self.shards)]
+        ends = starts[1:] + [MAX_ACCOUNT_KEY + 1]
+        return list(zip(starts, ends))
+
+    def _probe(self, start, end):
+        """
+        Estimates the number of accounts with keys between start and end
+        """
+        page = self.rpc.ledger(account=key_to_account(start), count=self.sample_size)
+        keys = sorted(account_to_key(account) for account in page)
+        inside = [key for key in keys if key < end]
+        if len(inside) < len(keys) or len(keys) < self.sample_size:
+            return float(len(inside))  # the whole range was covered
+        return len(inside) * float(end - start) / (inside[-1] - start + 1)
+
+    def _sampled_starts(self):
+        probes = self.shards * self.samples_per_shard
+        width = (MAX_ACCOUNT_KEY + 1) // probes
+        ranges = [(i * width, (i + 1) * width) for i in range(probes)]
+        ranges[-1] = (ranges[-1][0], MAX_ACCOUNT_KEY + 1)
+
+        at, level = current_deadline(), current_priority()
+
+        def probe(bounds):
+            with deadline(at=at), priority(level):
+                return self._probe(*bounds)
+
+        executor = ThreadPoolExecutor(max_workers=self.shards)
+        try:
+            counts = list(executor.map(probe, ranges))
+        finally:
+            executor.shutdown(wait=False)
+
+        total = sum(counts)
+        if not total:
+            return [0]
+
+        # place boundaries where the estimated cumulative count reaches
+        # each multiple of total / shards, interpolating inside a range
+        starts = [0]
+        target = total / self.shards
+        cumulative = 0.0
+        for (start, end), count in zip(ranges, counts):
+            while count and cumulative + count >= target * len(starts):
+                if len(starts) == self.shards:
+                    return starts
+                fraction = (target * len(starts) - cumulative) / count
+                starts.append(start + int((end - start) * fraction))
+            cumulative += count
+        return starts
+
+    def _walk(self, start, end, output, stop, at=None, level=None):
+        """
+        Walks one key range putting entries on **output**, bounded by
+        deadline timestamp **at** and with priority **level**
+        """
+        end_account = key_to_account(end) if end <= MAX_ACCOUNT_KEY else None
+        try:
+            ledger = LedgerIterator(
+                self.rpc,
+                start=key_to_account(start),
+                end=end_account,
+                page_size=self.page_size,
+                prefetch=False,
+                **self.options
+            )
+            with deadline(at=at), priority(level):
+                for entry in ledger:
+                    if not _put(output, entry, stop):
+                        return
+            _put(output, _DONE, stop)
+        except Exception as e:
+            _put(output, e, stop)
+
+    def stream(self, ordered=True):
+        """
+        Yields (account, info) pairs of the whole ledger
+
+        :param ordered: if True entries are yielded in account key order,
+                        shards further along are buffered up to
+                        **queue_size** entries each, otherwise entries are
+                        yielded as soon as any shard produces them
+        :type ordered: bool
+        """
+        at, level = current_deadline(), current_priority()
+        ranges = self.boundaries()
+        stop = threading.Event()
+
+        if ordered:
+            queues = [queue.Queue(self.queue_size) for _ in ranges]
+        else:
+            queues = [queue.Queue(self.queue_size)] * len(ranges)
+
+        threads = [
+            threading.Thread(
+                target=self._walk, args=(start, end, output, stop, at, level)
+            )
+            for (start, end), output in zip(ranges, queues)
+        ]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+
+        try:
+            remaining = len(ranges)
+            index = 0
+            while remaining:
+                item = queues[index].get()
+                if item is _DONE:
+                    remaining -= 1
+                    if ordered:
+                        index += 1
+                    continue
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+
+    def __iter__(self):
+        return self.stream()
+
+    def run(self, sink, ordered=False):
+        """
+        Scans the whole ledger calling **sink** with (account, info) for every
+        account from the calling thread
+
+        :param sink: callable taking an account and its info
+        :type sink: callable
+
+        :param ordered: if True the sink gets accounts in key order
+        :type ordered: bool
+
+        :return: number of accounts scanned
+        :rtype: int
+        """
+        count = 0
+        for account, info in self.stream(ordered=ordered):
+            sink(account, info)
+            count += 1
+        return count
+
+
+def iter_account_history(
+    rpc,
+    account,
+    page_size=1000,
+    until_hash=None,
+    head=None,
+    retries=3,
+    retry_delay=1.0,
+    deadline=None,
+):
+    """
+    Yields the send/receive history of **account** from the newest block
+    backwards, fetching **page_size** entries at a time with the `head`
+    argument of `account_history`
+
+    Iteration stops before **until_hash** so an incremental sync only fetches
+    the blocks added since the last one seen.
+
+    :param rpc: client to use
+    :type rpc: :py:class:`nano.rpc.Client`
+
+    :param account: Account to get send/receive information for
+    :type account: str
+
+    :param page_size: number of entries to request per `account_history` call
+    :type page_size: int
+
+    :param until_hash: block hash to stop at (exclusive)
+    :type until_hash: str
+
+    :param head: block hash to start from (inclusive), defaults to the
+                 account frontier
+    :type head: str
+
+    :param retries: number of times a page is retried after a transport error
+    :type retries: int
+
+    :param retry_delay: seconds to wait before the first retry, doubled for
+                        every following retry
+    :type retry_delay: float
+
+    :param deadline: seconds the whole iteration must complete in, requests
+                     raise :py:exc:`nano.timeouts.DeadlineExceeded` after
+    :type deadline: float
+
+    >>> for entry in iter_account_history(
+    ...     rpc,
+    ...     account="xrb_3e3j5tkog48pnny9dmfzj1r16pg8t1e76dz5tmac6iq689wyjfpi00000000",
+    ...     until_hash="000D1BAEC8EC208142C99059B393051BAC8380F9B5A2E6B2489A277D81789F3F",
+    ... ):
+    ...     print(entry)
+    {
+      "hash": "E71AF3E9DD86BBD8B4620EFA63E065B34D358CFC091ACB4E103B965F95783321",
+      "type": "send",
+      "account": "xrb_1111111111111111111111111111111111111111111111111111hifc8npp",
+      "amount": 100000000000000000000000000000000
+    }
+    """
+    at = resolve_deadline(deadline)
+    if until_hash is not None and getattr(rpc, 'identifiers', None) is not None:
+        # hashes of the history are bytes in bytes identifiers mode
+        until_hash = hash_to_bytes(until_hash)
+    skip = None
+    count = page_size
+    while True:
+        history = _retrying(
+            lambda: rpc.account_history(account=account, count=count, head=head),
+            retries,
+            retry_delay,
+            at,
+        )
+
+        # pages after the first start at the last block already yielded
+        if skip is not None and history and history[0]['hash'] == skip:
+            history = history[1:]
+            received = len(history) + 1
+        else:
+            received = len(history)
+
+        for entry in history:
+            if until_hash is not None and entry['hash'] == until_hash:
+                return
+            yield entry
+
+        if received < count or not history:
+            return
+
+        head = skip = history[-1]['hash']
+        count = page_size + 1
+
+
+def iter_chain(
+    rpc,
+    block,
+    forward=False,
+    page_size=1000,
+    prefetch=2,
+    pending=False,
+    source=False,
+    retries=3,
+    retry_delay=1.0,
+    deadline=None,
+):
+    """
+    Yields (hash, info) pairs for the blocks of an account chain starting at
+    **block**, following `previous` links with `chain` or towards the
+    frontier with `successors` if **forward** is set
+
+    Hashes are fetched one page at a time in a background thread which also
+    requests `blocks_info` for each page as soon as its hashes are known, so
+    that block contents for the next **prefetch** pages are on their way
+    while the current one is consumed.
+
+    :param rpc: client to use
+    :type rpc: :py:class:`nano.rpc.Client`
+
+    :param block: Block hash to start at (inclusive)
+    :type block: str
+
+    :param forward: If true, walks successors instead of previous blocks
+    :type forward: bool
+
+    :param page_size: number of blocks per `chain` / `blocks_info` call
+    :type page_size: int
+
+    :param prefetch: max number of pages fetched ahead of the consumer
+    :type prefetch: int
+
+    :param pending: If true, returns the pending status as well
+    :type pending: bool
+
+    :param source: If true, returns the source account as well
+    :type source: bool
+
+    :param retries: number of times a call is retried after a transport error
+    :type retries: int
+
+    :param retry_delay: seconds to wait before the first retry, doubled for
+                        every following retry
+    :type retry_delay: float
+
+    :param deadline: seconds the whole iteration must complete in, requests
+                     raise :py:exc:`nano.timeouts.DeadlineExceeded` after
+    :type deadline: float
+
+    >>> for hash, info in iter_chain(
+    ...     rpc,
+    ...     block="000D1BAEC8EC208142C99059B393051BAC8380F9B5A2E6B2489A277D81789F3F",
+    ... ):
+    ...     print(hash, info['amount'], info['contents']['type'])
+    000D1BAEC8EC208142C99059B393051BAC8380F9B5A2E6B2489A277D81789F3F 1000000000000000000000000000000 send
+    """
+    at = resolve_deadline(deadline)
+    walk = rpc.successors if forward else rpc.chain
+    output = queue.Queue(max(1, prefetch))
+    stop = threading.Event()
+    executor = ThreadPoolExecutor(max_workers=max(1, prefetch))
+
+    def fetch_info(hashes):
+        return _retrying(
+            lambda: rpc.blocks_info(hashes=hashes, pending=pending, source=source),
+            retries,
+            retry_delay,
+            at,
+        )
+
+    def produce():
+        try:
+            start, count, skip = block, page_size, None
+            while True:
+                hashes = _retrying(
+                    lambda: walk(block=start, count=count), retries, retry_delay, at
+                )
+                received = len(hashes)
+                # pages after the first start at the last hash already queued
+                if skip is not None and hashes and hashes[0] == skip:
+                    hashes = hashes[1:]
+                if hashes:
+                    page = (hashes, executor.submit(fetch_info, hashes))
+                    if not _put(output, page, stop):
+                        return
+                if received < count or not hashes:
+                    break
+                start = skip = hashes[-1]
+                count = page_size + 1
+            _put(output, _DONE, stop)
+        except Exception as e:
+            _put(output, e, stop)
+
+    producer = threading.Thread(target=produce)
+    producer.daemon = True
+    producer.start()
+
+    try:
+        while True:
+            item = output.get()
+            if item is _DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            hashes, info = item
+            info = info.result()
+            for hash in hashes:
+                yield hash, info[hash]
+    finally:
+        stop.set()
+        executor.shutdown(wait=False)
@@ -0,0 +1,249 @@
+"""
+Client side rate and concurrency limits
+
+Bulk jobs can saturate the RPC thread pool of a node and starve latency
+sensitive requests. A :py:class:`Limiter` attached to the client caps the
+request rate with token buckets and the number of requests in flight with
+semaphores, node wide and per class of action (eg. `work_generate`, bulk
+reads such as `ledger`, `bootstrap` or cheap reads), see
+:py:data:`ACTION_CLASSES`. Limiters are thread safe, share one limiter
+between all clients and threads talking to the same node.
+
+Time spent waiting for a limit is recorded by :py:class:`nano.metrics.Metrics`
+when the client has metrics enabled.
+
+>>> from nano.rpc import Client
+>>> from nano.limits import Limit, Limiter
+>>> limiter = Limiter(
+...     node=Limit(max_in_flight=32),
+...     limits={
+...         'work': Limit(max_in_flight=2),
+...         'bulk': Limit(rate=5, burst=10, max_in_flight=4),
+...     },
+... )
+>>> rpc = Client('http://localhost:7076', limiter=limiter)
+"""
+
+import math
+import threading
+import time
+
+from .timeouts import DeadlineExceeded, current_deadline, remaining
+
+#: Class of actions for which limits are configured, actions not listed
+#: here are in the `'read'` class
+ACTION_CLASSES = {
+    'work_generate': 'work',
+    'bootstrap': 'bootstrap',
+    'bootstrap_any': 'bootstrap',
+    'account_history': 'bulk',
+    'accounts_balances': 'bulk',
+    'accounts_frontiers': 'bulk',
+    'accounts_pending': 'bulk',
+    'blocks': 'bulk',
+    'blocks_info': 'bulk',
+    'chain': 'bulk',
+    'delegators': 'bulk',
+    'frontiers': 'bulk',
+    'history': 'bulk',
+    'ledger': 'bulk',
+    'representatives': 'bulk',
+    'search_pending_all': 'bulk',
+    'successors': 'bulk',
+    'unchecked': 'bulk',
+    'unchecked_keys': 'bulk',
+    'wallet_balances': 'bulk',
+    'wallet_export': 'bulk',
+    'wallet_frontiers': 'bulk',
+    'wallet_pending': 'bulk',
+    'wallet_republish': 'bulk',
+}
+
+
+class TokenBucket(object):
+    """
+    Thread safe token bucket allowing **rate** requests per second on
+    average with bursts of up to **burst** requests
+
+    :param rate: tokens added per second
+    :type rate: float
+
+    :param burst: max number of tokens, defaults to **rate** rounded up
+    :type burst: int
+
+    :param clock: function returning the current time in seconds
+
+    :param sleep: function used to wait
+    """
+
+    def __init__(self, rate, burst=None, clock=time.time, sleep=time.sleep):
+        self.rate = float(rate)
+        self.burst = burst if burst is not None else max(1, int(math.ceil(rate)))
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = float(self.burst)
+        self._last = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Takes a token, waiting until one is available
+
+        :return: seconds waited
+        :rtype: float
+
+        :raises: :py:exc:`nano.timeouts.DeadlineExceeded`, without taking the
+                 token, if it is not available before the deadline of the
+                 thread
+        """
+        with self._lock:
+            now = self.clock()
+            self.tokens = min(self.burst, self.tokens + (now - self._last) * self.rate)
+            self._last = now
+            wait = (1 - self.tokens) / self.rate if self.tokens < 1 else 0.0
+            if wait:
+                left = remaining(None)
+                if left is not None and left < wait:
+                    raise DeadlineExceeded('Deadline exceeded waiting for a token')
+            self.tokens -= 1
+        if wait:
+            self.sleep(wait)
+        return wait
+
+
+class Limit(object):
+    """
+    Rate and concurrency limit of a node or of a class of actions
+
+    :param rate: max requests per second, unlimited if None
+    :type rate: float
+
+    :param burst: requests allowed at once above **rate**
+    :type burst: int
+
+    :param max_in_flight: max number of concurrent requests, unlimited if
+                          None
+    :type max_in_flight: int
+
+    :param clock: function returning the current time in seconds
+
+    :param sleep: function used to wait
+    """
+
+    def __init__(
+        self,
+        rate=None,
+        burst=None,
+        max_in_flight=None,
+        clock=time.time,
+        sleep=time.sleep,
+    ):
+        self.clock = clock
+        self.bucket = (
+            TokenBucket(rate, burst, clock=clock, sleep=sleep)
+            if rate is not None
+            else None
+        )
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self._condition = threading.Condition()
+
+    def throttle(self):
+        """
+        Waits for the rate limit, returns the seconds waited
+
+        :raises: :py:exc:`nano.timeouts.DeadlineExceeded` if the deadline of
+                 the thread passes before a request is allowed
+        """
+        if self.bucket is None:
+            return 0.0
+        return self.bucket.acquire()
+
+    def enter(self):
+        """
+        Waits for a free concurrency slot, returns the seconds waited
+
+        :raises: :py:exc:`nano.timeouts.DeadlineExceeded` if the deadline of
+                 the thread passes while waiting
+        """
+        if self.max_in_flight is None:
+            return 0.0
+        at = current_deadline()
+        started = None
+        with self._condition:
+            while self.in_flight >= self.max_in_flight:
+                if started is None:
+                    started = self.clock()
+                timeout = None
+                if at is not None:
+                    timeout = at - time.time()
+                    if timeout <= 0:
+                        raise DeadlineExceeded('Deadline exceeded waiting for a slot')
+                self._condition.wait(timeout)
+            self.in_flight += 1
+        return 0.0 if started is None else self.clock() - started
+
+    def exit(self):
+        if self.max_in_flight is not None:
+            with self._condition:
+                self.in_flight -= 1
+                self._condition.notify()
+
+
+class Limiter(object):
+    """
+    Applies node wide and per action class limits to requests
+
+    :param limits: mapping of action class to its :py:class:`Limit`
+    :type limits: dict
+
+    :param node: limit applying to all requests
+    :type node: :py:class:`Limit`
+
+    :param classes: mapping of action to its class, defaults to
+                    :py:data:`ACTION_CLASSES`
+    :type classes: dict
+
+    :param default: class of actions missing from **classes**
+    :type default: str
+    """
+
+    def __init__(self, limits=None, node=None, classes=None, default='read'):
+        self.limits = limits or {}
+        self.node = node
+        self.classes = ACTION_CLASSES if classes is None else classes
+        self.default = default
+
+    def _limits(self, action):
+        limits = [self.limits.get(self.classes.get(action, self.default)), self.node]
+        return [limit for limit in limits if limit is not None]
+
+    def acquire(self, action):
+        """
+        Waits until a request for **action** is allowed, to be followed by
+        :py:meth:`release` once it completed
+
+        :return: seconds waited
+        :rtype: float
+        """
+        limits = self._limits(action)
+        waited = 0.0
+        for limit in limits:
+            waited += limit.throttle()
+        entered = []
+        try:
+            for limit in limits:
+                waited += limit.enter()
+                entered.append(limit)
+        except BaseException:
+            for limit in entered:
+                limit.exit()
+            raise
+        return waited
+
+    def release(self, action):
+        """
+        Releases the concurrency slots taken for a request for **action**
+        """
+        for limit in reversed(self._limits(action)):
+            limit.exit()
@@ -0,0 +1,254 @@
+"""
+RPC call metrics
+
+A :py:class:`Metrics` attached to the client records, per action, a latency
+histogram of the requests sent to the node, request and response byte counts,
+the number of requests in flight, retries, time waited for client side limits
+and errors counted by the error message returned by the node (or the
+exception class for transport errors).
+
+Responses served from the response cache never reach the node and are not
+recorded. Without metrics the client only checks for `None`, so leaving them
+disabled costs nothing.
+
+>>> from nano.rpc import Client
+>>> from nano.metrics import Metrics
+>>> rpc = Client('http://localhost:7076', metrics=Metrics())
+>>> rpc.version()
+>>> rpc.metrics.snapshot()['version']
+{'count': 1, 'sum': 0.0021, 'buckets': [(0.005, 1), ..., ('+Inf', 1)],
+ 'request_bytes': 21, 'response_bytes': 85, 'in_flight': 0, 'retries': 0,
+ 'errors': {}, 'wait': 0.0}
+
+The same values are exported in the Prometheus text format:
+
+>>> print(rpc.metrics.prometheus())
+# HELP nano_rpc_request_duration_seconds RPC request latency
+# TYPE nano_rpc_request_duration_seconds histogram
+nano_rpc_request_duration_seconds_bucket{action="version",le="0.005"} 1
+...
+"""
+
+import threading
+import time
+from bisect import bisect_left
+
+#: Default latency histogram bucket upper bounds in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _ActionMetrics(object):
+    __slots__ = (
+        'buckets',
+        'count',
+        'sum',
+        'request_bytes',
+        'response_bytes',
+        'in_flight',
+        'retries',
+        'errors',
+        'wait',
+    )
+
+    def __init__(self, size):
+        self.buckets = [0] * size
+        self.count = 0
+        self.sum = 0.0
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.in_flight = 0
+        self.retries = 0
+        self.errors = {}
+        self.wait = 0.0
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+class Metrics(object):
+    """
+    Thread safe per action RPC metrics
+
+    :param buckets: sorted latency histogram bucket upper bounds in seconds
+    :type buckets: tuple of float
+
+    :param clock: function returning the current time in seconds
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, clock=time.time):
+        self.bucket_bounds = tuple(buckets)
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._actions = {}
+
+    def _get(self, action):
+        metrics = self._actions.get(action)
+        if metrics is None:
+            metrics = self._actions[action] = _ActionMetrics(
+                len(self.bucket_bounds) + 1
+            )
+        return metrics
+
+    def start(self, action):
+        """
+        Records a request for **action** as in flight and returns its start
+        time, to be passed to :py:meth:`finish`
+        """
+        with self._lock:
+            self._get(action).in_flight += 1
+        return self.clock()
+
+    def finish(self, action, started, request_bytes=0, response_bytes=0):
+        """
+        Records the completion of a request for **action** started at
+        **started**, successful or not
+        """
+        elapsed = self.clock() - started
+        index = bisect_left(self.bucket_bounds, elapsed)
+        with self._lock:
+            metrics = self._get(action)
+            metrics.in_flight -= 1
+            metrics.buckets[index] += 1
+            metrics.count += 1
+            metrics.sum += elapsed
+            metrics.request_bytes += request_bytes
+            metrics.response_bytes += response_bytes
+
+    def retry(self, action):
+        """
+        Records a retried request for **action**
+        """
+        with self._lock:
+            self._get(action).retries += 1
+
+    def wait(self, action, seconds):
+        """
+        Records **seconds** spent waiting for rate or concurrency limits
+        before sending a request for **action**
+        """
+        with self._lock:
+            self._get(action).wait += seconds
+
+    def error(self, action, error):
+        """
+        Records an **error** message returned by the node, or the name of
+        the exception raised by the transport, for **action**
+        """
+        with self._lock:
+            errors = self._get(action).errors
+            errors[error] = errors.get(error, 0) + 1
+
+    def reset(self):
+        """
+        Drops all recorded values
+        """
+        with self._lock:
+            self._actions = {}
+
+    def snapshot(self):
+        """
+        Returns the values recorded so far per action, histogram buckets are
+        cumulative (upper bound, count) pairs as in Prometheus
+
+        :rtype: dict
+        """
+        bounds = self.bucket_bounds + ('+Inf',)
+        result = {}
+        with self._lock:
+            for action, metrics in self._actions.items():
+                cumulative = 0
+                buckets = []
+                for bound, count in zip(bounds, metrics.buckets):
+                    cumulative += count
+                    buckets.append((bound, cumulative))
+                result[action] = {
+                    'count': metrics.count,
+                    'sum': metrics.sum,
+                    'buckets': buckets,
+                    'request_bytes': metrics.request_bytes,
+                    'response_bytes': metrics.response_bytes,
+                    'in_flight': metrics.in_flight,
+                    'retries': metrics.retries,
+                    'errors': dict(metrics.errors),
+                    'wait': metrics.wait,
+                }
+        return result
+
+    def prometheus(self, prefix='nano_rpc'):
+        """
+        Returns the values recorded so far in the Prometheus text exposition
+        format
+
+        :param prefix: prefix of the metric names
+        :type prefix: str
+
+        :rtype: str
+        """
+        snapshot = sorted(self.snapshot().items())
+        lines = []
+
+        def family(name, kind, help, samples):
+            lines.append('# HELP %s_%s %s' % (prefix, name, help))
+            lines.append('# TYPE %s_%s %s' % (prefix, name, kind))
+            for suffix, labels, value in samples:
+                lines.append(
+                    '%s_%s%s{%s} %s'
+                    % (
+                        prefix,
+                        name,
+                        suffix,
+                        ','.join(
+                            '%s="%s"' % (key, _escape(str(label)))
+                            for key, label in labels
+                        ),
+                        _format(value),
+                    )
+                )
+
+        latency = []
+        for action, metrics in snapshot:
+            for bound, count in metrics['buckets']:
+                latency.append(
+                    ('_bucket', [('action', action), ('le', _format(bound))], count)
+                )
+            latency.append(('_sum', [('action', action)], metrics['sum']))
+            latency.append(('_count', [('action', action)], metrics['count']))
+        family('request_duration_seconds', 'histogram', 'RPC request latency', latency)
+
+        for name, kind, help, key in [
+            ('request_bytes_total', 'counter', 'RPC request bytes', 'request_bytes'),
+            ('response_bytes_total', 'counter', 'RPC response bytes', 'response_bytes'),
+            ('in_flight', 'gauge', 'RPC requests in flight', 'in_flight'),
+            ('retries_total', 'counter', 'RPC request retries', 'retries'),
+            (
+                'limit_wait_seconds_total',
+                'counter',
+                'Time waited for rate and concurrency limits',
+                'wait',
+            ),
+        ]:
+            family(
+                name,
+                kind,
+                help,
+                [('', [('action', action)], m[key]) for action, m in snapshot],
+            )
+
+        family(
+            'errors_total',
+            'counter',
+            'RPC errors by message',
+            [
+                ('', [('action', action), ('error', error)], count)
+                for action, metrics in snapshot
+                for error, count in sorted(metrics['errors'].items())
+            ],
+        )
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,248 @@
+"""
+Offline answers to purely computational RPC actions
+
+Actions such as `account_key`, `deterministic_key` or `mrai_to_raw` only do
+math the node could as well skip a round trip for. With
+:py:class:`OfflineActions` attached to the client, the actions listed in
+:py:data:`OFFLINE_ACTIONS` are answered in process with
+:py:mod:`nano.crypto`, :py:mod:`nano.accounts` and
+:py:mod:`nano.conversion`, returning the same response as the node.
+
+Inputs that are not well formed, for which the node answers with an error,
+are still sent to the node so that errors are unchanged. Offline answers do
+not reach the metrics, the cache or the recorder. In raw mode they are
+returned as compact JSON, which decodes to the response of the node but may
+differ from its bytes.
+
+A fraction of the calls can be cross checked against the node, raising
+:py:exc:`OfflineMismatchError` if the answers differ:
+
+>>> from nano.rpc import Client
+>>> from nano.offline import OfflineActions
+>>> rpc = Client('http://localhost:7076', offline=OfflineActions(verify=0.01))
+>>> rpc.account_key('xrb_1e5aqegc1jb7qe964u4adzmcezyo6o146zb8hm6dft8tkp79za3sxwjym5rx')
+'3068BB1CA04525BB0E416C485FE6A67FD52540227D267CC8B6E8DA958A7FA039'
+"""
+
+import random
+import string
+from binascii import hexlify, unhexlify
+
+import six
+
+from .accounts import public_key_to_xrb_address, xrb_address_to_public_key
+from .conversion import UNITS_TO_RAW
+from .crypto import keypair_from_seed, private_to_public_key
+
+#: Largest amount the node accepts, amounts are 128 bit unsigned integers
+MAX_AMOUNT = 2**128 - 1
+
+_DIGITS = frozenset(string.digits)
+_HEX_DIGITS = frozenset(string.hexdigits)
+
+
+class OfflineMismatchError(Exception):
+    """ Raised when an offline answer differs from the answer of the node """
+
+    def __init__(self, action, params, offline, node):
+        # the values are left out of the message as they may hold keys
+        super(OfflineMismatchError, self).__init__(
+            '%s answered differently offline and by the node' % action
+        )
+        self.action = action
+        self.params = params
+        self.offline = offline
+        self.node = node
+
+
+def _key(value):
+    """
+    Returns a 64 hex digits key as bytes, None if it is not one
+    """
+    if (
+        not isinstance(value, six.string_types)
+        or len(value) != 64
+        or not _HEX_DIGITS.issuperset(value)
+    ):
+        return None
+    return unhexlify(value)
+
+
+def _hex(value):
+    return hexlify(value).decode('ascii').upper()
+
+
+def _public_key(account):
+    """
+    Returns the public key of an `xrb_` **account**, False if it is invalid
+    and None if the node might read it differently
+    """
+    if (
+        not isinstance(account, six.string_types)
+        or len(account) != 64
+        or not account.startswith('xrb_')
+        or account[4] not in '13'
+    ):
+        return None
+    try:
+        return xrb_address_to_public_key(account)
+    except (ValueError, TypeError, UnicodeError):
+        return False
+
+
+def _number(value):
+    if isinstance(value, six.integer_types) and not isinstance(value, bool):
+        return str(value)
+    return value
+
+
+def _amount(value):
+    """
+    Returns the amount in decimal string **value**, None if the node would
+    reject it
+    """
+    value = _number(value)
+    if (
+        not isinstance(value, six.string_types)
+        or not value
+        or not _DIGITS.issuperset(value)
+        or (len(value) > 1 and value[0] == '0')
+    ):
+        return None
+    amount = int(value)
+    return amount if amount <= MAX_AMOUNT else None
+
+
+def deterministic_key(params):
+    seed = _key(params.get('seed'))
+    index = _amount(params.get('index'))
+    if seed is None or index is None or index >= 2**32:
+        return None
+    pair = keypair_from_seed(seed, index)
+    return {
+        'private': _hex(pair['private']),
+        'public': _hex(pair['public']),
+        'account': public_key_to_xrb_address(pair['public']),
+    }
+
+
+def key_expand(params):
+    private = _key(params.get('key'))
+    if private is None:
+        return None
+    public = private_to_public_key(private)
+    return {
+        'private': _hex(private),
+        'public': _hex(public),
+        'account': public_key_to_xrb_address(public),
+    }
+
+
+def account_key(params):
+    public = _public_key(params.get('account'))
+    if not public:
+        return None
+    return {'key': _hex(public)}
+
+
+def account_get(params):
+    public = _key(params.get('key'))
+    if public is None:
+        return None
+    return {'account': public_key_to_xrb_address(public)}
+
+
+def validate_account_number(params):
+    public = _public_key(params.get('account'))
+    if public is None:
+        return None
+    return {'valid': '1' if public else '0'}
+
+
+def _from_raw(unit):
+    ratio = int(UNITS_TO_RAW[unit])
+
+    def from_raw(params):
+        amount = _amount(params.get('amount'))
+        if amount is None:
+            return None
+        return {'amount': str(amount // ratio)}
+
+    return from_raw
+
+
+def _to_raw(unit):
+    ratio = int(UNITS_TO_RAW[unit])
+
+    def to_raw(params):
+        amount = _amount(params.get('amount'))
+        if amount is None or amount * ratio > MAX_AMOUNT:
+            return None
+        return {'amount': str(amount * ratio)}
+
+    return to_raw
+
+
+#: Functions answering actions offline from the request params, returning
+#: None to leave the request to the node
+OFFLINE_ACTIONS = {
+    'account_get': account_get,
+    'account_key': account_key,
+    'deterministic_key': deterministic_key,
+    'key_expand': key_expand,
+    'krai_from_raw': _from_raw('krai'),
+    'krai_to_raw': _to_raw('krai'),
+    'mrai_from_raw': _from_raw('Mrai'),
+    'mrai_to_raw': _to_raw('Mrai'),
+    'rai_from_raw': _from_raw('rai'),
+    'rai_to_raw': _to_raw('rai'),
+    'validate_account_number': validate_account_number,
+}
+
+
+class OfflineActions(object):
+    """
+    Answers computational actions without calling the node
+
+    :param actions: names of the actions answered offline, defaults to all
+                    of :py:data:`OFFLINE_ACTIONS`
+    :type actions: list of str
+
+    :param verify: fraction of the offline answers also requested from the
+                   node and compared, True for all of them
+    :type verify: float
+
+    :param random: function returning a random float in [0, 1)
+    """
+
+    def __init__(self, actions=None, verify=0, random=random.random):
+        if actions is None:
+            actions = OFFLINE_ACTIONS
+        self.actions = dict((action, OFFLINE_ACTIONS[action]) for action in actions)
+        self.verify = float(verify)
+        self.random = random
+
+    def answer(self, action, params):
+        """
+        Returns the response of the node to request **params** for
+        **action**, None if it must be sent to the node
+        """
+        func = self.actions.get(action)
+        if func is None:
+            return None
+        return func(params)
+
+    def should_verify(self):
+        """
+        Returns True if the next offline answer should be cross checked
+        """
+        return self.verify > 0 and self.random() < self.verify
+
+    def check(self, action, params, offline, node):
+        """
+        Compares an **offline** answer to the answer of the **node**
+
+        :raises: :py:exc:`OfflineMismatchError` if they differ
+        """
+        if offline != node:
+            raise OfflineMismatchError(action, params, offline, node)
@@ -0,0 +1,477 @@
+"""
+Planning of bulk account queries
+
+The balances, frontiers, pending blocks or representatives of a set of
+accounts can be fetched in several ways: with the batch actions
+(`accounts_balances` and friends), with the wallet actions if the accounts
+all belong to one wallet, or by scanning the `ledger` once the accounts make
+up a large part of it. Which one is cheapest depends on the number of
+accounts, the size of the wallet and the number of accounts in the ledger
+(`frontier_count`).
+
+A :py:class:`Planner` in front of a client estimates the cost of every
+strategy that can answer a query and runs the cheapest one. The chosen
+:py:class:`Plan` is kept in :py:attr:`Planner.last_plan` and
+:py:meth:`Plan.explain` lists the strategies that were considered.
+
+>>> from nano.rpc import Client
+>>> from nano.planning import Planner
+>>> planner = Planner(Client('http://localhost:7076'))
+>>> balances = planner.balances(accounts, wallet=wallet)
+>>> planner.last_plan
+Plan(query='balances', strategy='wallet', action='wallet_balances', requests=1, items=1100, cost=9.8)
+>>> print(planner.last_plan.explain())
+balances of 1000 accounts
+* wallet   wallet_balances     requests=1      items=1100    cost=9.8
+  batch    accounts_balances   requests=1      items=1000    cost=11.0
+  ledger   ledger              requests=10     items=9990    cost=39.97
+
+Costs are in units of one request round trip, see :py:data:`ITEM_COSTS` for
+the cost of each item read by the node. Tune them from the latencies recorded
+by :py:class:`nano.metrics.Metrics` for a given node.
+"""
+
+import math
+import threading
+from collections import OrderedDict
+
+from .identifiers import account_to_bytes
+from .iterators import MAX_ACCOUNT_KEY, account_to_key, iter_ledger, key_to_account
+from .rpc import RPCException
+
+#: Cost of each item read by the node, relative to the cost of a request:
+#: random account lookups of the batch and wallet actions cost more than
+#: the sequential reads of a ledger scan, and the wallet actions spare
+#: sending the accounts
+ITEM_COSTS = {
+    'accounts_balances': 0.01,
+    'accounts_frontiers': 0.005,
+    'accounts_pending': 0.02,
+    'account_representative': 0.005,
+    'ledger': 0.003,
+    'wallet_balances': 0.008,
+    'wallet_frontiers': 0.004,
+    'wallet_pending': 0.018,
+}
+
+#: Actions used by each strategy of each query
+STRATEGIES = {
+    'balances': OrderedDict(
+        [
+            ('batch', 'accounts_balances'),
+            ('wallet', 'wallet_balances'),
+            ('ledger', 'ledger'),
+        ]
+    ),
+    'frontiers': OrderedDict(
+        [
+            ('batch', 'accounts_frontiers'),
+            ('wallet', 'wallet_frontiers'),
+            ('ledger', 'ledger'),
+        ]
+    ),
+    'pending': OrderedDict(
+        [('batch', 'accounts_pending'), ('wallet', 'wallet_pending')]
+    ),
+    'representatives': OrderedDict(
+        [('each', 'account_representative'), ('ledger', 'ledger')]
+    ),
+}
+
+
+class Plan(object):
+    """
+    Strategy answering a query with its estimated cost
+
+    :ivar query: name of the query, a key of :py:data:`STRATEGIES`
+    :ivar strategy: `'batch'`, `'wallet'`, `'ledger'` or `'each'`
+    :ivar action: RPC action called
+    :ivar requests: estimated number of requests
+    :ivar items: estimated number of items read by the node
+    :ivar cost: estimated cost, in requests
+    :ivar params: arguments of the strategy
+    :ivar candidates: plans considered for the query, cheapest first
+    """
+
+    def __init__(self, query, strategy, action, requests, items, cost, params):
+        self.query = query
+        self.strategy = strategy
+        self.action = action
+        self.requests = requests
+        self.items = items
+        self.cost = cost
+        self.params = params
+        self.candidates = [self]
+
+    def __repr__(self):
+        return (
+            'Plan(query=%r, strategy=%r, action=%r, requests=%d, items=%d, '
+            'cost=%r)'
+            % (
+                self.query,
+                self.strategy,
+                self.action,
+                self.requests,
+                self.items,
+                round(self.cost, 2),
+            )
+        )
+
+    def explain(self):
+        """
+        Returns a description of the plans considered, the chosen one
+        marked with `*`
+        """
+        lines = ['%s of %d accounts' % (self.query, len(self.params['accounts']))]
+        for plan in self.candidates:
+            lines.append(
+                '%s %-8s %-19s requests=%-6d items=%-7d cost=%r'
+                % (
+                    '*' if plan is self else ' ',
+                    plan.strategy,
+                    plan.action,
+                    plan.requests,
+                    plan.items,
+                    round(plan.cost, 2),
+                )
+            )
+        return '\n'.join(lines)
+
+
+class Planner(object):
+    """
+    Answers bulk account queries with the cheapest strategy
+
+    The number of accounts in the ledger and the accounts of wallets are
+    fetched when first needed and cached, call :py:meth:`reset` to refresh
+    them.
+
+    :param rpc: client to use
+    :type rpc: :py:class:`nano.rpc.Client`
+
+    :param page_size: number of accounts per `ledger` call of a scan
+    :type page_size: int
+
+    :param workers: max number of `account_representative` calls in flight
+    :type workers: int
+
+    :param item_costs: cost of an item per action, defaults to
+                       :py:data:`ITEM_COSTS`
+    :type item_costs: dict
+    """
+
+    def __init__(self, rpc, page_size=1000, workers=8, item_costs=None):
+        self.rpc = rpc
+        self.page_size = page_size
+        self.workers = workers
+        self.item_costs = ITEM_COSTS if item_costs is None else item_costs
+        self._frontier_count = None
+        self._wallets = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def last_plan(self):
+        """ Plan of the last query run by this thread """
+        return getattr(self._local, 'plan', None)
+
+    def reset(self):
+        """
+        Drops the cached ledger size and wallet accounts
+        """
+        with self._lock:
+            self._frontier_count = None
+            self._wallets = {}
+
+    def frontier_count(self):
+        """
+        Returns the number of accounts in the ledger
+        """
+        count = self._frontier_count
+        if count is None:
+            count = self.rpc.frontier_count()
+            with self._lock:
+                self._frontier_count = count
+        return count
+
+    def wallet_accounts(self, wallet):
+        """
+        Returns the set of accounts of **wallet**
+        """
+        accounts = self._wallets.get(wallet)
+        if accounts is None:
+            accounts = frozenset(self.rpc.account_list(wallet))
+            with self._lock:
+                self._wallets[wallet] = accounts
+        return accounts
+
+    def _key(self, account):
+        """
+        Returns the key of **account** in the results of the node, its
+        public key in bytes identifiers mode
+        """
+        if self.rpc.identifiers is None:
+            return account
+        return account_to_bytes(account)
+
+    def _plan(self, query, strategy, requests, items, **params):
+        action = STRATEGIES[query][strategy]
+        cost = requests + items * self.item_costs.get(action, 0)
+        return Plan(query, strategy, action, requests, items, cost, params)
+
+    def _batch_requests(self, accounts):
+        chunker = self.rpc.chunker
+        if chunker is None or not chunker.should_split(accounts):
+            return 1
+        return int(math.ceil(len(accounts) / float(chunker.chunk_size)))
+
+    def _ledger_range(self, accounts):
+        """
+        Returns the (start, end) accounts bounding a scan of **accounts**
+        and the fraction of the key space between them
+        """
+        keys = [account_to_key(account) for account in accounts]
+        low, high = min(keys), max(keys)
+        end = key_to_account(high + 1) if high < MAX_ACCOUNT_KEY else None
+        return key_to_account(low), end, (high - low + 1) / float(MAX_ACCOUNT_KEY + 1)
+
+    def plan(self, query, accounts, wallet=None):
+        """
+        Returns the cheapest plan answering **query** for **accounts**, with
+        the other plans considered in :py:attr:`Plan.candidates`
+
+        :param query: `'balances'`, `'frontiers'`, `'pending'` or
+                      `'representatives'`
+        :type query: str
+
+        :param accounts: accounts to query
+        :type accounts: list of str
+
+        :param wallet: wallet that may hold all of **accounts**
+        :type wallet: str
+
+        :raises: :py:exc:`ValueError` for unknown queries
+
+        :rtype: :py:class:`Plan`
+        """
+        if query not in STRATEGIES:
+            raise ValueError('unknown query %r' % query)
+        strategies = STRATEGIES[query]
+        accounts = list(OrderedDict.fromkeys(accounts))
+        count = len(accounts)
+        plans = []
+
+        if 'batch' in strategies:
+            plans.append(
+                self._plan(
+                    query,
+                    'batch',
+                    self._batch_requests(accounts),
+                    count,
+                    accounts=accounts,
+                )
+            )
+
+        if 'each' in strategies:
+            plans.append(self._plan(query, 'each', count, count, accounts=accounts))
+
+        if wallet is not None and 'wallet' in strategies:
+            members = self.wallet_accounts(wallet)
+            keys = set(self._key(member) for member in members)
+            if all(self._key(account) in keys for account in accounts):
+                plans.append(
+                    self._plan(
+                        query,
+                        'wallet',
+                        1,
+                        len(members),
+                        accounts=accounts,
+                        wallet=wallet,
+                    )
+                )
+
+        if accounts and 'ledger' in strategies and self.rpc.identifiers is None:
+            start, end, fraction = self._ledger_range(accounts)
+            # account keys are uniformly distributed over the key space
+            total = self.frontier_count()
+            scanned = min(total, max(count, int(total * fraction)))
+            plans.append(
+                self._plan(
+                    query,
+                    'ledger',
+                    max(1, int(math.ceil(scanned / float(self.page_size)))),
+                    scanned,
+                    accounts=accounts,
+                    start=start,
+                    end=end,
+                )
+            )
+
+        plans.sort(key=lambda plan: plan.cost)
+        best = plans[0]
+        best.candidates = plans
+        return best
+
+    def execute(self, plan, **options):
+        """
+        Runs **plan** and returns its results for the requested accounts,
+        keyed as in the responses of the node, **options** are passed on to
+        the underlying actions
+        """
+        self._local.plan = plan
+        params = plan.params
+        accounts = params['accounts']
+
+        if plan.strategy == 'ledger':
+            wanted = set(self._key(account) for account in accounts)
+            results = {}
+            if plan.query == 'balances':
+                options['pending'] = True
+            elif plan.query == 'representatives':
+                options['representative'] = True
+            for account, info in iter_ledger(
+                self.rpc,
+                start=params['start'],
+                end=params['end'],
+                page_size=self.page_size,
+                **options
+            ):
+                if account in wanted:
+                    results[account] = info
+            return results
+
+        if plan.strategy == 'each':
+            results = {}
+            for kwargs, result in self.rpc.map(
+                plan.action,
+                [{'account': account} for account in accounts],
+                workers=self.workers,
+                return_exceptions=True,
+            ):
+                if isinstance(result, RPCException):
+                    continue  # account not found
+                if isinstance(result, Exception):
+                    raise result
+                results[self._key(kwargs['account'])] = result
+            return results
+
+        method = getattr(self.rpc, plan.action)
+        if plan.strategy == 'wallet':
+            return method(params['wallet'], **options)
+        return method(accounts, **options)
+
+    def _pick(self, accounts, results, field=None, default=None):
+        picked = {}
+        for account in OrderedDict.fromkeys(accounts):
+            entry = results.get(self._key(account))
+            if entry is not None and field is not None:
+                entry = entry.get(field)
+            if entry is None:
+                if default is None:
+                    continue
+                entry = default()
+            picked[account] = entry
+        return picked
+
+    def balances(self, accounts, wallet=None):
+        """
+        Returns the balance and pending amount of **accounts**, unopened
+        accounts having zero balances
+
+        A ledger scan only returns opened accounts, the pending amounts of
+        the other accounts are fetched with `accounts_balances`.
+
+        :param accounts: accounts to return balances of
+        :type accounts: list of str
+
+        :param wallet: wallet that may hold all of **accounts**
+        :type wallet: str
+
+        >>> planner.balances(
+        ...     accounts=["xrb_3e3j5tkog48pnny9dmfzj1r16pg8t1e76dz5tmac6iq689wyjfpi00000000"]
+        ... )
+        {
+            "xrb_3e3j5tkog48pnny9dmfzj1r16pg8t1e76dz5tmac6iq689wyjfpi00000000": {
+                "balance": 10000,
+                "pending": 10000
+            }
+        }
+        """
+        plan = self.plan('balances', accounts, wallet)
+        results = self.execute(plan)
+        if plan.strategy == 'ledger':
+            # unopened accounts are not in the ledger but may have funds to
+            # receive
+            missing = [
+                account
+                for account in plan.params['accounts']
+                if self._key(account) not in results
+            ]
+            if missing:
+                results.update(self.rpc.accounts_balances(missing))
+        picked = self._pick(
+            accounts, results, default=lambda: {'balance': 0, 'pending': 0}
+        )
+        for account, entry in picked.items():
+            picked[account] = {
+                'balance': entry.get('balance') or 0,
+                'pending': entry.get('pending') or 0,
+            }
+        return picked
+
+    def frontiers(self, accounts, wallet=None):
+        """
+        Returns the frontier block hash of the opened accounts of
+        **accounts**
+
+        :param accounts: accounts to return frontiers of
+        :type accounts: list of str
+
+        :param wallet: wallet that may hold all of **accounts**
+        :type wallet: str
+        """
+        plan = self.plan('frontiers', accounts, wallet)
+        results = self.execute(plan)
+        field = 'frontier' if plan.strategy == 'ledger' else None
+        return self._pick(accounts, results, field)
+
+    def pending(self, accounts, wallet=None, count=None, threshold=None, source=False):
+        """
+        Returns the pending blocks of **accounts**, in the format of
+        :py:meth:`nano.rpc.Client.accounts_pending`
+
+        :param accounts: accounts to return pending blocks of
+        :type accounts: list of str
+
+        :param wallet: wallet that may hold all of **accounts**
+        :type wallet: str
+
+        :param count: max number of blocks per account
+        :type count: int
+
+        :param threshold: minimum amount in raw per block
+        :type threshold: int
+
+        :param source: if True returns the source as well
+        :type source: bool
+        """
+        results = self.execute(
+            self.plan('pending', accounts, wallet),
+            count=count,
+            threshold=threshold,
+            source=source,
+        )
+        empty = dict if threshold is not None or source else list
+        return self._pick(accounts, results, default=empty)
+
+    def representatives(self, accounts):
+        """
+        Returns the representative of the opened accounts of **accounts**
+
+        :param accounts: accounts to return representatives of
+        :type accounts: list of str
+        """
+        plan = self.plan('representatives', accounts)
+        results = self.execute(plan)
+        field = 'representative' if plan.strategy == 'ledger' else None
+        return self._pick(accounts, results, field)
@@ -0,0 +1,173 @@
+"""
+Per phase profiling of RPC calls
+
+A :py:class:`Profiler` breaks down the wall time of each
+:py:class:`nano.rpc.Client` method call into phases:
+
+- ``build``: processing arguments and building the payload
+- ``cache``: looking up the response cache
+- ``wait``: waiting for the scheduler, the limiter and retry backoff
+- ``encode``: serializing the request to JSON
+- ``network``: sending the request and waiting for the response
+- ``decode``: decoding the JSON response
+- ``process``: converting and post processing the result in the method
+
+and aggregates them per method, telling whether time goes to the node, the
+network or to parsing.
+
+>>> with rpc.profile() as profiler:
+...     rpc.ledger(account, count=10000)
+>>> print(profiler.report())
+action  calls  total ms  build  cache  wait  encode  network  decode  process
+ledger      1    1210.4   0.0%   0.0%  0.0%    0.0%    61.2%   30.1%     8.7%
+
+Calls can also be sampled continuously, eg. one call in a hundred:
+
+>>> rpc = Client('http://localhost:7076', profiler=Profiler(sample_rate=0.01))
+>>> rpc.profiler.snapshot()
+"""
+
+import random
+import threading
+import time
+
+#: Phases of a call in order
+PHASES = ('build', 'cache', 'wait', 'encode', 'network', 'decode', 'process')
+
+
+class _Frame(object):
+    """ Phase timings of one method call """
+
+    __slots__ = ('action', 'clock', 'last', 'phases')
+
+    def __init__(self, action, clock):
+        self.action = action
+        self.clock = clock
+        self.last = clock()
+        self.phases = {}
+
+    def lap(self, phase):
+        """
+        Adds the time since the previous lap to **phase**
+        """
+        now = self.clock()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - self.last
+        self.last = now
+
+
+class Profiler(object):
+    """
+    Aggregates the time spent per phase of client method calls
+
+    :param sample_rate: fraction of calls profiled
+    :type sample_rate: float
+
+    :param clock: function returning the current time in seconds
+    """
+
+    def __init__(self, sample_rate=1.0, clock=time.time):
+        self.sample_rate = sample_rate
+        self.clock = clock
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def frame(self):
+        """
+        Returns the frame of the method call profiled on this thread or None
+        """
+        return getattr(self._local, 'frame', None)
+
+    def wrap(self, action, method):
+        """
+        Returns **method** profiled as **action**
+        """
+
+        def profiled(*args, **kwargs):
+            if self.frame() is not None or (
+                self.sample_rate < 1 and random.random() >= self.sample_rate
+            ):
+                return method(*args, **kwargs)
+
+            frame = self._local.frame = _Frame(action, self.clock)
+            try:
+                return method(*args, **kwargs)
+            finally:
+                frame.lap('process')
+                self._local.frame = None
+                self._add(frame)
+
+        profiled.__name__ = method.__name__
+        profiled.__doc__ = method.__doc__
+        return profiled
+
+    def _add(self, frame):
+        with self._lock:
+            stats = self._stats.get(frame.action)
+            if stats is None:
+                stats = self._stats[frame.action] = [0, {}]
+            stats[0] += 1
+            for phase, elapsed in frame.phases.items():
+                stats[1][phase] = stats[1].get(phase, 0.0) + elapsed
+
+    def reset(self):
+        """
+        Drops all recorded timings
+        """
+        with self._lock:
+            self._stats = {}
+
+    def snapshot(self):
+        """
+        Returns the number of calls, total time and time per phase in
+        seconds of each action
+
+        :rtype: dict
+
+        >>> profiler.snapshot()
+        {'ledger': {'calls': 1, 'total': 1.2104, 'phases': {'build': 0.00001, ...}}}
+        """
+        with self._lock:
+            return dict(
+                (
+                    action,
+                    {
+                        'calls': calls,
+                        'total': sum(phases.values()),
+                        'phases': dict(
+                            (phase, phases.get(phase, 0.0)) for phase in PHASES
+                        ),
+                    },
+                )
+                for action, (calls, phases) in self._stats.items()
+            )
+
+    def report(self):
+        """
+        Returns a table of the share of time spent per phase for each action,
+        slowest actions first
+
+        :rtype: str
+        """
+        rows = [('action', 'calls', 'total ms') + PHASES]
+        snapshot = sorted(
+            self.snapshot().items(), key=lambda item: (-item[1]['total'], item[0])
+        )
+        for action, stats in snapshot:
+            total = stats['total']
+            rows.append(
+                (action, str(stats['calls']), '%.1f' % (total * 1000))
+                + tuple(
+                    '%.1f%%' % (100 * stats['phases'][phase] / total if total else 0)
+                    for phase in PHASES
+                )
+            )
+
+        widths = [max(len(row[i]) for row in rows) for i in range(len(rows[0]))]
+        return '\n'.join(
+            '  '.join(
+                [row[0].ljust(widths[0])]
+                + [value.rjust(width) for value, width in zip(row[1:], widths[1:])]
+            )
+            for row in rows
+        )
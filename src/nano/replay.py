@@ -0,0 +1,166 @@
+"""
+Recording and replay of RPC traffic
+
+A :py:class:`Recorder` attached to the client appends every request sent to
+the node with its response body and latency to a file, one JSON object per
+line. :py:class:`ReplayAdapter` serves the recorded responses back from a
+:py:class:`requests.Session` without a node, matching requests on their JSON
+content like the mock session used by the tests, so client code and
+pipelines can be benchmarked offline against real traffic.
+
+Recording:
+
+>>> from nano.rpc import Client
+>>> from nano.replay import Recorder
+>>> rpc = Client('http://localhost:7076', recorder=Recorder('traffic.jsonl'))
+>>> rpc.ledger(account, count=1000)
+
+Replaying at recorded speed, at twice the recorded speed or as fast as
+possible:
+
+>>> from nano.replay import replay_session
+>>> rpc = Client('http://localhost:7076', session=replay_session('traffic.jsonl'))
+>>> rpc = Client(session=replay_session('traffic.jsonl', speed=2))
+>>> rpc = Client(session=replay_session('traffic.jsonl', speed=None))
+"""
+
+import io
+import json
+import threading
+import time
+from collections import deque
+
+import requests
+from requests.adapters import BaseAdapter
+
+
+class ReplayError(Exception):
+    """ Raised when a request was not found in the recording """
+
+
+def _request_key(request):
+    return json.dumps(request, sort_keys=True)
+
+
+class Recorder(object):
+    """
+    Appends the requests and responses of a client to **path**
+
+    Each line holds the `request` JSON, the `response` body as text, the
+    `elapsed` seconds until the response was received and the `time` the
+    request completed at. Requests failing in the transport are not recorded.
+
+    :param path: file to append to, created if missing
+    :type path: str
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = io.open(path, 'a', encoding='utf-8')
+
+    def record(self, request, resp):
+        """
+        Appends **request** and its :py:class:`requests.Response` **resp**
+        """
+        line = json.dumps(
+            {
+                'request': request,
+                'response': resp.content.decode('utf-8'),
+                'elapsed': resp.elapsed.total_seconds(),
+                'time': time.time(),
+            },
+            sort_keys=True,
+        )
+        with self._lock:
+            self._file.write(line + u'\n')
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def load_recording(path):
+    """
+    Returns the entries recorded in **path** by a :py:class:`Recorder`
+
+    :rtype: list of dict
+    """
+    with io.open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class ReplayAdapter(BaseAdapter):
+    """
+    Transport adapter serving recorded responses
+
+    Requests recorded several times get their responses in recorded order,
+    starting over once all were served.
+
+    :param entries: recording path or entries as returned by
+                    :py:func:`load_recording`
+    :type entries: str or list
+
+    :param speed: replay speed relative to the recorded latency, `1` waits
+                  as long as the node took, `2` half as long and `None`
+                  answers immediately
+    :type speed: float
+
+    :param sleep: function used to wait
+    """
+
+    def __init__(self, entries, speed=1, sleep=time.sleep):
+        super(ReplayAdapter, self).__init__()
+        if not isinstance(entries, list):
+            entries = load_recording(entries)
+        self.speed = speed
+        self.sleep = sleep
+        self._lock = threading.Lock()
+        self._responses = {}
+        for entry in entries:
+            self._responses.setdefault(_request_key(entry['request']), deque()).append(
+                (entry['elapsed'], entry['response'].encode('utf-8'))
+            )
+
+    def _next(self, request):
+        responses = self._responses.get(_request_key(request))
+        if not responses:
+            raise ReplayError(
+                'No recorded response for this request: %s'
+                % json.dumps(request, sort_keys=True, indent=2)
+            )
+        with self._lock:
+            response = responses[0]
+            responses.rotate(-1)
+        return response
+
+    def send(self, request, stream=False, timeout=None, **kwargs):
+        elapsed, body = self._next(json.loads(request.body.decode('utf-8')))
+        if self.speed:
+            self.sleep(elapsed / self.speed)
+
+        resp = requests.Response()
+        resp.status_code = 200
+        resp.reason = 'OK'
+        resp.headers['Content-Type'] = 'application/json'
+        resp.raw = io.BytesIO(body)
+        resp.url = request.url
+        resp.request = request
+        resp.connection = self
+        return resp
+
+    def close(self):
+        pass
+
+
+def replay_session(entries, speed=1, sleep=time.sleep):
+    """
+    Returns a :py:class:`requests.Session` answering http and https requests
+    with a :py:class:`ReplayAdapter`, see its parameters
+    """
+    adapter = ReplayAdapter(entries, speed=speed, sleep=sleep)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
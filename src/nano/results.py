@@ -0,0 +1,178 @@
+"""
+Typed result objects for high volume RPC responses
+
+Entries of `account_history`, `history`, `ledger`, `blocks_info`, `pending`
+and `accounts_balances` responses are decoded into dicts by default. With
+`nano.rpc.Client(typed_results=True)` they are returned as instances of the
+classes below instead, which store their fields in `__slots__` and take a
+fraction of the memory of a dict, useful when holding millions of them.
+
+Fields keep the names used by the node, fields a node returns that are not
+known here are kept in a small dict of extra fields. Records compare equal to
+the dicts they replace and convert back with :py:meth:`Record.to_dict`.
+
+>>> from nano.rpc import Client
+>>> rpc = Client('http://localhost:7076', typed_results=True)
+>>> entry = rpc.account_history(account, count=1)[0]
+>>> entry
+HistoryEntry(hash='000D1BAEC8EC208142C99059B393051BAC8380F9B5A2E6B2489A277D81789F3F', type='receive', account='xrb_3e3j5tkog48pnny9dmfzj1r16pg8t1e76dz5tmac6iq689wyjfpi00000000', amount=100000000000000000000000000000000)
+>>> entry.amount
+100000000000000000000000000000000
+>>> entry.to_dict()
+{'hash': '000D1BAEC8EC208142C99059B393051BAC8380F9B5A2E6B2489A277D81789F3F',
+ 'type': 'receive',
+ 'account': 'xrb_3e3j5tkog48pnny9dmfzj1r16pg8t1e76dz5tmac6iq689wyjfpi00000000',
+ 'amount': 100000000000000000000000000000000}
+"""
+
+
+class Record(object):
+    """
+    Base class of typed results, fields missing from the response are None
+    """
+
+    __slots__ = ('_extra',)
+
+    #: names of the fields stored in slots
+    fields = ()
+
+    def __init__(self, **values):
+        for field in self.fields:
+            setattr(self, field, values.pop(field, None))
+        self._extra = values or None
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Creates a record from a decoded response entry
+        """
+        return cls(**data)
+
+    def to_dict(self):
+        """
+        Returns the fields present in the response as a dict
+        """
+        result = dict(
+            (field, getattr(self, field))
+            for field in self.fields
+            if getattr(self, field) is not None
+        )
+        if self._extra:
+            result.update(self._extra)
+        return result
+
+    def __getitem__(self, key):
+        if key in self.fields:
+            value = getattr(self, key)
+            if value is not None:
+                return value
+        elif self._extra and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __eq__(self, other):
+        if isinstance(other, Record):
+            return type(self) is type(other) and self.to_dict() == other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+    __hash__ = None
+
+    def __getstate__(self):
+        return self.to_dict()
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def __repr__(self):
+        return '%s(%s)' % (
+            type(self).__name__,
+            ', '.join('%s=%r' % item for item in self.to_dict().items()),
+        )
+
+
+class HistoryEntry(Record):
+    """
+    Entry of `account_history` and `history` responses
+    """
+
+    fields = ('hash', 'type', 'account', 'amount')
+    __slots__ = fields
+
+
+class LedgerEntry(Record):
+    """
+    Account entry of `ledger` responses
+    """
+
+    fields = (
+        'frontier',
+        'open_block',
+        'representative_block',
+        'balance',
+        'modified_timestamp',
+        'block_count',
+        'representative',
+        'weight',
+        'pending',
+    )
+    __slots__ = fields
+
+
+class BlockInfo(Record):
+    """
+    Block entry of `blocks_info` responses
+    """
+
+    fields = ('block_account', 'amount', 'contents', 'pending', 'source_account')
+    __slots__ = fields
+
+
+class PendingEntry(Record):
+    """
+    Block entry of `pending` responses requested with `source`
+    """
+
+    fields = ('amount', 'source')
+    __slots__ = fields
+
+
+class Balance(Record):
+    """
+    Account entry of `accounts_balances` responses
+    """
+
+    fields = ('balance', 'pending')
+    __slots__ = fields
+
+
+def to_records(cls, entries):
+    """
+    Replaces the dict values of **entries**, a dict or list, with instances
+    of **cls** in place and returns **entries**
+    """
+    if isinstance(entries, dict):
+        for key, value in entries.items():
+            if isinstance(value, dict):
+                entries[key] = cls.from_dict(value)
+    elif isinstance(entries, list):
+        for index, value in enumerate(entries):
+            if isinstance(value, dict):
+                entries[index] = cls.from_dict(value)
+    return entries
@@ -0,0 +1,257 @@
+"""
+Retries and circuit breaking of RPC requests
+
+The client makes a single attempt per request by default since blindly
+retrying a request which timed out after reaching the node could, for
+`send`, spend twice. A :py:class:`RetryPolicy` retries failed requests with
+jittered exponential backoff, but only for actions that are safe to repeat:
+the read only actions listed in :py:data:`SAFE_ACTIONS` and `send` when it
+is given an `id`, which the node uses to deduplicate spends. Requests which
+timed out connecting never reached the node and are retried for any action,
+other connection errors only for safe actions as the connection may have
+broken after the request was sent.
+
+A :py:class:`CircuitBreaker` stops sending requests for a while once the
+node failed several times in a row, failing fast with
+:py:exc:`CircuitOpenError` instead of piling up threads waiting for
+timeouts while a node restarts.
+
+>>> from nano.rpc import Client
+>>> from nano.retry import CircuitBreaker, RetryPolicy
+>>> rpc = Client(
+...     'http://localhost:7076',
+...     retry=RetryPolicy(retries=3),
+...     breaker=CircuitBreaker(failure_threshold=5, reset_timeout=30),
+... )
+"""
+
+import random
+import threading
+import time
+
+import requests
+
+#: Read only actions which are safe to retry
+SAFE_ACTIONS = frozenset(
+    [
+        'account_balance',
+        'account_block_count',
+        'account_get',
+        'account_history',
+        'account_info',
+        'account_key',
+        'account_list',
+        'account_representative',
+        'account_weight',
+        'accounts_balances',
+        'accounts_frontiers',
+        'accounts_pending',
+        'available_supply',
+        'block',
+        'block_account',
+        'block_count',
+        'block_count_type',
+        'block_create',
+        'blocks',
+        'blocks_info',
+        'chain',
+        'delegators',
+        'delegators_count',
+        'deterministic_key',
+        'frontier_count',
+        'frontiers',
+        'history',
+        'key_expand',
+        'krai_from_raw',
+        'krai_to_raw',
+        'ledger',
+        'mrai_from_raw',
+        'mrai_to_raw',
+        'password_valid',
+        'peers',
+        'pending',
+        'pending_exists',
+        'rai_from_raw',
+        'rai_to_raw',
+        'receive_minimum',
+        'representatives',
+        'successors',
+        'unchecked',
+        'unchecked_get',
+        'unchecked_keys',
+        'validate_account_number',
+        'version',
+        'wallet_balance_total',
+        'wallet_balances',
+        'wallet_contains',
+        'wallet_export',
+        'wallet_frontiers',
+        'wallet_key_valid',
+        'wallet_locked',
+        'wallet_pending',
+        'wallet_representative',
+        'wallet_work_get',
+        'work_get',
+        'work_peers',
+        'work_validate',
+    ]
+)
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """ Raised instead of sending requests while the circuit breaker is open """
+
+
+class RetryPolicy(object):
+    """
+    Retries requests to safe actions failing with connection errors or
+    timeouts
+
+    :param retries: max number of retries per request
+    :type retries: int
+
+    :param backoff: delay in seconds before the first retry, doubled for
+                    every following retry
+    :type backoff: float
+
+    :param max_backoff: delays never exceed this
+    :type max_backoff: float
+
+    :param jitter: if True, delays are picked uniformly between 0 and the
+                   backoff so that clients do not retry in lockstep
+    :type jitter: bool
+
+    :param safe_actions: actions that are retried, defaults to
+                         :py:data:`SAFE_ACTIONS`
+    :type safe_actions: set of str
+
+    :param sleep: function used to wait
+    """
+
+    def __init__(
+        self,
+        retries=3,
+        backoff=0.1,
+        max_backoff=5.0,
+        jitter=True,
+        safe_actions=SAFE_ACTIONS,
+        sleep=time.sleep,
+    ):
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.jitter = jitter
+        self.safe_actions = safe_actions
+        self.sleep = sleep
+
+    def is_safe(self, action, params):
+        """
+        Returns True if request **params** for **action** can be repeated
+        without side effects
+        """
+        if action == 'send':
+            return bool(params.get('id'))
+        return action in self.safe_actions
+
+    def should_retry(self, action, params, error, attempt):
+        """
+        Returns True if the request failing with **error** on attempt number
+        **attempt**, counted from 0, should be retried
+        """
+        if attempt >= self.retries or isinstance(error, CircuitOpenError):
+            return False
+        if isinstance(error, requests.exceptions.ConnectTimeout):
+            return True
+        if not isinstance(
+            error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+        ):
+            return False
+        return self.is_safe(action, params)
+
+    def delay(self, attempt):
+        """
+        Returns the seconds to wait before retrying attempt **attempt**
+        """
+        delay = min(self.max_backoff, self.backoff * 2**attempt)
+        if self.jitter:
+            delay *= random.random()
+        return delay
+
+    def wait(self, attempt):
+        self.sleep(self.delay(attempt))
+
+
+class CircuitBreaker(object):
+    """
+    Fails requests fast while the node is unhealthy
+
+    After **failure_threshold** consecutive failed requests the circuit
+    opens and requests raise :py:exc:`CircuitOpenError` without being sent.
+    Once **reset_timeout** seconds have passed a single trial request is let
+    through, closing the circuit if it succeeds and opening it again if not.
+
+    :param failure_threshold: consecutive failures opening the circuit
+    :type failure_threshold: int
+
+    :param reset_timeout: seconds the circuit stays open
+    :type reset_timeout: float
+
+    :param clock: function returning the current time in seconds
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30, clock=time.time):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.state = self.CLOSED
+        self._opened_at = None
+        self._lock = threading.Lock()
+
+    def before(self):
+        """
+        Raises :py:exc:`CircuitOpenError` if a request should not be sent
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            if (
+                self.state == self.OPEN
+                and self.clock() - self._opened_at >= self.reset_timeout
+            ):
+                self.state = self.HALF_OPEN
+                return
+        raise CircuitOpenError('Circuit open after %d failures' % self.failures)
+
+    def success(self):
+        """
+        Records a request that reached the node
+        """
+        with self._lock:
+            self.failures = 0
+            self.state = self.CLOSED
+
+    def cancel(self):
+        """
+        Records a request that was not sent after :py:meth:`before`, letting
+        the next request probe the node if this one was to
+        """
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+
+    def failure(self):
+        """
+        Records a request that failed in the transport
+        """
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or (
+                self.failures >= self.failure_threshold
+            ):
+                self.state = self.OPEN
+                self._opened_at = self.clock()
@@ -1,8 +1,28 @@
+import contextlib
+import inspect
 import json
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
 import requests
 import six
 
+from .blocks import EAGER, LazyBlock, decode_block
+from .codec import Codec
+from .identifiers import BytesIdentifiers
+from .profiling import Profiler
+from .results import (
+    Balance,
+    BlockInfo,
+    HistoryEntry,
+    LedgerEntry,
+    PendingEntry,
+    to_records,
+)
+from .scheduling import current_priority, priority
+from .timeouts import DeadlineExceeded, current_deadline, deadline, remaining
+
 
 def doc_metadata(categories):
     """ Decorator to add doc metadata for docs generation """
@@ -18,12 +38,65 @@ class RPCException(Exception):
     """ Base class for RPC errors """
 
 
+class _RawBody(Exception):
+    """ Carries a raw response body out of a method called through `raw` """
+
+    def __init__(self, body):
+        self.body = body
+
+
+class RawMethods(object):
+    """
+    Calls :py:class:`Client` methods returning the undecoded response body
+    of the node as bytes, skipping decoding and post processing
+
+    >>> rpc.raw.accounts_balances(accounts)
+    b'{"balances": {"xrb_3e3j5tkog48pnny9dmfzj1r16pg8t1e76dz5tmac6iq689wyjfpi00000000": {"balance": "10000", "pending": "10000"}}}'
+    """
+
+    def __init__(self, client):
+        self._client = client
+
+    def __getattr__(self, name):
+        method = getattr(self._client, name)
+        if name.startswith('_') or name == 'call' or not callable(method):
+            raise AttributeError(name)
+
+        def raw_method(*args, **kwargs):
+            local = self._client._local
+            local.raw = True
+            try:
+                method(*args, **kwargs)
+            except _RawBody as e:
+                return e.body
+            finally:
+                local.raw = False
+            raise RPCException('%s did not call the node' % name)
+
+        return raw_method
+
+
 class Client(object):
     """
     Nano (RaiBlocks) node RPC client
 
     :param host: RPC server host, defaults to `'http://localhost:7076'`
     :param session: optional :py:class:`requests.Session` session to use for this client
+    :param cache: optional :py:class:`nano.cache.ResponseCache` to reuse responses
+    :param chunker: optional :py:class:`nano.chunking.Chunker` to split large batch calls
+    :param codec: optional :py:class:`nano.codec.Codec` to decode responses
+    :param block_contents: how block contents are decoded, `'eager'`, `'lazy'` or `'raw'`
+    :param typed_results: return :py:mod:`nano.results` objects for high volume results
+    :param bytes_ids: use 32 byte `bytes` for hashes, keys and accounts, see :py:mod:`nano.identifiers`
+    :param metrics: optional :py:class:`nano.metrics.Metrics` to record call metrics
+    :param recorder: optional :py:class:`nano.replay.Recorder` to record traffic
+    :param profiler: optional :py:class:`nano.profiling.Profiler` sampling calls
+    :param retry: optional :py:class:`nano.retry.RetryPolicy` to retry safe requests
+    :param breaker: optional :py:class:`nano.retry.CircuitBreaker` to fail fast
+    :param limiter: optional :py:class:`nano.limits.Limiter` to limit request rates
+    :param timeouts: optional :py:class:`nano.timeouts.TimeoutPolicy` for per action timeouts
+    :param scheduler: optional :py:class:`nano.scheduling.Scheduler` to prioritize requests
+    :param offline: optional :py:class:`nano.offline.OfflineActions` to answer computational actions in process
 
     >>> from nano.rpc import Client
     >>> rpc = Client('http://localhost:7076')
@@ -33,9 +106,35 @@ class Client(object):
         'store_version': 10,
         'node_vendor': 'RaiBlocks 9.0'
     }
+
+    A client can be shared between threads: methods never modify their
+    arguments, per call state is kept per thread and the optional
+    components (cache, chunker, metrics, limiter, scheduler...) are thread
+    safe. Requests share the connection pool of **session**, use
+    :py:meth:`map` to fan out calls over a bounded number of threads.
     """
 
-    def __init__(self, host='http://localhost:7076', session=None, timeout=3):
+    def __init__(
+        self,
+        host='http://localhost:7076',
+        session=None,
+        timeout=3,
+        cache=None,
+        chunker=None,
+        codec=None,
+        block_contents=EAGER,
+        typed_results=False,
+        bytes_ids=False,
+        metrics=None,
+        recorder=None,
+        profiler=None,
+        retry=None,
+        breaker=None,
+        limiter=None,
+        timeouts=None,
+        scheduler=None,
+        offline=None,
+    ):
         """
         Initialize the Nano (RaiBlocks) RPC client
 
@@ -45,6 +144,71 @@ class Client(object):
         :param session: optional `requests` session to use for this client
         :type host: :py:class:`requests.Session`
 
+        :param cache: optional response cache, see :py:mod:`nano.cache`
+        :type cache: :py:class:`nano.cache.ResponseCache`
+
+        :param chunker: optional chunker splitting the input of batch methods
+                        into concurrent requests, see :py:mod:`nano.chunking`
+        :type chunker: :py:class:`nano.chunking.Chunker`
+
+        :param codec: optional JSON codec decoding responses and converting
+                      their numeric fields, see :py:mod:`nano.codec`
+        :type codec: :py:class:`nano.codec.Codec`
+
+        :param block_contents: `'eager'` decodes the JSON contents of blocks
+                               when received, `'lazy'` on first access with
+                               :py:class:`nano.blocks.LazyBlock` and `'raw'`
+                               returns them undecoded
+        :type block_contents: str
+
+        :param typed_results: if True, entries of `account_history`,
+                              `history`, `ledger`, `blocks_info`, `pending`
+                              and `accounts_balances` are returned as
+                              `__slots__` objects, see :py:mod:`nano.results`
+        :type typed_results: bool
+
+        :param bytes_ids: if True, block hashes, public keys and accounts are
+                          accepted and returned as 32 byte `bytes`, see
+                          :py:mod:`nano.identifiers`
+        :type bytes_ids: bool
+
+        :param metrics: optional metrics recording latency, sizes and errors
+                        of requests, see :py:mod:`nano.metrics`
+        :type metrics: :py:class:`nano.metrics.Metrics`
+
+        :param recorder: optional recorder appending requests and responses
+                         to a file for replay, see :py:mod:`nano.replay`
+        :type recorder: :py:class:`nano.replay.Recorder`
+
+        :param profiler: optional profiler timing the phases of method calls,
+                         see :py:mod:`nano.profiling` and :py:meth:`profile`
+        :type profiler: :py:class:`nano.profiling.Profiler`
+
+        :param retry: optional policy retrying failed requests to actions
+                      that are safe to repeat, see :py:mod:`nano.retry`
+        :type retry: :py:class:`nano.retry.RetryPolicy`
+
+        :param breaker: optional circuit breaker failing requests fast while
+                        the node is unhealthy
+        :type breaker: :py:class:`nano.retry.CircuitBreaker`
+
+        :param limiter: optional rate and concurrency limits shared by the
+                        clients of a node, see :py:mod:`nano.limits`
+        :type limiter: :py:class:`nano.limits.Limiter`
+
+        :param timeouts: optional policy choosing the timeout of each
+                         request per action, **timeout** being the default,
+                         see :py:mod:`nano.timeouts`
+        :type timeouts: :py:class:`nano.timeouts.TimeoutPolicy`
+
+        :param scheduler: optional scheduler serving interactive requests
+                          before bulk ones, see :py:mod:`nano.scheduling`
+        :type scheduler: :py:class:`nano.scheduling.Scheduler`
+
+        :param offline: optional offline answers to computational actions
+                        such as `account_key`, see :py:mod:`nano.offline`
+        :type offline: :py:class:`nano.offline.OfflineActions`
+
         """
 
         if not session:
@@ -53,8 +217,148 @@ class Client(object):
         self.timeout = timeout
         self.session = session
         self.host = host
-
-    def call(self, action, params=None):
+        self.cache = cache
+        self.chunker = chunker
+        self.codec = codec or Codec()
+        self.block_contents = block_contents
+        self.typed_results = typed_results
+        self.identifiers = BytesIdentifiers() if bytes_ids else None
+        self.metrics = metrics
+        self.recorder = recorder
+        self.retry = retry
+        self.breaker = breaker
+        self.limiter = limiter
+        self.timeouts = timeouts
+        self.scheduler = scheduler
+        self.offline = offline
+        self.raw = RawMethods(self)
+        self._local = threading.local()
+        self.profiler = None
+        if profiler is not None:
+            self._set_profiler(profiler)
+
+    def _set_profiler(self, profiler):
+        """
+        Profiles the RPC methods of this client with **profiler**, or stops
+        profiling if it is None
+        """
+        self.profiler = profiler
+        for name, method in inspect.getmembers(
+            type(self), lambda member: hasattr(member, '__doc_meta__')
+        ):
+            if profiler is None:
+                self.__dict__.pop(name, None)
+            else:
+                self.__dict__[name] = profiler.wrap(
+                    name, method.__get__(self, type(self))
+                )
+
+    @contextlib.contextmanager
+    def profile(self, profiler=None):
+        """
+        Context manager profiling the RPC method calls of this client, from
+        any thread, while it is active
+
+        :param profiler: profiler to record to, defaults to a new one
+        :type profiler: :py:class:`nano.profiling.Profiler`
+
+        >>> with rpc.profile() as profiler:
+        ...     rpc.ledger(account, count=10000)
+        >>> print(profiler.report())
+        action  calls  total ms  build  cache  wait  encode  network  decode  process
+        ledger      1    1210.4   0.0%   0.0%  0.0%    0.0%    61.2%   30.1%     8.7%
+        """
+        previous = self.profiler
+        profiler = profiler or Profiler()
+        self._set_profiler(profiler)
+        try:
+            yield profiler
+        finally:
+            self._set_profiler(previous)
+
+    def map(
+        self, method, kwargs_list, workers=8, ordered=True, return_exceptions=False
+    ):
+        """
+        Calls **method** once for each set of keyword arguments in
+        **kwargs_list** on a pool of **workers** threads and yields
+        (kwargs, result) pairs as results arrive, keeping at most **workers**
+        calls in flight
+
+        Calls run with the deadline and priority of the calling thread, see
+        :py:mod:`nano.timeouts` and :py:mod:`nano.scheduling`.
+
+        :param method: name of the method to call or the method itself
+        :type method: str or callable
+
+        :param kwargs_list: keyword arguments of each call
+        :type kwargs_list: iterable of dict
+
+        :param workers: max number of concurrent calls
+        :type workers: int
+
+        :param ordered: if True results are yielded in input order, otherwise
+                        as soon as each call completes
+        :type ordered: bool
+
+        :param return_exceptions: if True, the exceptions raised by calls are
+                                  yielded as their result instead of raised
+        :type return_exceptions: bool
+
+        >>> for kwargs, info in rpc.map(
+        ...     'account_info', ({'account': account} for account in accounts)
+        ... ):
+        ...     print(kwargs['account'], info['balance'])
+        xrb_3e3j5tkog48pnny9dmfzj1r16pg8t1e76dz5tmac6iq689wyjfpi00000000 10000
+        """
+        if isinstance(method, six.string_types):
+            method = getattr(self, method)
+        at, level = current_deadline(), current_priority()
+
+        def run(kwargs):
+            with deadline(at=at), priority(level):
+                try:
+                    return method(**kwargs)
+                except Exception as e:
+                    if not return_exceptions:
+                        raise
+                    return e
+
+        kwargs_list = iter(kwargs_list)
+        executor = ThreadPoolExecutor(max_workers=workers)
+        in_flight = deque()
+        exhausted = False
+
+        try:
+            while True:
+                while not exhausted and len(in_flight) < workers:
+                    try:
+                        kwargs = next(kwargs_list)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    in_flight.append((kwargs, executor.submit(run, kwargs)))
+
+                if not in_flight:
+                    return
+
+                if ordered:
+                    kwargs, future = in_flight.popleft()
+                    yield kwargs, future.result()
+                    continue
+
+                done, _ = wait(
+                    [future for _, future in in_flight], return_when=FIRST_COMPLETED
+                )
+                for entry in [entry for entry in in_flight if entry[1] in done]:
+                    in_flight.remove(entry)
+                    yield entry[0], entry[1].result()
+        finally:
+            for _, future in in_flight:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def call(self, action, params=None, raw=False, check_errors=True):
         """
         Makes an RPC call to the server and returns the json response
 
@@ -64,6 +368,14 @@ class Client(object):
         :param params: Dict of arguments to send with RPC call
         :type params: dict
 
+        :param raw: if True, returns the response body as bytes without
+                    decoding it, see also :py:class:`RawMethods`
+        :type raw: bool
+
+        :param check_errors: if False, raw error responses are returned
+                             instead of raising
+        :type check_errors: bool
+
         :raises: :py:exc:`nano.rpc.RPCException`
         :raises: :py:exc:`requests.exceptions.RequestException`
 
@@ -76,18 +388,295 @@ class Client(object):
          'pending': '2309370940000000000000000000000000'}
 
         """
-        params = params or {}
+        params = dict(params or {})
         params['action'] = action
+        raw = raw or getattr(self._local, 'raw', False)
+        frame = self.profiler.frame() if self.profiler is not None else None
+        if frame is not None:
+            frame.lap('build')
+
+        if self.offline is not None:
+            result = self.offline.answer(action, params)
+            if result is not None:
+                return self._offline_result(action, params, result, raw, frame)
+
+        if self.cache is not None:
+            body = self.cache.get(action, params)
+            # taken before sending, a revalidation running meanwhile must not
+            # vouch for the response
+            state = self.cache.state(action, params) if body is None else None
+            if frame is not None:
+                frame.lap('cache')
+            if body is not None:
+                return self._result(body, raw)
+
+        resp = self._post(action, params, frame)
+
+        if raw:
+            error = self._raw_error(resp.content)
+            result = resp.content
+        else:
+            result = self.codec.loads(resp.content)
+            if frame is not None:
+                frame.lap('decode')
+            error = result['error'] if 'error' in result else None
+        if error is not None and (check_errors or not raw):
+            self._error(action, error)
+
+        # error responses returned by unchecked raw calls are not cached
+        if self.cache is not None and error is None:
+            self.cache.set(action, params, resp.content, state)
+
+        return self._result(result, raw)
+
+    def _offline_result(self, action, params, result, raw, frame):
+        """
+        Returns an answer computed offline, cross checking it against the
+        node if due
+        """
+        if self.offline.should_verify():
+            resp = self._post(action, params, frame)
+            self.offline.check(action, params, result, self.codec.loads(resp.content))
+        if raw:
+            result = json.dumps(result).encode('utf-8')
+        return self._result(result, raw)
+
+    def _result(self, body, raw):
+        """
+        Returns **body** decoded, as is for raw calls or out of a method
+        called through :py:class:`RawMethods`
+        """
+        if getattr(self._local, 'raw', False):
+            raise _RawBody(body)
+        if raw:
+            return body
+        if isinstance(body, bytes):
+            return self.codec.loads(body)
+        return body
+
+    def _post(self, action, params, frame=None, stream=False):
+        """
+        Sends request **params** to the node, retrying failed requests and
+        failing fast while the circuit breaker is open if enabled
+        """
+        if self.retry is None and self.breaker is None:
+            return self._attempt(
+                action, params, self._timeout(action, params), frame, stream
+            )
+
+        attempt = 0
+        while True:
+            timeout = self._timeout(action, params)
+            if self.breaker is not None:
+                self.breaker.before()
+            try:
+                resp = self._attempt(action, params, timeout, frame, stream)
+            except DeadlineExceeded:
+                # the request was not sent, which says nothing about the node
+                if self.breaker is not None:
+                    self.breaker.cancel()
+                raise
+            except requests.exceptions.RequestException as e:
+                if self.breaker is not None:
+                    self.breaker.failure()
+                if self.retry is None or not self.retry.should_retry(
+                    action, params, e, attempt
+                ):
+                    raise
+                if self.metrics is not None:
+                    self.metrics.retry(action)
+                self.retry.wait(attempt)
+                if frame is not None:
+                    frame.lap('wait')
+                attempt += 1
+                continue
+            except BaseException:
+                # leaves no half open circuit waiting for an unfinished trial
+                if self.breaker is not None:
+                    self.breaker.cancel()
+                raise
+
+            if self.breaker is not None:
+                self.breaker.success()
+            return resp
+
+    def _timeout(self, action, params):
+        """
+        Returns the timeout of a request for **action** from the timeout
+        policy and the current deadline, see :py:mod:`nano.timeouts`
+        """
+        timeout = self.timeout
+        if self.timeouts is not None:
+            timeout = self.timeouts.timeout(action, params, timeout)
+        return remaining(timeout)
+
+    def _attempt(self, action, params, timeout, frame=None, stream=False):
+        """
+        Sends request **params** to the node once, waiting for the limits of
+        the limiter and a slot of the scheduler if enabled
+        """
+        if self.limiter is None and self.scheduler is None:
+            return self._request(action, params, timeout, frame, stream)
+
+        waited = self._acquire(action)
+        if frame is not None:
+            frame.lap('wait')
+        try:
+            if self.metrics is not None:
+                self.metrics.wait(action, waited)
+            resp = self._request(action, params, remaining(timeout), frame, stream)
+        except BaseException:
+            self._release(action)
+            raise
+        # streamed responses hold their slots until read, see _stream
+        if not stream:
+            self._release(action)
+        return resp
 
-        resp = self.session.post(self.host, json=params, timeout=self.timeout)
+    def _acquire(self, action):
+        """
+        Waits for the scheduler then the limiter, returns the seconds waited
+
+        Queued requests do not hold limiter slots, they are only taken once
+        the scheduler let the request through.
+        """
+        waited = 0.0
+        if self.scheduler is not None:
+            waited += self.scheduler.acquire(action)
+        if self.limiter is not None:
+            try:
+                waited += self.limiter.acquire(action)
+            except BaseException:
+                if self.scheduler is not None:
+                    self.scheduler.release(action)
+                raise
+        return waited
+
+    def _release(self, action):
+        if self.limiter is not None:
+            self.limiter.release(action)
+        if self.scheduler is not None:
+            self.scheduler.release(action)
+
+    def _request(self, action, params, timeout, frame=None, stream=False):
+        """
+        Sends request **params** to the node, recording metrics and traffic
+        if enabled
+        """
+        started = self.metrics.start(action) if self.metrics is not None else None
+        try:
+            resp = self._send(params, timeout, frame, stream)
+        except Exception as e:
+            if self.metrics is not None:
+                self.metrics.finish(action, started)
+                self.metrics.error(action, type(e).__name__)
+            if (
+                self.timeouts is not None
+                and timeout is not None
+                and isinstance(e, requests.exceptions.Timeout)
+            ):
+                # the request took at least its timeout, counting it lets
+                # adaptive timeouts widen again once the node slows down
+                self.timeouts.observe(action, timeout)
+            raise
+
+        if self.metrics is not None:
+            if stream:
+                # the body is not read yet, counted from its announced size
+                size = int(resp.headers.get('Content-Length') or 0)
+            else:
+                size = len(resp.content)
+            self.metrics.finish(action, started, len(resp.request.body or b''), size)
+
+        if self.timeouts is not None:
+            self.timeouts.observe(action, resp.elapsed.total_seconds())
+        if self.recorder is not None:
+            self.recorder.record(params, resp)
+        return resp
 
-        result = resp.json()
+    def _send(self, params, timeout, frame=None, stream=False):
+        """
+        Posts **params** to the node, timing encoding and network phases
+        separately when profiling
+        """
+        if frame is None:
+            options = {'stream': True} if stream else {}
+            return self.session.post(self.host, json=params, timeout=timeout, **options)
+
+        # encoded to bytes like requests does for json=, adapters read bytes
+        data = json.dumps(params).encode('utf-8')
+        frame.lap('encode')
+        try:
+            return self.session.post(
+                self.host,
+                data=data,
+                headers={'Content-Type': 'application/json'},
+                timeout=timeout,
+            )
+        finally:
+            frame.lap('network')
 
-        if 'error' in result:
-            raise RPCException(result['error'])
+    @contextlib.contextmanager
+    def _stream(self, action, params):
+        """
+        Sends request **params** for **action** like :py:meth:`call` and
+        yields the response with its body left unread, holding the slots of
+        the limiter and the scheduler until it is closed
+        """
+        resp = self._post(action, params, stream=True)
+        try:
+            yield resp
+        finally:
+            resp.close()
+            self._release(action)
 
+    def _error(self, action, error):
+        """
+        Raises :py:exc:`RPCException` for an **error** returned by the node
+        """
+        if self.metrics is not None:
+            self.metrics.error(action, error)
+        raise RPCException(error)
+
+    def _raw_error(self, body):
+        """
+        Returns the error of raw **body** if it is an error response, only
+        decoding bodies which mention an error early on
+        """
+        if b'"error"' in body[:256]:
+            result = self.codec.loads(body)
+            if 'error' in result:
+                return result['error']
+        return None
+
+    def _decode_block(self, contents):
+        return decode_block(contents, self.block_contents)
+
+    def _records(self, cls, entries):
+        if not self.typed_results:
+            return entries
+        return to_records(cls, entries)
+
+    def _call_coerced(self, action, params=None):
+        """
+        Makes an RPC call converting the numeric fields of the response as
+        listed in :py:data:`nano.codec.COERCIONS` and identifiers in bytes
+        identifiers mode
+        """
+        result = self.codec.coerce(action, self.call(action, params))
+        if self.identifiers is not None:
+            result = self.identifiers.decode(action, result)
         return result
 
+    def _chunked(self, items):
+        """
+        Returns True if a batch call for **items** should be split by the
+        chunker
+        """
+        if getattr(self._local, 'raw', False):
+            return False
+        return self.chunker is not None and self.chunker.should_split(items)
+
     def _process_value(self, value, type):
         """
         Process a value that will be sent to backend
@@ -99,6 +688,9 @@ class Client(object):
 
         """
 
+        if self.identifiers is not None:
+            value = self.identifiers.encode(value, type)
+
         if not isinstance(value, six.string_types + (list,)):
             value = json.dumps(value)
         return value
@@ -165,18 +757,15 @@ class Client(object):
 
         """
 
-        accounts = self._process_value(accounts, 'list')
+        accounts = self._process_value(accounts, 'accounts')
 
-        payload = {"accounts": accounts}
-
-        resp = self.call('accounts_balances', payload)
-        accounts_balances = resp.get('balances') or {}
+        if self._chunked(accounts):
+            return self.chunker.merge(self.accounts_balances, accounts)
 
-        for account, balances in accounts_balances.items():
-            for k in balances:
-                balances[k] = int(balances[k])
+        payload = {"accounts": accounts}
 
-        return accounts_balances
+        resp = self._call_coerced('accounts_balances', payload)
+        return self._records(Balance, resp.get('balances') or {})
 
     @doc_metadata(categories=['account'])
     def account_block_count(self, account):
@@ -240,7 +829,7 @@ class Client(object):
         if not work:
             payload['work'] = self._process_value(work, 'strbool')
 
-        resp = self.call('accounts_create', payload)
+        resp = self._call_coerced('accounts_create', payload)
 
         return resp.get('accounts') or []
 
@@ -270,11 +859,14 @@ class Client(object):
 
         """
 
-        accounts = self._process_value(accounts, 'list')
+        accounts = self._process_value(accounts, 'accounts')
+
+        if self._chunked(accounts):
+            return self.chunker.merge(self.accounts_frontiers, accounts)
 
         payload = {"accounts": accounts}
 
-        resp = self.call('accounts_frontiers', payload)
+        resp = self._call_coerced('accounts_frontiers', payload)
 
         return resp.get('frontiers') or {}
 
@@ -324,7 +916,7 @@ class Client(object):
         if pending:
             payload['pending'] = self._process_value(pending, 'strbool')
 
-        resp = self.call('account_info', payload)
+        resp = self._call_coerced('account_info', payload)
 
         for key in (
             'modified_timestamp',
@@ -367,7 +959,7 @@ class Client(object):
         if not work:
             payload['work'] = self._process_value(work, 'strbool')
 
-        resp = self.call('account_create', payload)
+        resp = self._call_coerced('account_create', payload)
 
         return resp['account']
 
@@ -392,12 +984,12 @@ class Client(object):
 
         payload = {"key": key}
 
-        resp = self.call('account_get', payload)
+        resp = self._call_coerced('account_get', payload)
 
         return resp['account']
 
     @doc_metadata(categories=['account'])
-    def account_history(self, account, count):
+    def account_history(self, account, count, head=None):
         """
         Reports send/receive information for a **account**
 
@@ -407,6 +999,10 @@ class Client(object):
         :param count: number of blocks to return
         :type count: int
 
+        :param head: block hash to start from instead of the frontier, going
+                     backwards
+        :type head: str
+
         :raises: :py:exc:`nano.rpc.RPCException`
 
         >>> rpc.account_history(
@@ -429,13 +1025,11 @@ class Client(object):
 
         payload = {"account": account, "count": count}
 
-        resp = self.call('account_history', payload)
-        history = resp.get('history') or []
-
-        for entry in history:
-            entry['amount'] = int(entry['amount'])
+        if head is not None:
+            payload['head'] = self._process_value(head, 'block')
 
-        return history
+        resp = self._call_coerced('account_history', payload)
+        return self._records(HistoryEntry, resp.get('history') or [])
 
     @doc_metadata(categories=['wallet', 'account'])
     def account_list(self, wallet):
@@ -460,7 +1054,7 @@ class Client(object):
 
         payload = {"wallet": wallet}
 
-        resp = self.call('account_list', payload)
+        resp = self._call_coerced('account_list', payload)
 
         return resp.get('accounts') or []
 
@@ -495,7 +1089,7 @@ class Client(object):
 
         wallet = self._process_value(wallet, 'wallet')
         source = self._process_value(source, 'wallet')
-        accounts = self._process_value(accounts, 'list')
+        accounts = self._process_value(accounts, 'accounts')
 
         payload = {"wallet": wallet, "source": source, "accounts": accounts}
 
@@ -541,9 +1135,19 @@ class Client(object):
 
         """
 
+        accounts = self._process_value(accounts, 'accounts')
+
+        if self._chunked(accounts):
+            return self.chunker.merge(
+                self.accounts_pending,
+                accounts,
+                count=count,
+                threshold=threshold,
+                source=source,
+            )
+
         payload = {"accounts": accounts}
 
-        accounts = self._process_value(accounts, 'list')
         if count is not None:
             payload['count'] = self._process_value(count, 'int')
 
@@ -553,22 +1157,12 @@ class Client(object):
         if source:
             payload['source'] = self._process_value(source, 'strbool')
 
-        resp = self.call('accounts_pending', payload)
+        resp = self._call_coerced('accounts_pending', payload)
 
         blocks = resp.get('blocks') or {}
         for account, data in blocks.items():
-            if isinstance(data, list):  # list of block hashes, no change needed
-                continue
             if not data:
                 blocks[account] = []  # convert a "" response to []
-                continue
-            for key, value in data.items():
-                if isinstance(value, six.string_types):  # amount
-                    data[key] = int(value)
-                elif isinstance(value, dict):  # dict with "amount" and "source"
-                    for key in ('amount',):
-                        if key in value:
-                            value[key] = int(value[key])
 
         return blocks
 
@@ -593,7 +1187,7 @@ class Client(object):
 
         payload = {"account": account}
 
-        resp = self.call('account_key', payload)
+        resp = self._call_coerced('account_key', payload)
 
         return resp['key']
 
@@ -650,7 +1244,7 @@ class Client(object):
 
         payload = {"account": account}
 
-        resp = self.call('account_representative', payload)
+        resp = self._call_coerced('account_representative', payload)
 
         return resp['representative']
 
@@ -697,7 +1291,7 @@ class Client(object):
         if work is not None:
             payload['work'] = self._process_value(work, 'work')
 
-        resp = self.call('account_representative_set', payload)
+        resp = self._call_coerced('account_representative_set', payload)
 
         return resp['block']
 
@@ -772,7 +1366,7 @@ class Client(object):
 
         resp = self.call('block', payload)
 
-        return json.loads(resp['contents'])
+        return self._decode_block(resp['contents'])
 
     @doc_metadata(categories=['block'])
     def blocks(self, hashes):
@@ -800,15 +1394,18 @@ class Client(object):
 
         """
 
-        hashes = self._process_value(hashes, 'list')
+        hashes = self._process_value(hashes, 'blocks')
+
+        if self._chunked(hashes):
+            return self.chunker.merge(self.blocks, hashes)
 
         payload = {"hashes": hashes}
 
-        resp = self.call('blocks', payload)
+        resp = self._call_coerced('blocks', payload)
         blocks = resp.get('blocks') or {}
 
         for k, v in blocks.items():
-            blocks[k] = json.loads(v)
+            blocks[k] = self._decode_block(v)
 
         return blocks
 
@@ -847,7 +1444,12 @@ class Client(object):
 
         """
 
-        hashes = self._process_value(hashes, 'list')
+        hashes = self._process_value(hashes, 'blocks')
+
+        if self._chunked(hashes):
+            return self.chunker.merge(
+                self.blocks_info, hashes, pending=pending, source=source
+            )
 
         payload = {"hashes": hashes}
 
@@ -856,17 +1458,14 @@ class Client(object):
         if source:
             payload['source'] = self._process_value(source, 'strbool')
 
-        resp = self.call('blocks_info', payload)
+        resp = self._call_coerced('blocks_info', payload)
 
         blocks = resp.get('blocks') or {}
 
         for block, data in blocks.items():
-            data['contents'] = json.loads(data['contents'])
-            for key in ('amount', 'pending'):
-                if key in data:
-                    data[key] = int(data[key])
+            data['contents'] = self._decode_block(data['contents'])
 
-        return blocks
+        return self._records(BlockInfo, blocks)
 
     @doc_metadata(categories=['account', 'block'])
     def block_account(self, hash):
@@ -889,7 +1488,7 @@ class Client(object):
 
         payload = {"hash": hash}
 
-        resp = self.call('block_account', payload)
+        resp = self._call_coerced('block_account', payload)
 
         return resp['account']
 
@@ -1111,8 +1710,8 @@ class Client(object):
         if work is not None:
             payload['work'] = self._process_value(work, 'work')
 
-        resp = self.call('block_create', payload)
-        resp['block'] = json.loads(resp['block'])
+        resp = self._call_coerced('block_create', payload)
+        resp['block'] = self._decode_block(resp['block'])
 
         return resp
 
@@ -1186,7 +1785,7 @@ class Client(object):
 
         payload = {"block": block, "count": count}
 
-        resp = self.call('chain', payload)
+        resp = self._call_coerced('chain', payload)
 
         return resp.get('blocks') or []
 
@@ -1219,13 +1818,8 @@ class Client(object):
 
         payload = {"account": account}
 
-        resp = self.call('delegators', payload)
-        delegators = resp.get('delegators') or {}
-
-        for k, v in delegators.items():
-            delegators[k] = int(v)
-
-        return delegators
+        resp = self._call_coerced('delegators', payload)
+        return resp.get('delegators') or {}
 
     @doc_metadata(categories=['account'])
     def delegators_count(self, account):
@@ -1284,7 +1878,7 @@ class Client(object):
 
         payload = {"seed": seed, "index": index}
 
-        resp = self.call('deterministic_key', payload)
+        resp = self._call_coerced('deterministic_key', payload)
 
         return resp
 
@@ -1318,7 +1912,7 @@ class Client(object):
 
         payload = {"account": account, "count": count}
 
-        resp = self.call('frontiers', payload)
+        resp = self._call_coerced('frontiers', payload)
 
         return resp.get('frontiers') or {}
 
@@ -1371,14 +1965,9 @@ class Client(object):
 
         payload = {"hash": hash, "count": count}
 
-        resp = self.call('history', payload)
-
-        history = resp.get('history') or []
-
-        for entry in history:
-            entry['amount'] = int(entry['amount'])
+        resp = self._call_coerced('history', payload)
 
-        return history
+        return self._records(HistoryEntry, resp.get('history') or [])
 
     @doc_metadata(categories=['utility'])
     def mrai_from_raw(self, amount):
@@ -1533,7 +2122,7 @@ class Client(object):
 
         """
 
-        resp = self.call('key_create')
+        resp = self._call_coerced('key_create')
 
         return resp
 
@@ -1562,7 +2151,7 @@ class Client(object):
 
         payload = {"key": key}
 
-        resp = self.call('key_expand', payload)
+        resp = self._call_coerced('key_expand', payload)
 
         return resp
 
@@ -1668,16 +2257,8 @@ class Client(object):
         if pending:
             payload['pending'] = self._process_value(pending, 'strbool')
 
-        resp = self.call('ledger', payload)
-        accounts = resp.get('accounts') or {}
-
-        int_keys = ('balance', 'modified_timestamp', 'block_count', 'weight', 'pending')
-        for account, frontier in accounts.items():
-            for key in int_keys:
-                if key in frontier:
-                    frontier[key] = int(frontier[key])
-
-        return accounts
+        resp = self._call_coerced('ledger', payload)
+        return self._records(LedgerEntry, resp.get('accounts') or {})
 
     @doc_metadata(categories=['wallet'])
     def payment_begin(self, wallet):
@@ -1703,7 +2284,7 @@ class Client(object):
 
         payload = {"wallet": wallet}
 
-        resp = self.call('payment_begin', payload)
+        resp = self._call_coerced('payment_begin', payload)
 
         return resp['account']
 
@@ -1828,12 +2409,14 @@ class Client(object):
 
         """
 
-        if isinstance(block, dict):
+        if isinstance(block, LazyBlock):
+            block = block.raw
+        elif isinstance(block, dict):
             block = json.dumps(block, sort_keys=True)
 
         payload = {"block": block}
 
-        resp = self.call('process', payload)
+        resp = self._call_coerced('process', payload)
 
         return resp['hash']
 
@@ -1877,7 +2460,7 @@ class Client(object):
         if work:
             payload['work'] = self._process_value(work, 'work')
 
-        resp = self.call('receive', payload)
+        resp = self._call_coerced('receive', payload)
 
         return resp['block']
 
@@ -1958,14 +2541,9 @@ class Client(object):
         if sorting:
             payload['sorting'] = self._process_value(sorting, 'strbool')
 
-        resp = self.call('representatives', payload)
+        resp = self._call_coerced('representatives', payload)
 
-        representatives = resp.get('representatives') or {}
-
-        for k, v in representatives.items():
-            representatives[k] = int(v)
-
-        return representatives
+        return resp.get('representatives') or {}
 
     @doc_metadata(categories=['node', 'block'])
     def unchecked(self, count=None):
@@ -2003,7 +2581,7 @@ class Client(object):
 
         blocks = resp.get('blocks') or {}
         for block, block_json in blocks.items():
-            blocks[block] = json.loads(block_json)
+            blocks[block] = self._decode_block(block_json)
 
         return blocks
 
@@ -2059,7 +2637,7 @@ class Client(object):
 
         resp = self.call('unchecked_get', payload)
 
-        return json.loads(resp['contents'])
+        return self._decode_block(resp['contents'])
 
     @doc_metadata(categories=['node', 'block'])
     def unchecked_keys(self, key=None, count=None):
@@ -2111,7 +2689,7 @@ class Client(object):
         unchecked = resp.get('unchecked') or []
 
         for entry in unchecked:
-            entry['contents'] = json.loads(entry['contents'])
+            entry['contents'] = self._decode_block(entry['contents'])
 
         return unchecked
 
@@ -2160,7 +2738,7 @@ class Client(object):
 
         payload = {"wallet": wallet}
 
-        resp = self.call('wallet_representative', payload)
+        resp = self._call_coerced('wallet_representative', payload)
 
         return resp['representative']
 
@@ -2230,7 +2808,7 @@ class Client(object):
         if not work:
             payload['work'] = self._process_value(work, 'strbool')
 
-        resp = self.call('wallet_add', payload)
+        resp = self._call_coerced('wallet_add', payload)
 
         return resp['account']
 
@@ -2292,13 +2870,8 @@ class Client(object):
 
         payload = {"wallet": wallet}
 
-        resp = self.call('wallet_balances', payload)
-        balances = resp.get('balances') or {}
-        for account, balance in balances.items():
-            for k, v in balances[account].items():
-                balances[account][k] = int(v)
-
-        return balances
+        resp = self._call_coerced('wallet_balances', payload)
+        return resp.get('balances') or {}
 
     @doc_metadata(categories=['wallet'])
     def wallet_change_seed(self, wallet, seed):
@@ -2452,7 +3025,7 @@ class Client(object):
 
         payload = {"wallet": wallet}
 
-        resp = self.call('wallet_frontiers', payload)
+        resp = self._call_coerced('wallet_frontiers', payload)
 
         return resp.get('frontiers') or {}
 
@@ -2606,22 +3179,12 @@ class Client(object):
         if source:
             payload['source'] = self._process_value(source, 'strbool')
 
-        resp = self.call('wallet_pending', payload)
+        resp = self._call_coerced('wallet_pending', payload)
 
         blocks = resp.get('blocks') or {}
         for account, data in blocks.items():
-            if isinstance(data, list):  # list of block hashes, no change needed
-                continue
             if not data:
                 blocks[account] = []  # convert a "" response to []
-                continue
-            for key, value in data.items():
-                if isinstance(value, six.string_types):  # amount
-                    data[key] = int(value)
-                elif isinstance(value, dict):  # dict with "amount" and "source"
-                    for key in ('amount',):
-                        if key in value:
-                            value[key] = int(value[key])
 
         return blocks or {}
 
@@ -2791,15 +3354,9 @@ class Client(object):
         }
         """
 
-        resp = self.call('peers')
-
-        result = {}
-        peers = resp.get('peers') or {}
+        resp = self._call_coerced('peers')
 
-        for host, version in peers.items():
-            result[host] = int(version)
-
-        return result
+        return resp.get('peers') or {}
 
     @doc_metadata(categories=['account'])
     def pending(self, account, count=None, threshold=None, source=False):
@@ -2854,22 +3411,11 @@ class Client(object):
         if source:
             payload['source'] = self._process_value(source, 'strbool')
 
-        resp = self.call('pending', payload)
+        resp = self._call_coerced('pending', payload)
 
         blocks = resp.get('blocks') or {}
 
-        if isinstance(blocks, list):
-            return blocks
-
-        for block, value in blocks.items():
-            if isinstance(value, six.string_types):  # amount
-                blocks[block] = int(value)
-            elif isinstance(value, dict):  # dict with "amount" and "source"
-                for key in ('amount',):
-                    if key in value:
-                        value[key] = int(value[key])
-
-        return blocks
+        return self._records(PendingEntry, blocks)
 
     @doc_metadata(categories=['block'])
     def pending_exists(self, hash):
@@ -3164,7 +3710,7 @@ class Client(object):
         if destinations is not None:
             payload['destinations'] = self._process_value(destinations, 'int')
 
-        resp = self.call('republish', payload)
+        resp = self._call_coerced('republish', payload)
 
         return resp.get('blocks') or []
 
@@ -3291,7 +3837,7 @@ class Client(object):
         if work is not None:
             payload['work'] = self._process_value(work, 'work')
 
-        resp = self.call('send', payload)
+        resp = self._call_coerced('send', payload)
 
         return resp['block']
 
@@ -3324,7 +3870,7 @@ class Client(object):
 
         payload = {"block": block, "count": count}
 
-        resp = self.call('successors', payload)
+        resp = self._call_coerced('successors', payload)
 
         return resp.get('blocks') or []
 
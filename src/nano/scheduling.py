@@ -0,0 +1,163 @@
+"""
+Priority scheduling of requests
+
+When one client is shared by user facing requests and background jobs,
+bulk calls such as `ledger` or `blocks_info` occupy the connections and the
+RPC workers of the node and delay the interactive ones. A
+:py:class:`Scheduler` attached to the client bounds the number of requests
+in flight, hands free slots to waiting requests by priority and keeps
+**reserved** slots that only :py:data:`INTERACTIVE` requests may use, so
+interactive latency stays flat while background work runs.
+
+Requests get the priority set with :py:func:`priority` on the calling
+thread, or else the default priority of their action: :py:data:`BULK` for
+the bulk actions of :py:data:`nano.limits.ACTION_CLASSES` and
+:py:data:`NORMAL` for the others.
+
+Keep **max_in_flight** within the connection pool size of the session, 10
+by default for :py:class:`requests.Session`, so that connections are reused.
+
+>>> from nano.rpc import Client
+>>> from nano.scheduling import INTERACTIVE, Scheduler, priority
+>>> rpc = Client('http://localhost:7076', scheduler=Scheduler(max_in_flight=8, reserved=2))
+>>> with priority(INTERACTIVE):
+...     rpc.pending_exists(hash=payment_hash)
+"""
+
+import contextlib
+import heapq
+import itertools
+import threading
+import time
+
+from .limits import ACTION_CLASSES
+from .timeouts import DeadlineExceeded, current_deadline
+
+#: Priority of user facing requests, which may use reserved slots
+INTERACTIVE = 0
+
+#: Default priority of requests
+NORMAL = 1
+
+#: Priority of background bulk requests
+BULK = 2
+
+#: Default priority of actions, actions not listed here are `NORMAL`
+PRIORITIES = dict(
+    (action, BULK)
+    for action, action_class in ACTION_CLASSES.items()
+    if action_class in ('bulk', 'bootstrap', 'work')
+)
+
+_local = threading.local()
+
+
+def current_priority():
+    """
+    Returns the priority set on this thread with :py:func:`priority`, or
+    None
+    """
+    return getattr(_local, 'priority', None)
+
+
+@contextlib.contextmanager
+def priority(level):
+    """
+    Context manager setting the priority of the requests made in the block
+    by this thread
+
+    >>> with priority(BULK):
+    ...     rpc.account_info(account)
+    """
+    previous = current_priority()
+    _local.priority = level
+    try:
+        yield level
+    finally:
+        _local.priority = previous
+
+
+class Scheduler(object):
+    """
+    Hands request slots out by priority
+
+    :param max_in_flight: max number of requests in flight
+    :type max_in_flight: int
+
+    :param reserved: slots only used by :py:data:`INTERACTIVE` requests
+    :type reserved: int
+
+    :param priorities: mapping of action to default priority, defaults to
+                       :py:data:`PRIORITIES`
+    :type priorities: dict
+
+    :param default: priority of actions missing from **priorities**
+    :type default: int
+    """
+
+    def __init__(self, max_in_flight=8, reserved=2, priorities=None, default=NORMAL):
+        if reserved >= max_in_flight:
+            raise ValueError('reserved must be lower than max_in_flight')
+        self.max_in_flight = max_in_flight
+        self.reserved = reserved
+        self.priorities = PRIORITIES if priorities is None else priorities
+        self.default = default
+        self.in_flight = 0
+        self._waiting = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+
+    def priority(self, action):
+        """
+        Returns the priority of a request for **action** made by this thread
+        """
+        level = current_priority()
+        if level is None:
+            level = self.priorities.get(action, self.default)
+        return level
+
+    def _available(self, level):
+        free = self.max_in_flight - self.in_flight
+        return free > (0 if level <= INTERACTIVE else self.reserved)
+
+    def acquire(self, action):
+        """
+        Waits for a slot for a request for **action**, to be followed by
+        :py:meth:`release` once it completed
+
+        :raises: :py:exc:`nano.timeouts.DeadlineExceeded` if the deadline of
+                 the thread passes while waiting
+
+        :return: seconds waited
+        :rtype: float
+        """
+        entry = (self.priority(action), next(self._counter))
+        at = current_deadline()
+        started = None
+        with self._condition:
+            heapq.heappush(self._waiting, entry)
+            while not (self._waiting[0] == entry and self._available(entry[0])):
+                if started is None:
+                    started = time.time()
+                timeout = None
+                if at is not None:
+                    timeout = at - time.time()
+                    if timeout <= 0:
+                        self._waiting.remove(entry)
+                        heapq.heapify(self._waiting)
+                        self._condition.notify_all()
+                        raise DeadlineExceeded('Deadline exceeded waiting for a slot')
+                self._condition.wait(timeout)
+            heapq.heappop(self._waiting)
+            self.in_flight += 1
+            # the next request in line may be able to run as well
+            self._condition.notify_all()
+        return 0.0 if started is None else time.time() - started
+
+    def release(self, action=None):
+        """
+        Releases the slot taken for a request
+        """
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
@@ -0,0 +1,208 @@
+"""
+Incremental decoding of large RPC responses
+
+:py:meth:`nano.rpc.Client.call` buffers and decodes the whole response body
+before returning, which for calls such as `ledger` with a large count,
+`unchecked`, `delegators` of a big representative or `wallet_pending` on an
+exchange wallet means holding gigabytes in memory. :py:func:`stream_call`
+instead reads the response from the socket in chunks and yields the entries
+of its top level collection as soon as each one is complete, so memory use is
+bounded by the size of one entry.
+
+Entries are yielded as decoded by the node, numeric strings are not
+converted and the response cache of the client is not used. The request goes
+through the limiter, scheduler, timeouts, retries, circuit breaker, metrics
+and recorder of the client like any other call, the limiter and scheduler
+slots being held until the response has been read. With a recorder, the body
+is buffered to be recorded.
+
+>>> from nano.rpc import Client
+>>> from nano.streaming import stream_call
+>>> rpc = Client('http://localhost:7076', timeout=600)
+>>> for account, info in stream_call(rpc, 'ledger', {'count': '-1'}):
+...     print(account, int(info['balance']))
+"""
+
+import codecs
+import json
+
+from .rpc import RPCException
+
+_WHITESPACE = ' \t\n\r'
+_NUMBER_CHARS = '0123456789.eE+-'
+_decoder = json.JSONDecoder()
+
+
+class _Reader(object):
+    """
+    Reads JSON values one at a time from an iterable of byte chunks, only
+    buffering the part of the input that has not been consumed yet
+    """
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = u''
+        self.pos = 0
+        self.eof = False
+
+    def _read(self):
+        """
+        Appends the next chunk to the buffer, returns False at end of input
+        """
+        self.buffer = self.buffer[self.pos :]
+        self.pos = 0
+        for chunk in self.chunks:
+            text = self.decoder.decode(chunk)
+            if text:
+                self.buffer += text
+                return True
+        self.eof = True
+        text = self.decoder.decode(b'', True)
+        self.buffer += text
+        return bool(text)
+
+    def peek(self):
+        """
+        Returns the next non whitespace character without consuming it
+        """
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._read():
+                raise ValueError('Unexpected end of JSON input')
+
+    def expect(self, chars):
+        """
+        Consumes and returns the next character which must be one of **chars**
+        """
+        char = self.peek()
+        if char not in chars:
+            raise ValueError(
+                'Expected %r got %r in JSON input' % (' or '.join(chars), char)
+            )
+        self.pos += 1
+        return char
+
+    def value(self):
+        """
+        Consumes and returns the next complete JSON value
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except ValueError:
+                if self.eof or not self._read():
+                    raise
+                continue
+            # a number at the end of the buffer may continue in the next chunk
+            if self.eof or (
+                end < len(self.buffer) and self.buffer[end] not in _NUMBER_CHARS
+            ):
+                self.pos = end
+                return value
+            start = self.pos
+            if not self._read():
+                self.pos = end - start
+                return value
+
+    def entries(self):
+        """
+        Yields the (key, value) pairs of an object or the values of an array
+        """
+        opening = self.expect('{[')
+        closing = '}' if opening == '{' else ']'
+        if self.peek() == closing:
+            self.pos += 1
+            return
+        while True:
+            if opening == '{':
+                key = self.value()
+                self.expect(':')
+                yield key, self.value()
+            else:
+                yield self.value()
+            if self.expect(',' + closing) == closing:
+                return
+
+
+def iter_entries(chunks, field=None):
+    """
+    Incrementally decodes an RPC response from **chunks** of bytes yielding
+    the entries of its top level collection, (key, value) pairs for objects
+    and values for arrays
+
+    :param chunks: iterable of bytes making up the response body
+    :type chunks: iterable
+
+    :param field: name of the top level member to stream, defaults to the
+                  first member holding an object or array
+    :type field: str
+
+    :raises: :py:exc:`nano.rpc.RPCException`
+    :raises: :py:exc:`ValueError` for malformed JSON
+
+    >>> list(iter_entries([b'{"blocks": ["00', b'0D1", "E7"]}']))
+    ['000D1', 'E7']
+    """
+    reader = _Reader(chunks)
+    reader.expect('{')
+    if reader.peek() == '}':
+        return
+
+    streamed = False
+    while True:
+        key = reader.value()
+        reader.expect(':')
+        if key == 'error':
+            raise RPCException(reader.value())
+
+        if not streamed and reader.peek() in '{[' and (field is None or key == field):
+            streamed = True
+            for entry in reader.entries():
+                yield entry
+        else:
+            reader.value()
+
+        if reader.expect(',}') == '}':
+            return
+
+
+def stream_call(rpc, action, params=None, field=None, chunk_size=65536):
+    """
+    Makes an RPC call with **rpc** and yields the entries of the top level
+    collection of the response as they are received, see
+    :py:func:`iter_entries`
+
+    :param rpc: client to make the call with
+    :type rpc: :py:class:`nano.rpc.Client`
+
+    :param action: RPC method to call
+    :type action: str
+
+    :param params: Dict of arguments to send with RPC call
+    :type params: dict
+
+    :param field: name of the top level member to stream
+    :type field: str
+
+    :param chunk_size: number of bytes read from the socket at a time
+    :type chunk_size: int
+
+    :raises: :py:exc:`nano.rpc.RPCException`
+    :raises: :py:exc:`requests.exceptions.RequestException`
+
+    >>> for block in stream_call(rpc, 'delegators', {'account': representative}):
+    ...     print(block)
+    ('xrb_13bqhi1cdqq8yb9szneoc38qk899d58i5rcrgdk5mkdm86hekpoez3zxw5sd', '500000000000000000000000000000000000')
+    ('xrb_17k6ug685154an8gri9whhe5kb5z1mf5w6y39gokc1657sh95fegm8ht1zpn', '961647970820730000000000000000000000')
+    """
+    params = dict(params or {})
+    params['action'] = action
+
+    with rpc._stream(action, params) as resp:
+        for entry in iter_entries(resp.iter_content(chunk_size), field=field):
+            yield entry
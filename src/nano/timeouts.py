@@ -0,0 +1,213 @@
+"""
+Per action timeouts and deadlines
+
+A single timeout does not fit every action: `work_generate` legitimately
+takes seconds, `payment_wait` waits for as long as it is asked to and
+`version` answers in milliseconds. A :py:class:`TimeoutPolicy` attached to
+the client sets the timeout of each request from per action values and, in
+adaptive mode, tightens it to a multiple of a running latency percentile of
+the action so that stuck requests fail fast. Requests which time out count
+with their timeout as latency, so that the timeout widens again when the
+node gets slower.
+
+:py:func:`deadline` bounds the total time of everything done in a block,
+including several requests, retries and the pages of the iterators of
+:py:mod:`nano.iterators` which also accept a `deadline` argument. Requests
+get the remaining time as timeout and raise :py:exc:`DeadlineExceeded` once
+it has passed.
+
+>>> from nano.rpc import Client
+>>> from nano.timeouts import TimeoutPolicy, deadline
+>>> rpc = Client('http://localhost:7076', timeouts=TimeoutPolicy(adaptive=True))
+>>> with deadline(2.5):
+...     info = rpc.account_info(account)
+...     history = rpc.account_history(account, count=10)
+"""
+
+import contextlib
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import deque
+
+import requests
+
+#: Timeouts in seconds of actions that take longer than most
+DEFAULT_TIMEOUTS = {
+    'work_generate': 120,
+    'bootstrap_any': 30,
+    'delegators': 30,
+    'ledger': 30,
+    'search_pending_all': 30,
+    'unchecked': 30,
+    'wallet_export': 30,
+    'wallet_pending': 30,
+    'wallet_republish': 30,
+}
+
+_local = threading.local()
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """ Raised instead of sending a request once the deadline has passed """
+
+
+def current_deadline():
+    """
+    Returns the deadline of this thread as a timestamp, or None
+    """
+    return getattr(_local, 'deadline', None)
+
+
+def resolve_deadline(seconds):
+    """
+    Returns the timestamp **seconds** from now, or the current deadline if
+    it is earlier, None if there is no deadline at all
+    """
+    current = current_deadline()
+    if seconds is None:
+        return current
+    at = time.time() + seconds
+    return at if current is None else min(at, current)
+
+
+@contextlib.contextmanager
+def deadline(seconds=None, at=None):
+    """
+    Context manager bounding the requests made in the block by this thread
+    to **seconds** from now, or to timestamp **at**. Nested deadlines never
+    extend an enclosing one.
+
+    >>> with deadline(5):
+    ...     rpc.account_info(account)
+    """
+    previous = current_deadline()
+    if at is None and seconds is not None:
+        at = time.time() + seconds
+    if previous is not None and (at is None or previous < at):
+        at = previous
+    _local.deadline = at
+    try:
+        yield at
+    finally:
+        _local.deadline = previous
+
+
+def remaining(timeout):
+    """
+    Returns **timeout** shortened to the time left before the current
+    deadline
+
+    :raises: :py:exc:`DeadlineExceeded` if the deadline has passed
+    """
+    at = current_deadline()
+    if at is None:
+        return timeout
+    left = at - time.time()
+    if left <= 0:
+        raise DeadlineExceeded('Deadline exceeded')
+    return left if timeout is None else min(timeout, left)
+
+
+class _Latencies(object):
+    """ Sliding window of the latencies of one action """
+
+    def __init__(self, window):
+        self.window = deque(maxlen=window)
+        self.sorted = []
+
+    def add(self, seconds):
+        if len(self.window) == self.window.maxlen:
+            del self.sorted[bisect_left(self.sorted, self.window[0])]
+        self.window.append(seconds)
+        insort(self.sorted, seconds)
+
+    def percentile(self, fraction):
+        index = min(len(self.sorted) - 1, int(fraction * len(self.sorted)))
+        return self.sorted[index]
+
+
+class TimeoutPolicy(object):
+    """
+    Chooses the timeout of each request
+
+    :param timeouts: timeouts in seconds per action, defaults to
+                     :py:data:`DEFAULT_TIMEOUTS`, other actions use the
+                     timeout of the client
+    :type timeouts: dict
+
+    :param adaptive: if True, timeouts are lowered to **multiplier** times
+                     the **percentile** of the latencies observed for the
+                     action once **min_samples** were observed
+    :type adaptive: bool
+
+    :param percentile: latency percentile, between 0 and 1
+    :type percentile: float
+
+    :param multiplier: timeout as a multiple of the latency percentile
+    :type multiplier: float
+
+    :param min_timeout: adaptive timeouts never go below this
+    :type min_timeout: float
+
+    :param window: number of latest latencies kept per action
+    :type window: int
+
+    :param min_samples: latencies needed before adapting the timeout
+    :type min_samples: int
+    """
+
+    def __init__(
+        self,
+        timeouts=None,
+        adaptive=False,
+        percentile=0.99,
+        multiplier=3.0,
+        min_timeout=0.5,
+        window=1000,
+        min_samples=20,
+    ):
+        self.timeouts = DEFAULT_TIMEOUTS if timeouts is None else timeouts
+        self.adaptive = adaptive
+        self.percentile = percentile
+        self.multiplier = multiplier
+        self.min_timeout = min_timeout
+        self.window = window
+        self.min_samples = min_samples
+        self._latencies = {}
+        self._lock = threading.Lock()
+
+    def observe(self, action, seconds):
+        """
+        Records the latency of a request for **action**, requests which timed
+        out are recorded with their timeout as latency
+        """
+        if not self.adaptive:
+            return
+        with self._lock:
+            latencies = self._latencies.get(action)
+            if latencies is None:
+                latencies = self._latencies[action] = _Latencies(self.window)
+            latencies.add(seconds)
+
+    def timeout(self, action, params, default):
+        """
+        Returns the timeout of a request **params** for **action**,
+        **default** being the timeout of the client
+        """
+        timeout = self.timeouts.get(action, default)
+
+        if action == 'payment_wait' and timeout is not None:
+            # the node answers once the payment arrived or its timeout passed
+            return timeout + int(params.get('timeout', 0)) / 1000.0
+
+        if self.adaptive:
+            with self._lock:
+                latencies = self._latencies.get(action)
+                if latencies is not None and len(latencies.sorted) >= self.min_samples:
+                    adapted = max(
+                        self.min_timeout,
+                        latencies.percentile(self.percentile) * self.multiplier,
+                    )
+                    timeout = adapted if timeout is None else min(timeout, adapted)
+        return timeout
@@ -6,11 +6,72 @@ import pytest
 import requests
 import requests_mock
 
+from nano.rpc import RPCClient
+
 
 class MockRPCMatchException(Exception):
     """ Exception used to check if a mock response is missing """
 
 
+class FakeNode(object):
+    """
+    Programmable mock node for tests spanning several calls
+
+    Handlers are registered per action and are either a response dict or a
+    callable taking the request dict and returning the response dict
+    """
+
+    def __init__(self):
+        self.handlers = {}
+        self.requests = []
+
+    def __setitem__(self, action, handler):
+        self.handlers[action] = handler
+
+    def actions(self):
+        return [request['action'] for request in self.requests]
+
+    def _text_callback(self, request, context):
+        request_json = request.json()
+        self.requests.append(request_json)
+        handler = self.handlers.get(request_json['action'])
+        if handler is None:
+            raise MockRPCMatchException(
+                'No handler for this request: %s'
+                % json.dumps(request_json, sort_keys=True, indent=2)
+            )
+        if callable(handler):
+            handler = handler(request_json)
+        return json.dumps(handler)
+
+
+#: block_count response used by tests which only need some successful call
+BLOCK_COUNT = {'count': '1', 'unchecked': '0'}
+
+
+class FakeClock(object):
+    """
+    Clock for time dependent classes, advanced by setting :py:attr:`now` or
+    by sleeping
+    """
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def client(fake_node, **kwargs):
+    """
+    Returns a client of **fake_node** built with **kwargs**
+    """
+    return RPCClient(host='mock://localhost:7076', session=fake_node.session, **kwargs)
+
+
 def load_mock_rpc_tests():
     jsons_directory = os.path.join(
         os.path.dirname(os.path.realpath(__file__)), 'fixtures', 'rpc'
@@ -56,3 +117,20 @@ def mock_rpc_session():
     adapter.register_uri('POST', 'mock://localhost:7076/', text=_text_callback)
 
     return session
+
+
+@pytest.fixture
+def rpc(mock_rpc_session):
+    return RPCClient(host='mock://localhost:7076', session=mock_rpc_session)
+
+
+@pytest.fixture
+def fake_node():
+    node = FakeNode()
+    adapter = requests_mock.Adapter()
+    session = requests.Session()
+    session.mount('mock', adapter)
+    adapter.register_uri('POST', 'mock://localhost:7076/', text=node._text_callback)
+    node.session = session
+    node.rpc = client(node)
+    return node
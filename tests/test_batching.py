@@ -0,0 +1,320 @@
+import threading
+
+import pytest
+
+from conftest import client
+from nano.batching import Batcher
+from nano.identifiers import account_to_bytes
+from nano.iterators import key_to_account
+from nano.results import Balance
+from nano.rpc import RPCException
+from nano.scheduling import BULK, INTERACTIVE, current_priority, priority
+from nano.timeouts import current_deadline, deadline
+
+ACCOUNTS = ['xrb_account%d' % i for i in range(3)]
+
+
+@pytest.fixture
+def balances_node(fake_node):
+    def accounts_balances(request):
+        return {
+            'balances': dict(
+                (a, {'balance': a[-1], 'pending': '0'})
+                for a in request['accounts']
+                if a != 'xrb_missing'
+            )
+        }
+
+    def account_balance(request):
+        if request['account'] == 'xrb_missing':
+            return {'error': 'Bad account number'}
+        return {'balance': request['account'][-1], 'pending': '0'}
+
+    fake_node['accounts_balances'] = accounts_balances
+    fake_node['account_balance'] = account_balance
+    return fake_node
+
+
+def run_in_threads(func, args):
+    results = {}
+
+    def _run(arg):
+        try:
+            results[arg] = func(arg)
+        except Exception as e:
+            results[arg] = e
+
+    threads = [threading.Thread(target=_run, args=(arg,)) for arg in args]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class TestBatcher(object):
+    def test_concurrent_calls_share_a_batch(self, balances_node):
+        batcher = Batcher(balances_node.rpc, window=10, max_batch_size=3)
+        results = run_in_threads(batcher.account_balance, ACCOUNTS)
+        assert results == dict(
+            (a, {'balance': int(a[-1]), 'pending': 0}) for a in ACCOUNTS
+        )
+        assert balances_node.actions() == ['accounts_balances']
+        assert sorted(balances_node.requests[0]['accounts']) == ACCOUNTS
+
+    def test_window_dispatch(self, balances_node):
+        batcher = Batcher(balances_node.rpc, window=0.01)
+        futures = [batcher.submit('account_balance', a) for a in ACCOUNTS]
+        assert [f.result(timeout=5)['balance'] for f in futures] == [0, 1, 2]
+        assert balances_node.actions() == ['accounts_balances']
+
+    def test_duplicate_keys_are_fetched_once(self, balances_node):
+        batcher = Batcher(balances_node.rpc, window=10)
+        futures = [batcher.submit('account_balance', a) for a in ACCOUNTS * 2]
+        batcher.flush()
+        assert futures[0] is futures[3]
+        assert balances_node.requests[0]['accounts'] == ACCOUNTS
+
+    def test_single_item_uses_single_call(self, balances_node):
+        batcher = Batcher(balances_node.rpc, window=0)
+        assert batcher.account_balance(ACCOUNTS[1]) == {'balance': 1, 'pending': 0}
+        assert balances_node.actions() == ['account_balance']
+
+    def test_missing_entries_fall_back_to_single_calls(self, balances_node):
+        batcher = Batcher(balances_node.rpc, window=10)
+        good = batcher.submit('account_balance', ACCOUNTS[0])
+        bad = batcher.submit('account_balance', 'xrb_missing')
+        batcher.flush()
+        assert good.result() == {'balance': 0, 'pending': 0}
+        with pytest.raises(RPCException):
+            bad.result()
+        assert balances_node.actions() == ['accounts_balances', 'account_balance']
+
+    def test_failed_batch_falls_back_to_single_calls(self, fake_node):
+        fake_node['blocks'] = {'error': 'Block not found'}
+        fake_node['block'] = lambda request: (
+            {'error': 'Block not found'}
+            if request['hash'] == 'B'
+            else {'contents': '{"type": "open"}'}
+        )
+        batcher = Batcher(fake_node.rpc, window=10)
+        good = batcher.submit('block', 'A')
+        bad = batcher.submit('block', 'B')
+        batcher.flush()
+        assert good.result() == {'type': 'open'}
+        with pytest.raises(RPCException):
+            bad.result()
+        assert fake_node.actions() == ['blocks', 'block', 'block']
+
+    def test_failed_batch_is_bisected(self, fake_node):
+        hashes = ['H%d' % i for i in range(8)]
+
+        def blocks(request):
+            if 'H5' in request['hashes']:
+                return {'error': 'Block not found'}
+            return {'blocks': dict((h, '{}') for h in request['hashes'])}
+
+        fake_node['blocks'] = blocks
+        fake_node['block'] = lambda request: (
+            {'error': 'Block not found'}
+            if request['hash'] == 'H5'
+            else {'contents': '{"type": "open"}'}
+        )
+        batcher = Batcher(fake_node.rpc, window=10)
+        futures = [batcher.submit('block', h) for h in hashes]
+        batcher.flush()
+        with pytest.raises(RPCException):
+            futures[5].result()
+        assert futures[4].result() == {'type': 'open'}
+        assert [f.result() for f in futures[:4] + futures[6:]] == [{}] * 6
+        assert [len(r['hashes']) for r in fake_node.requests[:5]] == [8, 4, 4, 2, 2]
+        assert sorted(r['hash'] for r in fake_node.requests[5:]) == ['H4', 'H5']
+
+    def test_single_calls_run_concurrently(self, balances_node):
+        barrier = threading.Barrier(3, timeout=5)
+        balances_node['accounts_balances'] = {'balances': {}}
+
+        def account_balance(request):
+            barrier.wait()
+            return {'balance': request['account'][-1], 'pending': '0'}
+
+        balances_node['account_balance'] = account_balance
+        batcher = Batcher(balances_node.rpc, window=10, workers=3)
+        futures = [batcher.submit('account_balance', a) for a in ACCOUNTS]
+        batcher.flush()
+        assert [f.result()['balance'] for f in futures] == [0, 1, 2]
+
+    def test_single_calls_return_batch_entries(self, fake_node):
+        fake_node['accounts_balances'] = {
+            'balances': {'xrb_a': {'balance': '1', 'pending': '0'}}
+        }
+        fake_node['account_balance'] = {'balance': '2', 'pending': '0'}
+        fake_node['accounts_pending'] = {'blocks': {'xrb_a': ''}}
+        batcher = Batcher(client(fake_node, typed_results=True), window=10)
+        futures = [
+            batcher.submit('account_balance', 'xrb_a'),
+            batcher.submit('account_balance', 'xrb_b'),
+        ]
+        batcher.flush()
+        assert [type(f.result()) for f in futures] == [Balance, Balance]
+        assert futures[1].result() == {'balance': 2, 'pending': 0}
+        future = batcher.submit('pending', 'xrb_a')
+        batcher.flush()
+        assert future.result() == []
+
+    def test_transport_errors_fail_all_callers(self, balances_node):
+        batcher = Batcher(balances_node.rpc, window=10)
+        balances_node.handlers.clear()
+        futures = [batcher.submit('account_balance', a) for a in ACCOUNTS]
+        batcher.flush()
+        for future in futures:
+            with pytest.raises(Exception):
+                future.result()
+
+    def test_options_are_batched_separately(self, fake_node):
+        fake_node['accounts_pending'] = lambda request: {
+            'blocks': dict((a, ['H' + a[-1]]) for a in request['accounts'])
+        }
+        batcher = Batcher(fake_node.rpc, window=10)
+        a = batcher.submit('pending', ACCOUNTS[0], threshold=1)
+        b = batcher.submit('pending', ACCOUNTS[1], threshold=1)
+        c = batcher.submit('pending', ACCOUNTS[2], threshold=2)
+        c2 = batcher.submit('pending', ACCOUNTS[1], threshold=2)
+        batcher.flush()
+        assert [f.result() for f in (a, b, c, c2)] == [['H0'], ['H1'], ['H2'], ['H1']]
+        assert [r['threshold'] for r in fake_node.requests] == ['1', '2']
+
+    def test_methods(self, fake_node):
+        contents = '{"type": "open"}'
+        fake_node['accounts_frontiers'] = {'frontiers': {'xrb_a': 'F'}}
+        fake_node['account_info'] = {'frontier': 'F'}
+        fake_node['blocks'] = {'blocks': {'A': contents}}
+        fake_node['block'] = {'contents': contents}
+        fake_node['blocks_info'] = {
+            'blocks': {'A': {'amount': '1', 'contents': contents}}
+        }
+        fake_node['accounts_pending'] = {'blocks': {'xrb_a': ['A']}}
+        fake_node['pending'] = {'blocks': ['A']}
+
+        batcher = Batcher(fake_node.rpc, window=0)
+        assert batcher.account_frontier('xrb_a') == 'F'
+        assert batcher.block('A') == {'type': 'open'}
+        assert batcher.block_info('A', source=True) == {
+            'amount': 1,
+            'contents': {'type': 'open'},
+        }
+        assert batcher.pending('xrb_a') == ['A']
+
+        batcher = Batcher(fake_node.rpc, window=10)
+        futures = [
+            batcher.submit('account_frontier', 'xrb_a'),
+            batcher.submit('account_frontier', 'xrb_b'),
+        ]
+        batcher.flush()
+        assert [f.result() for f in futures] == ['F', 'F']
+        assert fake_node.actions()[-2:] == ['accounts_frontiers', 'account_info']
+
+    def test_asubmit(self, balances_node):
+        asyncio = pytest.importorskip('asyncio')
+        batcher = Batcher(balances_node.rpc, window=0.01)
+
+        loop = asyncio.new_event_loop()
+        try:
+            futures = [
+                batcher.asubmit('account_balance', a, loop=loop) for a in ACCOUNTS
+            ]
+            results = loop.run_until_complete(asyncio.gather(*futures))
+        finally:
+            loop.close()
+
+        assert [r['balance'] for r in results] == [0, 1, 2]
+        assert balances_node.actions() == ['accounts_balances']
+
+    def test_full_batch_does_not_block_the_caller(self, balances_node):
+        handler = balances_node.handlers['accounts_balances']
+        release = threading.Event()
+
+        def slow_batch(request):
+            release.wait(5)
+            return handler(request)
+
+        balances_node['accounts_balances'] = slow_batch
+        batcher = Batcher(balances_node.rpc, window=60, max_batch_size=2)
+        futures = [batcher.submit('account_balance', a) for a in ACCOUNTS[:2]]
+        assert not any(f.done() for f in futures)
+        release.set()
+        assert [f.result(5)['balance'] for f in futures] == [0, 1]
+        assert balances_node.actions() == ['accounts_balances']
+
+    def test_runs_until_the_last_deadline(self, balances_node):
+        handler = balances_node.handlers['accounts_balances']
+        seen = []
+
+        def record(request):
+            seen.append(current_deadline())
+            return handler(request)
+
+        balances_node['accounts_balances'] = record
+        batcher = Batcher(balances_node.rpc, window=10)
+        with deadline(5):
+            first = batcher.submit('account_balance', ACCOUNTS[0])
+        with deadline(10) as at:
+            second = batcher.submit('account_balance', ACCOUNTS[1])
+        threading.Thread(target=batcher.flush).start()
+        assert first.result(2) == {'balance': 0, 'pending': 0}
+        assert second.result(2) == {'balance': 1, 'pending': 0}
+
+        batcher.submit('account_balance', ACCOUNTS[0])
+        with deadline(10):
+            batcher.submit('account_balance', ACCOUNTS[1])
+        batcher.flush()
+        assert seen == [at, None]
+
+    def test_runs_with_the_most_urgent_priority(self, balances_node):
+        handler = balances_node.handlers['accounts_balances']
+        seen = []
+
+        def record(request):
+            seen.append(current_priority())
+            return handler(request)
+
+        balances_node['accounts_balances'] = record
+        batcher = Batcher(balances_node.rpc, window=10)
+        futures = []
+        for level, account in zip([BULK, INTERACTIVE, None], ACCOUNTS):
+            with priority(level):
+                futures.append(batcher.submit('account_balance', account))
+        threading.Thread(target=batcher.flush).start()
+        assert [f.result(2)['balance'] for f in futures] == [0, 1, 2]
+
+        batcher.submit('account_balance', ACCOUNTS[0])
+        batcher.submit('account_balance', ACCOUNTS[1])
+        batcher.flush()
+        assert seen == [INTERACTIVE, None]
+
+    def test_bytes_ids(self, fake_node):
+        accounts = [key_to_account(key) for key in range(3)]
+        block = '%064X' % 1
+        fake_node['accounts_balances'] = lambda request: {
+            'balances': dict(
+                (a, {'balance': '1', 'pending': '0'}) for a in request['accounts']
+            )
+        }
+        fake_node['blocks_info'] = {
+            'blocks': {block: {'amount': '1', 'contents': '{}'}}
+        }
+        rpc = client(fake_node, bytes_ids=True)
+
+        batcher = Batcher(rpc, window=10)
+        futures = [
+            batcher.submit('account_balance', accounts[0]),
+            batcher.submit('account_balance', account_to_bytes(accounts[1])),
+            batcher.submit('account_balance', accounts[2]),
+        ]
+        batcher.flush()
+        assert [f.result() for f in futures] == [{'balance': 1, 'pending': 0}] * 3
+        # a single item is requested with the single item call
+        future = batcher.submit('block_info', block)
+        batcher.flush()
+        assert future.result() == {'amount': 1, 'contents': {}}
+        assert fake_node.actions() == ['accounts_balances', 'blocks_info']
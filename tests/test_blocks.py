@@ -0,0 +1,74 @@
+import json
+
+import pytest
+
+from conftest import client
+from nano.blocks import EAGER, LAZY, RAW, LazyBlock, decode_block
+
+CONTENTS = {'type': 'open', 'account': 'xrb_a', 'representative': 'xrb_b'}
+RAW_CONTENTS = json.dumps(CONTENTS)
+
+
+@pytest.fixture
+def blocks_node(fake_node):
+    fake_node['block'] = {'contents': RAW_CONTENTS}
+    fake_node['blocks_info'] = {
+        'blocks': {'A': {'amount': '1', 'contents': RAW_CONTENTS}}
+    }
+    fake_node['process'] = lambda request: {'hash': str(request['block'])}
+    return fake_node
+
+
+class TestLazyBlock(object):
+    def test_mapping(self):
+        block = LazyBlock(RAW_CONTENTS)
+        assert block['type'] == 'open'
+        assert block.get('missing') is None
+        assert sorted(block) == sorted(CONTENTS)
+        assert len(block) == 3
+        assert dict(block) == CONTENTS
+        assert block == CONTENTS
+
+    def test_decoded_once_on_first_access(self, monkeypatch):
+        block = LazyBlock(RAW_CONTENTS)
+        calls = []
+        loads = json.loads
+        monkeypatch.setattr(
+            'nano.blocks.json.loads', lambda s: calls.append(s) or loads(s)
+        )
+        assert block.raw == RAW_CONTENTS
+        assert calls == []
+        block['type']
+        block['account']
+        assert calls == [RAW_CONTENTS]
+
+    def test_decode_block(self):
+        assert decode_block(RAW_CONTENTS) == CONTENTS
+        assert isinstance(decode_block(RAW_CONTENTS, LAZY), LazyBlock)
+        assert decode_block(RAW_CONTENTS, RAW) == RAW_CONTENTS
+        with pytest.raises(ValueError):
+            decode_block(RAW_CONTENTS, 'invalid')
+
+
+class TestBlockContentsModes(object):
+    @pytest.mark.parametrize('mode', [EAGER, LAZY])
+    def test_decoded(self, blocks_node, mode):
+        rpc = client(blocks_node, block_contents=mode)
+        assert rpc.block('A') == CONTENTS
+        info = rpc.blocks_info(['A'])
+        assert info['A']['amount'] == 1
+        assert info['A']['contents'] == CONTENTS
+
+    def test_lazy(self, blocks_node):
+        rpc = client(blocks_node, block_contents=LAZY)
+        assert isinstance(rpc.block('A'), LazyBlock)
+        assert isinstance(rpc.blocks_info(['A'])['A']['contents'], LazyBlock)
+
+    def test_raw(self, blocks_node):
+        rpc = client(blocks_node, block_contents=RAW)
+        assert rpc.block('A') == RAW_CONTENTS
+        assert rpc.blocks_info(['A'])['A']['contents'] == RAW_CONTENTS
+
+    def test_process_sends_lazy_block_unchanged(self, blocks_node):
+        rpc = client(blocks_node, block_contents=LAZY)
+        assert rpc.process(rpc.block('A')) == RAW_CONTENTS
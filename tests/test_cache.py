@@ -0,0 +1,350 @@
+import pytest
+
+from conftest import FakeClock, client
+from nano.cache import (
+    FOREVER,
+    FRONTIER,
+    FRONTIER_POLICIES,
+    NEVER,
+    DiskBackend,
+    MemoryBackend,
+    ResponseCache,
+)
+from nano.rpc import RPCClient
+
+BLOCK_HASH = '000D1BAEC8EC208142C99059B393051BAC8380F9B5A2E6B2489A277D81789F3F'
+
+
+@pytest.fixture
+def clock():
+    return FakeClock(1000.0)
+
+
+@pytest.fixture
+def cached_rpc(mock_rpc_session, clock):
+    return RPCClient(
+        host='mock://localhost:7076',
+        session=mock_rpc_session,
+        cache=ResponseCache(clock=clock),
+    )
+
+
+class TestMemoryBackend(object):
+    def test_get_set(self):
+        backend = MemoryBackend()
+        assert backend.get('a', now=0) is None
+        backend.set('a', b'1', expires_at=None)
+        assert backend.get('a', now=0) == b'1'
+        assert backend.size == 2
+
+    def test_expiry(self):
+        backend = MemoryBackend()
+        backend.set('a', b'1', expires_at=10)
+        assert backend.get('a', now=9) == b'1'
+        assert backend.get('a', now=10) is None
+        assert len(backend) == 0
+        assert backend.size == 0
+
+    def test_evicts_least_recently_used_by_count(self):
+        backend = MemoryBackend(max_entries=2)
+        backend.set('a', b'1', None)
+        backend.set('b', b'2', None)
+        backend.get('a', now=0)
+        backend.set('c', b'3', None)
+        assert backend.get('b', now=0) is None
+        assert backend.get('a', now=0) == b'1'
+        assert backend.get('c', now=0) == b'3'
+        assert backend.evictions == 1
+
+    def test_evicts_by_bytes(self):
+        backend = MemoryBackend(max_bytes=10)
+        backend.set('a', b'1234', None)
+        backend.set('b', b'1234', None)
+        assert len(backend) == 2
+        backend.set('c', b'1234', None)
+        assert len(backend) == 2
+        assert backend.size == 10
+        assert backend.get('a', now=0) is None
+
+    def test_skips_oversized_values(self):
+        backend = MemoryBackend(max_bytes=4)
+        backend.set('a', b'12345', None)
+        assert len(backend) == 0
+
+    def test_replace_and_delete(self):
+        backend = MemoryBackend()
+        backend.set('a', b'1', None)
+        backend.set('a', b'22', None)
+        assert backend.size == 3
+        backend.delete('a')
+        assert backend.size == 0
+        backend.set('a', b'1', None)
+        backend.clear()
+        assert len(backend) == 0
+
+
+class TestDiskBackend(object):
+    def test_get_set(self, tmpdir):
+        backend = DiskBackend(str(tmpdir.join('cache')))
+        assert backend.get('a', now=0) is None
+        backend.set('a', b'{"x": "\n"}', expires_at=None)
+        assert backend.get('a', now=0) == b'{"x": "\n"}'
+
+    def test_persists_across_instances(self, tmpdir):
+        DiskBackend(str(tmpdir)).set('a', b'1', expires_at=None)
+        assert DiskBackend(str(tmpdir)).get('a', now=0) == b'1'
+
+    def test_expiry(self, tmpdir):
+        backend = DiskBackend(str(tmpdir))
+        backend.set('a', b'1', expires_at=10.5)
+        assert backend.get('a', now=10) == b'1'
+        assert backend.get('a', now=11) is None
+        assert tmpdir.listdir() == []
+
+    def test_delete_and_clear(self, tmpdir):
+        backend = DiskBackend(str(tmpdir))
+        backend.set('a', b'1', None)
+        backend.set('b', b'2', None)
+        backend.delete('a')
+        backend.delete('a')
+        assert backend.get('a', now=0) is None
+        backend.clear()
+        assert backend.get('b', now=0) is None
+
+
+class TestResponseCache(object):
+    def test_policies(self):
+        cache = ResponseCache(policies={'block': NEVER, 'pending': 5})
+        assert cache.policy('block', {}) == NEVER
+        assert cache.policy('pending', {}) == 5
+        assert cache.policy('block_account', {}) == FOREVER
+        assert cache.policy('send', {}) == NEVER
+        assert cache.policy('blocks_info', {'pending': 'true'}) == NEVER
+        assert cache.policy('blocks_info', {'source': 'true'}) == FOREVER
+
+    def test_ttl(self, clock):
+        cache = ResponseCache(policies={'peers': 10}, clock=clock)
+        cache.set('peers', {'action': 'peers'}, b'{}')
+        clock.now += 9
+        assert cache.get('peers', {'action': 'peers'}) == b'{}'
+        clock.now += 1
+        assert cache.get('peers', {'action': 'peers'}) is None
+
+    def test_never_is_not_stored(self):
+        cache = ResponseCache()
+        cache.set('send', {'action': 'send'}, b'{}')
+        assert cache.get('send', {'action': 'send'}) is None
+        assert len(cache.backend) == 0
+        assert cache.stats()['misses'] == 0
+
+    def test_invalidate(self):
+        cache = ResponseCache()
+        cache.set('block', {'action': 'block'}, b'{}')
+        cache.invalidate('block', {'action': 'block'})
+        assert cache.get('block', {'action': 'block'}) is None
+
+    def test_key_ignores_param_order(self):
+        assert ResponseCache.key({'a': '1', 'b': '2'}) == ResponseCache.key(
+            {'b': '2', 'a': '1'}
+        )
+
+    def test_stats(self, cached_rpc):
+        cached_rpc.block_account(hash=BLOCK_HASH)
+        cached_rpc.block_account(hash=BLOCK_HASH)
+        cached_rpc.block_account(hash=BLOCK_HASH)
+        stats = cached_rpc.cache.stats()
+        assert stats['hits'] == 2
+        assert stats['misses'] == 1
+        assert stats['hit_rate'] == pytest.approx(2.0 / 3)
+        assert stats['actions']['block_account']['hits'] == 2
+
+        cached_rpc.cache.clear()
+        assert cached_rpc.cache.stats() == {
+            'hits': 0,
+            'misses': 0,
+            'hit_rate': 0.0,
+            'actions': {},
+        }
+
+
+class TestCachedClient(object):
+    def test_hit_skips_request(self, cached_rpc):
+        adapter = cached_rpc.session.adapter
+        first = cached_rpc.block_account(hash=BLOCK_HASH)
+        assert adapter.call_count == 1
+        assert cached_rpc.block_account(hash=BLOCK_HASH) == first
+        assert adapter.call_count == 1
+
+    def test_hit_returns_fresh_result(self, cached_rpc):
+        expected = {
+            'node_vendor': 'RaiBlocks 9.0',
+            'rpc_version': 1,
+            'store_version': 10,
+        }
+        assert cached_rpc.version() == expected
+        assert cached_rpc.version() == expected
+        assert cached_rpc.session.adapter.call_count == 1
+
+    def test_ttl_expiry_refetches(self, cached_rpc, clock):
+        cached_rpc.version()
+        clock.now += 61
+        cached_rpc.version()
+        assert cached_rpc.session.adapter.call_count == 2
+
+    def test_uncached_actions(self, cached_rpc):
+        cached_rpc.blocks_info(hashes=[BLOCK_HASH], pending=True, source=True)
+        cached_rpc.blocks_info(hashes=[BLOCK_HASH], pending=True, source=True)
+        assert cached_rpc.session.adapter.call_count == 2
+
+
+ACCOUNT_A = 'xrb_3t6k35gi95xu6tergt6p69ck76ogmitsa8mnijtpxm9fkcm736xtoncuohr3'
+ACCOUNT_B = 'xrb_3i1aq1cchnmbn9x5rsbap8b15akfh7wj7pwskuzi7ahz8oq6cobd99d4r3b7'
+
+
+@pytest.fixture
+def ledger_node(fake_node):
+    """
+    Fake node with two accounts whose frontiers/pending blocks can change
+    """
+    fake_node.frontiers = {ACCOUNT_A: 'A' * 64, ACCOUNT_B: 'B' * 64}
+    fake_node.pending = {ACCOUNT_A: [], ACCOUNT_B: []}
+
+    def account_info(request):
+        account = request['account']
+        return {
+            'frontier': fake_node.frontiers[account],
+            'balance': '1',
+            'modified_timestamp': '1',
+            'block_count': '1',
+        }
+
+    def accounts_frontiers(request):
+        return {
+            'frontiers': dict(
+                (a, fake_node.frontiers[a])
+                for a in request['accounts']
+                if a in fake_node.frontiers
+            )
+        }
+
+    def accounts_pending(request):
+        return {
+            'blocks': dict((a, fake_node.pending[a] or '') for a in request['accounts'])
+        }
+
+    fake_node['account_info'] = account_info
+    fake_node['account_representative'] = {'representative': ACCOUNT_A}
+    fake_node['account_balance'] = {'balance': '1', 'pending': '0'}
+    fake_node['accounts_frontiers'] = accounts_frontiers
+    fake_node['accounts_pending'] = accounts_pending
+    fake_node.rpc.cache = ResponseCache(policies=FRONTIER_POLICIES)
+    return fake_node
+
+
+class TestFrontierCache(object):
+    def test_policies(self):
+        cache = ResponseCache(policies=FRONTIER_POLICIES)
+        assert cache.policy('account_info', {}) == FRONTIER
+        assert cache.policy('account_info', {'weight': 'true'}) == NEVER
+        assert cache.policy('block', {}) == FOREVER
+
+    def test_unchanged_accounts_stay_cached(self, ledger_node):
+        rpc = ledger_node.rpc
+        rpc.account_info(account=ACCOUNT_A)
+        rpc.account_info(account=ACCOUNT_B)
+        assert rpc.cache.revalidate(rpc) == set()
+        rpc.account_info(account=ACCOUNT_A)
+        rpc.account_info(account=ACCOUNT_B)
+        assert ledger_node.actions() == [
+            'account_info',
+            'account_info',
+            'accounts_frontiers',
+        ]
+
+    def test_moved_frontier_is_refetched(self, ledger_node):
+        rpc = ledger_node.rpc
+        rpc.account_info(account=ACCOUNT_A)
+        rpc.account_info(account=ACCOUNT_B)
+        ledger_node.frontiers[ACCOUNT_A] = 'C' * 64
+        assert rpc.cache.revalidate(rpc) == set([ACCOUNT_A])
+        assert rpc.account_info(account=ACCOUNT_A)['frontier'] == 'C' * 64
+        rpc.account_info(account=ACCOUNT_B)
+        assert ledger_node.actions().count('account_info') == 3
+
+    def test_unknown_frontier_is_dropped_on_first_revalidate(self, ledger_node):
+        rpc = ledger_node.rpc
+        rpc.account_representative(account=ACCOUNT_A)
+        assert rpc.cache.revalidate(rpc) == set([ACCOUNT_A])
+        rpc.account_representative(account=ACCOUNT_A)
+        assert rpc.cache.revalidate(rpc) == set()
+        rpc.account_representative(account=ACCOUNT_A)
+        assert ledger_node.actions().count('account_representative') == 2
+
+    def test_tracked_against_state_before_request(self, ledger_node):
+        rpc = ledger_node.rpc
+        rpc.account_info(account=ACCOUNT_A)
+        rpc.cache.revalidate(rpc)
+
+        def representative_then_move(request):
+            ledger_node.frontiers[ACCOUNT_A] = 'C' * 64
+            rpc.cache.revalidate(rpc)
+            return {'representative': ACCOUNT_B}
+
+        ledger_node['account_representative'] = representative_then_move
+        assert rpc.account_representative(account=ACCOUNT_A) == ACCOUNT_B
+        ledger_node['account_representative'] = {'representative': ACCOUNT_A}
+        assert rpc.cache.revalidate(rpc) == set([ACCOUNT_A])
+        assert rpc.account_representative(account=ACCOUNT_A) == ACCOUNT_A
+
+    def test_new_pending_invalidates_pending_results(self, ledger_node):
+        rpc = ledger_node.rpc
+        rpc.account_info(account=ACCOUNT_A)
+        rpc.account_balance(account=ACCOUNT_A)
+        rpc.cache.revalidate(rpc)
+        rpc.account_balance(account=ACCOUNT_A)
+        assert rpc.cache.revalidate(rpc) == set()
+
+        ledger_node.pending[ACCOUNT_A] = ['D' * 64]
+        assert rpc.cache.revalidate(rpc) == set([ACCOUNT_A])
+        rpc.account_info(account=ACCOUNT_A)
+        rpc.account_balance(account=ACCOUNT_A)
+        assert ledger_node.actions().count('account_info') == 1
+        assert ledger_node.actions().count('account_balance') == 3
+
+    def test_bytes_ids(self, ledger_node):
+        rpc = client(
+            ledger_node,
+            cache=ResponseCache(policies=FRONTIER_POLICIES),
+            bytes_ids=True,
+        )
+        rpc.account_info(account=ACCOUNT_A)
+        rpc.account_balance(account=ACCOUNT_A)
+        rpc.cache.revalidate(rpc)
+        rpc.account_balance(account=ACCOUNT_A)
+        assert rpc.cache.revalidate(rpc) == set()
+
+        ledger_node.pending[ACCOUNT_A] = ['D' * 64]
+        assert rpc.cache.revalidate(rpc) == set([ACCOUNT_A])
+        ledger_node.frontiers[ACCOUNT_A] = 'C' * 64
+        assert rpc.cache.revalidate(rpc) == set([ACCOUNT_A])
+        assert ledger_node.actions().count('account_info') == 1
+
+    def test_batches(self, ledger_node):
+        rpc = ledger_node.rpc
+        rpc.account_info(account=ACCOUNT_A)
+        rpc.account_info(account=ACCOUNT_B)
+        rpc.cache.revalidate(rpc, batch_size=1)
+        assert ledger_node.actions().count('accounts_frontiers') == 2
+        rpc.cache.revalidate(rpc, accounts=[ACCOUNT_B, 'xrb_unknown'])
+        assert ledger_node.requests[-1]['accounts'] == [ACCOUNT_B]
+
+    def test_untracked_entries_are_not_served(self, ledger_node):
+        rpc = ledger_node.rpc
+        rpc.account_info(account=ACCOUNT_A)
+        rpc.cache.invalidate_account(ACCOUNT_A)
+        rpc.cache.invalidate_account(ACCOUNT_A)
+        rpc.account_info(account=ACCOUNT_A)
+        assert ledger_node.actions().count('account_info') == 2
+        rpc.cache.clear()
+        rpc.account_info(account=ACCOUNT_A)
+        assert ledger_node.actions().count('account_info') == 3
@@ -0,0 +1,201 @@
+import threading
+import time
+
+import pytest
+import requests
+
+from nano.chunking import Chunker
+from nano.scheduling import INTERACTIVE, current_priority, priority
+from nano.timeouts import DeadlineExceeded, current_deadline, deadline
+
+ACCOUNTS = ['xrb_%060d' % i for i in range(10)]
+HASHES = ['%064X' % i for i in range(10)]
+
+
+@pytest.fixture
+def node(fake_node):
+    def accounts_balances(request):
+        return {
+            'balances': dict(
+                (a, {'balance': str(int(a[4:])), 'pending': '0'})
+                for a in request['accounts']
+            )
+        }
+
+    def blocks_info(request):
+        return {
+            'blocks': dict(
+                (h, {'amount': '1', 'contents': '{}'}) for h in request['hashes']
+            )
+        }
+
+    fake_node['accounts_balances'] = accounts_balances
+    fake_node['blocks_info'] = blocks_info
+    fake_node['accounts_frontiers'] = lambda request: {
+        'frontiers': dict((a, 'F') for a in request['accounts'])
+    }
+    fake_node['accounts_pending'] = lambda request: {
+        'blocks': dict((a, ['P']) for a in request['accounts'])
+    }
+    fake_node['blocks'] = lambda request: {
+        'blocks': dict((h, '{}') for h in request['hashes'])
+    }
+    return fake_node
+
+
+def fixed_chunker(size, **kwargs):
+    return Chunker(
+        chunk_size=size, min_chunk_size=1, max_chunk_size=size, max_workers=2, **kwargs
+    )
+
+
+class TestChunker(object):
+    def test_small_calls_are_not_split(self, node):
+        node.rpc.chunker = fixed_chunker(10)
+        node.rpc.accounts_balances(accounts=ACCOUNTS)
+        assert node.actions() == ['accounts_balances']
+
+    def test_merge(self, node):
+        node.rpc.chunker = fixed_chunker(3)
+        balances = node.rpc.accounts_balances(accounts=ACCOUNTS)
+        assert balances == dict(
+            (a, {'balance': i, 'pending': 0}) for i, a in enumerate(ACCOUNTS)
+        )
+        assert sorted(len(r['accounts']) for r in node.requests) == [1, 3, 3, 3]
+
+    @pytest.mark.parametrize(
+        'method,argument,kwargs,expected',
+        [
+            ('accounts_frontiers', 'accounts', {}, 'F'),
+            ('accounts_pending', 'accounts', {'count': 1}, ['P']),
+            ('blocks', 'hashes', {}, {}),
+            (
+                'blocks_info',
+                'hashes',
+                {'source': True},
+                {'amount': 1, 'contents': {}},
+            ),
+        ],
+    )
+    def test_batch_methods(self, node, method, argument, kwargs, expected):
+        node.rpc.chunker = fixed_chunker(4)
+        items = ACCOUNTS if argument == 'accounts' else HASHES
+        kwargs[argument] = items
+        result = getattr(node.rpc, method)(**kwargs)
+        assert result == dict((item, expected) for item in items)
+        assert len(node.requests) == 3
+        assert all(r['action'] == method for r in node.requests)
+
+    def test_stream(self, node):
+        chunker = fixed_chunker(4)
+        chunks = list(chunker.stream(node.rpc.accounts_balances, ACCOUNTS))
+        assert [sorted(c) for c in chunks] == [
+            ACCOUNTS[0:4],
+            ACCOUNTS[4:8],
+            ACCOUNTS[8:10],
+        ]
+
+    def test_stream_unordered(self, node):
+        chunker = fixed_chunker(4)
+        chunks = chunker.stream(node.rpc.accounts_balances, ACCOUNTS, ordered=False)
+        assert sorted(len(c) for c in chunks) == [2, 4, 4]
+
+    def test_errors_propagate(self, node):
+        node['accounts_balances'] = {'error': 'Bad account number'}
+        node.rpc.chunker = fixed_chunker(4)
+        with pytest.raises(Exception):
+            node.rpc.accounts_balances(accounts=ACCOUNTS)
+
+    def test_timeouts_split_the_chunk(self, node):
+        handler = node.handlers['accounts_balances']
+        lock = threading.Lock()
+        large = []
+        both_sent = threading.Event()
+
+        def slow_for_large_chunks(request):
+            if len(request['accounts']) > 2:
+                # hold the first chunks until both were sent so that the
+                # shrinking chunk size does not change the second one
+                with lock:
+                    large.append(request)
+                    if len(large) == 2:
+                        both_sent.set()
+                both_sent.wait(1)
+                raise requests.exceptions.Timeout()
+            return handler(request)
+
+        node['accounts_balances'] = slow_for_large_chunks
+        chunker = fixed_chunker(5)
+        node.rpc.chunker = chunker
+        assert len(node.rpc.accounts_balances(accounts=ACCOUNTS)) == 10
+        sizes = sorted(len(r['accounts']) for r in node.requests)
+        assert sizes[-2:] == [5, 5]
+        assert sizes[:-2] == [1, 1, 2, 2, 2, 2, 3, 3]
+
+    def test_timeout_at_min_chunk_size_raises(self, node):
+        def timeout(request):
+            raise requests.exceptions.Timeout()
+
+        node['accounts_balances'] = timeout
+        node.rpc.chunker = fixed_chunker(2)
+        with pytest.raises(requests.exceptions.Timeout):
+            node.rpc.accounts_balances(accounts=ACCOUNTS)
+
+    def test_workers_run_with_the_deadline(self, node):
+        handler = node.handlers['accounts_balances']
+        seen = []
+
+        def record(request):
+            seen.append(current_deadline())
+            return handler(request)
+
+        node['accounts_balances'] = record
+        node.rpc.chunker = fixed_chunker(3)
+        with deadline(10) as at:
+            assert len(node.rpc.accounts_balances(accounts=ACCOUNTS)) == 10
+        assert seen == [at] * 4
+
+    def test_workers_run_with_the_priority(self, node):
+        handler = node.handlers['accounts_balances']
+        seen = []
+
+        def record(request):
+            seen.append(current_priority())
+            return handler(request)
+
+        node['accounts_balances'] = record
+        node.rpc.chunker = fixed_chunker(3)
+        with priority(INTERACTIVE):
+            node.rpc.accounts_balances(accounts=ACCOUNTS)
+        assert seen == [INTERACTIVE] * 4
+
+    def test_expired_deadline_does_not_split(self, node):
+        chunker = fixed_chunker(5)
+        node.rpc.chunker = chunker
+        with deadline(at=time.time() - 1):
+            with pytest.raises(DeadlineExceeded):
+                node.rpc.accounts_balances(accounts=ACCOUNTS)
+        assert node.requests == []
+        assert chunker.chunk_size == 5
+
+    def test_adapts_to_latency(self):
+        chunker = Chunker(chunk_size=1000, target_latency=1.0)
+        chunker._observe(count=1000, elapsed=4.0)  # 250 items per second
+        assert chunker.chunk_size == 625
+        chunker._observe(count=625, elapsed=2.5)
+        assert chunker.chunk_size == 437
+        chunker._observe(count=437, elapsed=0)
+        assert chunker.chunk_size == (437 + chunker.max_chunk_size) // 2
+
+    def test_size_limits(self):
+        chunker = Chunker(chunk_size=100, min_chunk_size=50, max_chunk_size=200)
+        chunker._observe(count=100, elapsed=100)
+        assert chunker.chunk_size == 50
+        chunker._observe(count=100, elapsed=0.001)
+        assert chunker.chunk_size == 200
+
+    def test_request_size_cap(self):
+        chunker = Chunker(chunk_size=1000, max_request_bytes=680)
+        assert chunker._size_for(ACCOUNTS) == 10
+        assert not chunker.should_split(ACCOUNTS)
+        assert chunker.should_split(ACCOUNTS + ACCOUNTS[:1])
@@ -0,0 +1,139 @@
+import json
+import random
+
+import pytest
+
+from conftest import client
+from nano import codec
+from nano.codec import ANY, COERCIONS, EACH, Codec, compile_coercion, orjson
+
+LOADERS = [json.loads]
+if orjson is not None:
+    LOADERS.append(orjson.loads)
+
+
+class TestCompileCoercion(object):
+    def test_paths(self):
+        coerce = compile_coercion([('a', ANY, 'b'), ('c', EACH), ('d',)])
+        result = coerce(
+            {
+                'a': {'x': {'b': '1', 'z': '2'}, 'y': {'b': '3'}},
+                'c': ['4', '5'],
+                'd': '6',
+                'e': '7',
+            }
+        )
+        assert result == {
+            'a': {'x': {'b': 1, 'z': '2'}, 'y': {'b': 3}},
+            'c': [4, 5],
+            'd': 6,
+            'e': '7',
+        }
+
+    def test_wildcards_match_their_type_only(self):
+        coerce = compile_coercion([('blocks', ANY)])
+        assert coerce({'blocks': ['A', 'B']}) == {'blocks': ['A', 'B']}
+        coerce = compile_coercion([('blocks', EACH)])
+        assert coerce({'blocks': {'A': '1'}}) == {'blocks': {'A': '1'}}
+
+    def test_missing_and_empty_values(self):
+        coerce = compile_coercion([('blocks', ANY, 'amount')])
+        assert coerce({}) == {}
+        assert coerce({'blocks': ''}) == {'blocks': ''}
+        assert coerce({'blocks': {'A': {}}}) == {'blocks': {'A': {}}}
+
+    @pytest.mark.parametrize(
+        'blocks,expected',
+        [
+            (['A'], ['A']),
+            ({'A': '1'}, {'A': 1}),
+            (
+                {'A': {'amount': '1', 'source': 'xrb_a'}},
+                {'A': {'amount': 1, 'source': 'xrb_a'}},
+            ),
+        ],
+    )
+    def test_pending_shapes(self, blocks, expected):
+        coerce = compile_coercion(COERCIONS['pending'])
+        assert coerce({'blocks': blocks}) == {'blocks': expected}
+
+
+class TestCodec(object):
+    @pytest.mark.parametrize('loads', LOADERS)
+    def test_decode(self, loads):
+        codec = Codec(loads=loads)
+        body = b'{"history": [{"hash": "A", "amount": "100"}]}'
+        assert codec.decode('account_history', body) == {
+            'history': [{'hash': 'A', 'amount': 100}]
+        }
+
+    def test_unknown_actions_are_not_coerced(self):
+        assert Codec().decode('block_account', b'{"account": "1"}') == {'account': '1'}
+
+    def test_big_numbers(self):
+        body = b'{"amount": 340282366920938463463374607431768211455}'
+        assert Codec().loads(body) == {'amount': 2**128 - 1}
+
+    def test_custom_coercions(self):
+        codec = Codec(coercions={'block_count': [('count',)]})
+        assert codec.decode('block_count', b'{"count": "5"}') == {'count': 5}
+        assert codec.decode('delegators', b'{"delegators": {"a": "1"}}') == {
+            'delegators': {'a': '1'}
+        }
+
+    def test_client_codec(self, fake_node):
+        decoded = []
+
+        def loads(body):
+            decoded.append(body)
+            return json.loads(body.decode('utf-8'))
+
+        fake_node['delegators'] = {'delegators': {'xrb_a': '10'}}
+        rpc = client(fake_node, codec=Codec(loads))
+        assert rpc.delegators('xrb_a') == {'xrb_a': 10}
+        assert len(decoded) == 1
+
+    @pytest.mark.parametrize(
+        'body',
+        [
+            b'%d' % (2**64),
+            b'{"a": [{"b": "1"}], "count": %d}' % (-(2**63) - 1),
+        ],
+    )
+    def test_big_top_level_numbers(self, body):
+        assert Codec().loads(body) == json.loads(body.decode('utf-8'))
+
+    def test_fields_of_array_items(self):
+        codec = Codec(coercions={'history': [('history', EACH, 'amount')]})
+        body = b'{"history": [{"amount": "1"}, "2", {"amount": ""}, {}]}'
+        assert codec.decode('history', body) == {
+            'history': [{'amount': 1}, '2', {'amount': ''}, {}]
+        }
+
+    def test_ledger_matches_converting_after_decoding(self):
+        accounts = {}
+        for index in range(1000):
+            accounts['xrb_%060d' % index] = {
+                'frontier': '%064X' % random.getrandbits(256),
+                'balance': str(random.getrandbits(120)),
+                'modified_timestamp': '1511476234',
+                'block_count': '12',
+                'pending': '0',
+            }
+        body = json.dumps({'accounts': accounts}).encode('utf-8')
+        expected = json.loads(body.decode('utf-8'))
+        for frontier in expected['accounts'].values():
+            for key in ('balance', 'modified_timestamp', 'block_count', 'pending'):
+                frontier[key] = int(frontier[key])
+        assert Codec().decode('ledger', body) == expected
+
+    @pytest.mark.skipif(orjson is None, reason='orjson is not installed')
+    def test_decodes_in_one_pass(self, monkeypatch):
+        def stdlib_loads(body):
+            raise AssertionError('decoded twice')
+
+        monkeypatch.setattr(codec, '_stdlib_loads', stdlib_loads)
+        body = b'{"accounts": {"xrb_1": {"balance": "1", "weight": [1, 2.5]}}}'
+        assert Codec().decode('ledger', body) == {
+            'accounts': {'xrb_1': {'balance': 1, 'weight': [1, 2.5]}}
+        }
@@ -0,0 +1,119 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from nano.columnar import (  # noqa: E402
+    BALANCES,
+    LEDGER,
+    WEIGHTS,
+    ColumnBuilder,
+    to_columns,
+    u128_sum,
+    u128_to_float,
+    u128_to_int,
+)
+
+ACCOUNTS = ['xrb_%060d' % i for i in range(5)]
+BIG = 2**100 + 12345
+
+
+def ledger_page():
+    return dict(
+        (
+            account,
+            {
+                'frontier': '%064X' % i,
+                'open_block': '%064X' % i,
+                'representative_block': '%064X' % i,
+                'balance': str(BIG * i),
+                'modified_timestamp': str(1500000000 + i),
+                'block_count': str(i + 1),
+            },
+        )
+        for i, account in enumerate(ACCOUNTS)
+    )
+
+
+class TestColumnBuilder(object):
+    def test_ledger(self):
+        columns = to_columns(LEDGER, sorted(ledger_page().items()))
+        assert sorted(columns) == [
+            'account',
+            'balance_hi',
+            'balance_lo',
+            'block_count',
+            'frontier',
+            'modified_timestamp',
+            'open_block',
+            'representative_block',
+        ]
+        assert columns['account'].dtype == np.dtype('S64')
+        assert columns['account'][1] == ACCOUNTS[1].encode('ascii')
+        assert columns['block_count'].dtype == np.int64
+        assert list(columns['block_count']) == [1, 2, 3, 4, 5]
+        assert columns['balance_hi'].dtype == np.uint64
+        assert list(u128_to_int(columns['balance_hi'], columns['balance_lo'])) == [
+            BIG * i for i in range(5)
+        ]
+
+    def test_optional_columns(self):
+        page = ledger_page()
+        for info in page.values():
+            info['representative'] = ACCOUNTS[0]
+            info['weight'] = '1'
+        columns = to_columns(LEDGER, page)
+        assert columns['representative'][0] == ACCOUNTS[0].encode('ascii')
+        assert list(columns['weight_lo']) == [1] * 5
+
+    @pytest.mark.parametrize('chunk_size', [1, 100])
+    def test_bytes_ids(self, chunk_size):
+        keys = [b'\x01' * 31 + b'\x00', b'\x00' * 32, b'\x02' * 32]
+        builder = ColumnBuilder(LEDGER, chunk_size=chunk_size)
+        builder.extend(
+            (key, {'frontier': key, 'representative': None, 'balance': '1'})
+            for key in keys
+        )
+        builder.append(keys[0], {'frontier': None, 'balance': '2'})
+        columns = builder.build()
+        assert columns['account'].dtype == np.dtype('V32')
+        assert [value.tobytes() for value in columns['account']] == keys + keys[:1]
+        assert [value.tobytes() for value in columns['frontier']] == keys + [
+            b'\x00' * 32
+        ]
+        assert columns['account'][0] == np.void(keys[0])
+        assert 'representative' not in columns
+
+    @pytest.mark.parametrize('chunk_size', [1, 2, 100])
+    def test_chunks(self, chunk_size):
+        builder = ColumnBuilder(WEIGHTS, chunk_size=chunk_size)
+        builder.extend((a, str(i)) for i, a in enumerate(ACCOUNTS))
+        builder.append(ACCOUNTS[0], 2**127)
+        assert len(builder) == 6
+        columns = builder.build()
+        assert list(columns['account'][:5]) == [a.encode('ascii') for a in ACCOUNTS]
+        assert list(columns['weight_lo']) == [0, 1, 2, 3, 4, 0]
+        assert list(columns['weight_hi']) == [0] * 5 + [2**63]
+
+    def test_balances(self, fake_node):
+        fake_node['accounts_balances'] = {
+            'balances': {ACCOUNTS[0]: {'balance': str(BIG), 'pending': '0'}}
+        }
+        columns = to_columns(BALANCES, fake_node.rpc.accounts_balances(ACCOUNTS[:1]))
+        assert u128_sum(columns['balance_hi'], columns['balance_lo']) == BIG
+        assert list(columns['pending_lo']) == [0]
+
+    def test_empty(self):
+        assert to_columns(WEIGHTS, {}) == {}
+
+
+class TestU128(object):
+    def test_sum_does_not_overflow(self):
+        amounts = [2**64 - 1] * 1000 + [2**120]
+        columns = to_columns(WEIGHTS, [(str(i), a) for i, a in enumerate(amounts)])
+        assert u128_sum(columns['weight_hi'], columns['weight_lo']) == sum(amounts)
+
+    def test_to_float(self):
+        columns = to_columns(WEIGHTS, [('a', BIG), ('b', 1)])
+        floats = u128_to_float(columns['weight_hi'], columns['weight_lo'])
+        assert floats[0] == pytest.approx(float(BIG))
+        assert floats[1] == 1.0
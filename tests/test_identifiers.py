@@ -0,0 +1,158 @@
+from binascii import unhexlify
+
+import pytest
+
+from conftest import client
+from nano.accounts import public_key_to_xrb_address
+from nano.identifiers import (
+    BytesIdentifiers,
+    account_to_bytes,
+    bytes_to_account,
+    bytes_to_hash,
+    hash_to_bytes,
+)
+
+KEY = unhexlify('C008B814A7D269A1FA3C6528B19201A24D797912DB9996FF02A1FF356E45552B')
+ACCOUNT = 'xrb_3i1aq1cchnmbn9x5rsbap8b15akfh7wj7pwskuzi7ahz8oq6cobd99d4r3b7'
+HASH = '000D1BAEC8EC208142C99059B393051BAC8380F9B5A2E6B2489A277D81789F3F'
+HASH_BYTES = unhexlify(HASH)
+KEY_HEX = 'C008B814A7D269A1FA3C6528B19201A24D797912DB9996FF02A1FF356E45552B'
+
+
+@pytest.fixture
+def bytes_rpc(fake_node):
+    fake_node.rpc = client(fake_node, bytes_ids=True)
+    return fake_node
+
+
+class TestConversions(object):
+    def test_accounts(self):
+        assert account_to_bytes(ACCOUNT) == KEY
+        assert account_to_bytes('nano_' + ACCOUNT[4:]) == KEY
+        assert bytes_to_account(KEY) == ACCOUNT
+
+    def test_hashes(self):
+        assert hash_to_bytes(HASH) == HASH_BYTES
+        assert bytes_to_hash(HASH_BYTES) == HASH
+
+    @pytest.mark.parametrize('value', ['0', '', 'Z' * 64])
+    def test_other_values_are_unchanged(self, value):
+        assert account_to_bytes(value) == value
+        assert hash_to_bytes(value) == value
+
+    def test_encode(self):
+        ids = BytesIdentifiers()
+        assert ids.encode(KEY, 'account') == ACCOUNT
+        assert ids.encode([KEY, ACCOUNT], 'accounts') == [ACCOUNT, ACCOUNT]
+        assert ids.encode(HASH_BYTES, 'block') == HASH
+        assert ids.encode(KEY, 'publickey') == bytes_to_hash(KEY)
+        assert ids.encode(KEY, 'wallet') == KEY
+        assert ids.encode(1, 'int') == 1
+
+    def test_decode_unknown_action(self):
+        assert BytesIdentifiers().decode('version', {'a': HASH}) == {'a': HASH}
+
+
+class TestBytesIdentifiersMode(object):
+    def test_accounts_balances(self, bytes_rpc):
+        bytes_rpc['accounts_balances'] = {
+            'balances': {ACCOUNT: {'balance': '1', 'pending': '0'}}
+        }
+        assert bytes_rpc.rpc.accounts_balances([KEY]) == {
+            KEY: {'balance': 1, 'pending': 0}
+        }
+        assert bytes_rpc.requests[0]['accounts'] == [ACCOUNT]
+
+    def test_blocks_info(self, bytes_rpc):
+        bytes_rpc['blocks_info'] = {
+            'blocks': {
+                HASH: {
+                    'block_account': ACCOUNT,
+                    'amount': '1',
+                    'contents': '{}',
+                    'source_account': '0',
+                }
+            }
+        }
+        assert bytes_rpc.rpc.blocks_info([HASH_BYTES]) == {
+            HASH_BYTES: {
+                'block_account': KEY,
+                'amount': 1,
+                'contents': {},
+                'source_account': '0',
+            }
+        }
+        assert bytes_rpc.requests[0]['hashes'] == [HASH]
+
+    @pytest.mark.parametrize(
+        'blocks,expected',
+        [
+            ([HASH], [HASH_BYTES]),
+            ({HASH: '5'}, {HASH_BYTES: 5}),
+            (
+                {HASH: {'amount': '5', 'source': ACCOUNT}},
+                {HASH_BYTES: {'amount': 5, 'source': KEY}},
+            ),
+        ],
+    )
+    def test_pending(self, bytes_rpc, blocks, expected):
+        bytes_rpc['pending'] = {'blocks': blocks}
+        assert bytes_rpc.rpc.pending(KEY) == expected
+        assert bytes_rpc.requests[0]['account'] == ACCOUNT
+
+    def test_accounts_pending(self, bytes_rpc):
+        bytes_rpc['accounts_pending'] = {'blocks': {ACCOUNT: [HASH]}}
+        assert bytes_rpc.rpc.accounts_pending([KEY]) == {KEY: [HASH_BYTES]}
+
+    def test_ledger(self, bytes_rpc):
+        bytes_rpc['ledger'] = {
+            'accounts': {
+                ACCOUNT: {
+                    'frontier': HASH,
+                    'representative': ACCOUNT,
+                    'balance': '7',
+                }
+            }
+        }
+        assert bytes_rpc.rpc.ledger(KEY, count=1, representative=True) == {
+            KEY: {'frontier': HASH_BYTES, 'representative': KEY, 'balance': 7}
+        }
+
+    def test_chain(self, bytes_rpc):
+        bytes_rpc['chain'] = {'blocks': [HASH]}
+        assert bytes_rpc.rpc.chain(HASH_BYTES, 1) == [HASH_BYTES]
+        assert bytes_rpc.requests[0]['block'] == HASH
+
+    def test_block_account(self, bytes_rpc):
+        bytes_rpc['block_account'] = {'account': ACCOUNT}
+        assert bytes_rpc.rpc.block_account(HASH_BYTES) == KEY
+
+    @pytest.mark.parametrize(
+        'method, args, response, expected',
+        [
+            ('account_key', (ACCOUNT,), {'key': KEY_HEX}, KEY),
+            ('account_get', (KEY,), {'account': ACCOUNT}, KEY),
+            ('account_representative', (ACCOUNT,), {'representative': ACCOUNT}, KEY),
+            ('account_list', (HASH,), {'accounts': [ACCOUNT]}, [KEY]),
+            ('send', (HASH, ACCOUNT, ACCOUNT, 1), {'block': HASH}, HASH_BYTES),
+            ('process', ('{}',), {'hash': HASH}, HASH_BYTES),
+            ('wallet_representative', (HASH,), {'representative': ACCOUNT}, KEY),
+            (
+                'key_expand',
+                (HASH,),
+                {'private': HASH, 'public': KEY_HEX, 'account': ACCOUNT},
+                {'private': HASH, 'public': KEY, 'account': KEY},
+            ),
+        ],
+    )
+    def test_single_identifiers(self, bytes_rpc, method, args, response, expected):
+        bytes_rpc[method] = response
+        assert getattr(bytes_rpc.rpc, method)(*args) == expected
+
+    def test_string_arguments_still_work(self, bytes_rpc):
+        bytes_rpc['block_account'] = {'account': ACCOUNT}
+        assert bytes_rpc.rpc.block_account(HASH) == KEY
+        assert bytes_rpc.requests[0]['hash'] == HASH
+
+    def test_checksum(self):
+        assert public_key_to_xrb_address(account_to_bytes(ACCOUNT)) == ACCOUNT
@@ -0,0 +1,363 @@
+import pytest
+import requests
+
+from conftest import client
+from nano.identifiers import account_to_bytes, hash_to_bytes
+from nano.iterators import (
+    MAX_ACCOUNT_KEY,
+    LedgerScanner,
+    account_to_key,
+    iter_account_history,
+    iter_chain,
+    iter_ledger,
+    key_to_account,
+)
+from nano.rpc import RPCException
+from nano.scheduling import INTERACTIVE, current_priority, priority
+from nano.timeouts import current_deadline, deadline
+
+KEYS = [0, 1, 7, 2**64, 2**128 + 5, 2**200, 2**255, MAX_ACCOUNT_KEY]
+ACCOUNTS = [key_to_account(key) for key in KEYS]
+
+
+def ledger_entry(account):
+    return {
+        'frontier': 'F' * 64,
+        'balance': str(account_to_key(account) % 1000),
+        'modified_timestamp': '1',
+        'block_count': '1',
+    }
+
+
+@pytest.fixture
+def ledger_node(fake_node):
+    def ledger(request):
+        start = account_to_key(request['account'])
+        accounts = [a for a in ACCOUNTS if account_to_key(a) >= start]
+        accounts = accounts[: int(request.get('count', len(accounts)))]
+        # the node does not guarantee the order of the json object
+        return {'accounts': dict((a, ledger_entry(a)) for a in reversed(accounts))}
+
+    fake_node['ledger'] = ledger
+    return fake_node
+
+
+class TestAccountKeys(object):
+    @pytest.mark.parametrize('key', KEYS)
+    def test_roundtrip(self, key):
+        assert account_to_key(key_to_account(key)) == key
+
+    def test_order(self):
+        assert sorted(ACCOUNTS, key=lambda a: a[-60:-8]) == ACCOUNTS
+
+
+class TestIterLedger(object):
+    @pytest.mark.parametrize('page_size', [1, 2, 3, 8, 100])
+    @pytest.mark.parametrize('prefetch', [True, False])
+    def test_walks_whole_ledger(self, ledger_node, page_size, prefetch):
+        result = list(
+            iter_ledger(ledger_node.rpc, page_size=page_size, prefetch=prefetch)
+        )
+        assert [account for account, _ in result] == ACCOUNTS
+        assert result[2][1]['balance'] == 7
+        # the last account has the max key so no empty page is requested
+        assert len(ledger_node.requests) == -(-len(ACCOUNTS) // page_size)
+
+    def test_options(self, ledger_node):
+        list(iter_ledger(ledger_node.rpc, page_size=100, pending=True, weight=True))
+        assert ledger_node.requests == [
+            {
+                'action': 'ledger',
+                'account': ACCOUNTS[0],
+                'count': '100',
+                'pending': 'true',
+                'weight': 'true',
+            }
+        ]
+
+    def test_start(self, ledger_node):
+        result = list(iter_ledger(ledger_node.rpc, start=key_to_account(8)))
+        assert [account for account, _ in result] == ACCOUNTS[3:]
+
+    @pytest.mark.parametrize('page_size', [1, 2, 100])
+    def test_end(self, ledger_node, page_size):
+        ledger = iter_ledger(
+            ledger_node.rpc, end=key_to_account(2**64), page_size=page_size
+        )
+        assert [account for account, _ in ledger] == ACCOUNTS[:3]
+        assert all(account_to_key(r['account']) < 2**64 for r in ledger_node.requests)
+
+    @pytest.mark.parametrize('page_size', [1, 3, 100])
+    def test_bytes_ids(self, ledger_node, page_size):
+        rpc = client(ledger_node, bytes_ids=True)
+        ledger = iter_ledger(rpc, end=key_to_account(2**200), page_size=page_size)
+        assert ledger.checkpoint == account_to_bytes(ACCOUNTS[0])
+        assert [account for account, _ in ledger] == [
+            account_to_bytes(account) for account in ACCOUNTS[:5]
+        ]
+        assert ledger.checkpoint is None
+
+    def test_checkpoint_resume(self, ledger_node):
+        ledger = iter_ledger(ledger_node.rpc, page_size=3)
+        assert ledger.checkpoint == ACCOUNTS[0]
+        seen = []
+        for account, _ in ledger:
+            seen.append(account)
+            if len(seen) == 4:
+                break
+
+        assert ledger.checkpoint == ACCOUNTS[3]
+        resumed = [a for a, _ in iter_ledger(ledger_node.rpc, start=ledger.checkpoint)]
+        assert seen[:3] + resumed == ACCOUNTS
+
+    def test_checkpoint_between_pages(self, ledger_node):
+        ledger = iter(iter_ledger(ledger_node.rpc, page_size=4, prefetch=False))
+        for _ in range(5):
+            next(ledger)
+        # page boundary cursor is right after the last account of the page
+        assert ledger_node.requests[1]['account'] == key_to_account(2**64 + 1)
+
+    def test_checkpoint_done(self, ledger_node):
+        ledger = iter_ledger(ledger_node.rpc, page_size=3)
+        list(ledger)
+        assert ledger.checkpoint is None
+
+    def test_retries_transport_errors(self, ledger_node, monkeypatch):
+        monkeypatch.setattr('time.sleep', lambda seconds: None)
+        handler = ledger_node.handlers['ledger']
+        failures = [requests.exceptions.ConnectionError()] * 2
+
+        def flaky(request):
+            if failures:
+                raise failures.pop()
+            return handler(request)
+
+        ledger_node['ledger'] = flaky
+        result = list(iter_ledger(ledger_node.rpc, page_size=3, retries=2))
+        assert len(result) == len(ACCOUNTS)
+
+    def test_gives_up_after_retries(self, ledger_node, monkeypatch):
+        monkeypatch.setattr('time.sleep', lambda seconds: None)
+
+        def down(request):
+            raise requests.exceptions.ConnectionError()
+
+        ledger_node['ledger'] = down
+        with pytest.raises(requests.exceptions.ConnectionError):
+            list(iter_ledger(ledger_node.rpc, retries=1))
+        assert len(ledger_node.requests) == 2
+
+
+class TestLedgerScanner(object):
+    def test_boundaries(self, ledger_node):
+        scanner = LedgerScanner(ledger_node.rpc, shards=4)
+        assert scanner.boundaries() == [
+            (0, 2**254),
+            (2**254, 2**255),
+            (2**255, 3 * 2**254),
+            (3 * 2**254, 2**256),
+        ]
+
+    @pytest.mark.parametrize('shards', [1, 2, 3, 8])
+    @pytest.mark.parametrize('page_size', [1, 2, 100])
+    def test_ordered_stream(self, ledger_node, shards, page_size):
+        scanner = LedgerScanner(ledger_node.rpc, shards=shards, page_size=page_size)
+        result = list(scanner.stream())
+        assert [account for account, _ in result] == ACCOUNTS
+        assert result[2][1]['balance'] == 7
+
+    def test_unordered_stream(self, ledger_node):
+        scanner = LedgerScanner(ledger_node.rpc, shards=4, page_size=2)
+        accounts = [account for account, _ in scanner.stream(ordered=False)]
+        assert sorted(accounts, key=lambda a: a[-60:-8]) == ACCOUNTS
+
+    def test_run(self, ledger_node):
+        seen = []
+        scanner = LedgerScanner(ledger_node.rpc, shards=4, pending=True)
+        assert scanner.run(lambda account, info: seen.append(account)) == 8
+        assert sorted(seen, key=lambda a: a[-60:-8]) == ACCOUNTS
+        assert all(r['pending'] == 'true' for r in ledger_node.requests)
+
+    def test_deadline_and_priority(self, ledger_node):
+        handler = ledger_node.handlers['ledger']
+        seen = set()
+
+        def record(request):
+            seen.add((current_deadline(), current_priority()))
+            return handler(request)
+
+        ledger_node['ledger'] = record
+        scanner = LedgerScanner(
+            ledger_node.rpc, shards=2, sample=True, samples_per_shard=2
+        )
+        with deadline(10) as at, priority(INTERACTIVE):
+            assert len(list(scanner)) == 8
+        assert len(ledger_node.requests) > 4
+        assert seen == set([(at, INTERACTIVE)])
+
+    def test_sampled_boundaries(self, ledger_node):
+        scanner = LedgerScanner(
+            ledger_node.rpc, shards=2, sample=True, samples_per_shard=2
+        )
+        boundaries = scanner.boundaries()
+        # most test accounts have small keys so the first range shrinks
+        assert boundaries[0][0] == 0
+        assert 2**200 < boundaries[0][1] < 2**255
+        assert boundaries[1][1] == 2**256
+        ledger_node.requests[:] = []
+        assert [account for account, _ in scanner] == ACCOUNTS
+
+    def test_errors_propagate(self, ledger_node):
+        ledger_node['ledger'] = {'error': 'Bad account number'}
+        with pytest.raises(RPCException):
+            list(LedgerScanner(ledger_node.rpc, shards=4).stream())
+
+    def test_close_stops_shards(self, ledger_node):
+        stream = LedgerScanner(
+            ledger_node.rpc, shards=2, page_size=1, queue_size=1
+        ).stream()
+        next(stream)
+        stream.close()
+
+
+HISTORY = ['%064X' % i for i in reversed(range(10))]
+
+
+@pytest.fixture
+def history_node(fake_node):
+    def account_history(request):
+        start = HISTORY.index(request['head']) if 'head' in request else 0
+        hashes = HISTORY[start : start + int(request['count'])]
+        return {
+            'history': [
+                {'hash': h, 'type': 'send', 'account': 'xrb_a', 'amount': '1'}
+                for h in hashes
+            ]
+        }
+
+    fake_node['account_history'] = account_history
+    return fake_node
+
+
+class TestIterAccountHistory(object):
+    @pytest.mark.parametrize('page_size', [1, 3, 5, 10, 100])
+    def test_walks_whole_history(self, history_node, page_size):
+        history = iter_account_history(history_node.rpc, 'xrb_a', page_size=page_size)
+        assert [entry['hash'] for entry in history] == HISTORY
+        assert len(history_node.requests) <= len(HISTORY) // page_size + 1
+
+    def test_pages_from_last_hash(self, history_node):
+        list(iter_account_history(history_node.rpc, 'xrb_a', page_size=4))
+        assert [(r.get('head'), r['count']) for r in history_node.requests] == [
+            (None, '4'),
+            (HISTORY[3], '5'),
+            (HISTORY[7], '5'),
+        ]
+
+    def test_until_hash(self, history_node):
+        history = iter_account_history(
+            history_node.rpc, 'xrb_a', page_size=2, until_hash=HISTORY[3]
+        )
+        assert [entry['hash'] for entry in history] == HISTORY[:3]
+        assert len(history_node.requests) == 2
+
+    def test_until_hash_bytes_ids(self, history_node):
+        rpc = client(history_node, bytes_ids=True)
+        history = iter_account_history(rpc, 'xrb_a', page_size=2, until_hash=HISTORY[3])
+        assert [entry['hash'] for entry in history] == [
+            hash_to_bytes(h) for h in HISTORY[:3]
+        ]
+        assert len(history_node.requests) == 2
+
+    def test_head(self, history_node):
+        history = iter_account_history(history_node.rpc, 'xrb_a', head=HISTORY[8])
+        entries = list(history)
+        assert [entry['hash'] for entry in entries] == HISTORY[8:]
+        assert entries[0]['amount'] == 1
+
+    def test_lazy(self, history_node):
+        history = iter_account_history(history_node.rpc, 'xrb_a', page_size=2)
+        assert next(history)['hash'] == HISTORY[0]
+        assert len(history_node.requests) == 1
+
+
+CHAIN = ['%064X' % i for i in range(10)]
+
+
+@pytest.fixture
+def chain_node(fake_node):
+    def walk(hashes):
+        def handler(request):
+            start = hashes.index(request['block'])
+            return {'blocks': hashes[start : start + int(request['count'])]}
+
+        return handler
+
+    def blocks_info(request):
+        return {
+            'blocks': dict(
+                (h, {'amount': str(int(h, 16)), 'contents': '{"type": "send"}'})
+                for h in request['hashes']
+            )
+        }
+
+    fake_node['chain'] = walk(list(reversed(CHAIN)))
+    fake_node['successors'] = walk(CHAIN)
+    fake_node['blocks_info'] = blocks_info
+    return fake_node
+
+
+class TestIterChain(object):
+    @pytest.mark.parametrize('page_size', [1, 3, 10, 100])
+    def test_backward(self, chain_node, page_size):
+        blocks = list(iter_chain(chain_node.rpc, CHAIN[-1], page_size=page_size))
+        assert [h for h, _ in blocks] == list(reversed(CHAIN))
+        assert blocks[0][1] == {'amount': 9, 'contents': {'type': 'send'}}
+
+    @pytest.mark.parametrize('prefetch', [1, 2, 5])
+    def test_forward(self, chain_node, prefetch):
+        blocks = iter_chain(
+            chain_node.rpc, CHAIN[2], forward=True, page_size=3, prefetch=prefetch
+        )
+        assert [h for h, _ in blocks] == CHAIN[2:]
+
+    def test_hashes_are_fetched_once(self, chain_node):
+        list(iter_chain(chain_node.rpc, CHAIN[0], forward=True, page_size=4))
+        requested = [
+            h
+            for r in chain_node.requests
+            if r['action'] == 'blocks_info'
+            for h in r['hashes']
+        ]
+        assert sorted(requested) == CHAIN
+        walks = [r for r in chain_node.requests if r['action'] == 'successors']
+        assert [(r['block'], r['count']) for r in walks] == [
+            (CHAIN[0], '4'),
+            (CHAIN[3], '5'),
+            (CHAIN[7], '5'),
+        ]
+
+    def test_options(self, chain_node):
+        list(iter_chain(chain_node.rpc, CHAIN[0], pending=True, source=True))
+        info = [r for r in chain_node.requests if r['action'] == 'blocks_info']
+        assert info == [
+            {
+                'action': 'blocks_info',
+                'hashes': [CHAIN[0]],
+                'pending': 'true',
+                'source': 'true',
+            }
+        ]
+
+    def test_errors_propagate(self, chain_node):
+        chain_node['blocks_info'] = {'error': 'Block not found'}
+        with pytest.raises(RPCException):
+            list(iter_chain(chain_node.rpc, CHAIN[-1]))
+
+    def test_backpressure(self, chain_node):
+        blocks = iter_chain(chain_node.rpc, CHAIN[-1], page_size=1, prefetch=1)
+        next(blocks)
+        walks = [r for r in chain_node.requests if r['action'] == 'chain']
+        # the first page, one queued page and one waiting for room
+        assert len(walks) <= 3
+        blocks.close()
@@ -0,0 +1,120 @@
+import threading
+import time
+
+import pytest
+
+from conftest import BLOCK_COUNT, FakeClock, client
+from nano.limits import ACTION_CLASSES, Limit, Limiter, TokenBucket
+from nano.metrics import Metrics
+from nano.timeouts import DeadlineExceeded, deadline
+
+
+class TestTokenBucket(object):
+    def test_burst_then_rate(self):
+        clock = FakeClock()
+        bucket = TokenBucket(2, burst=3, clock=clock, sleep=clock.sleep)
+        assert [bucket.acquire() for _ in range(3)] == [0, 0, 0]
+        assert bucket.acquire() == pytest.approx(0.5)
+        assert bucket.acquire() == pytest.approx(0.5)
+        assert clock.now == pytest.approx(1.0)
+
+    def test_refills_up_to_burst(self):
+        clock = FakeClock()
+        bucket = TokenBucket(1, clock=clock, sleep=clock.sleep)
+        assert bucket.burst == 1
+        bucket.acquire()
+        clock.now = 100
+        assert bucket.acquire() == 0
+        assert bucket.acquire() == pytest.approx(1.0)
+
+    def test_deadline(self):
+        clock = FakeClock()
+        bucket = TokenBucket(1, clock=clock, sleep=clock.sleep)
+        bucket.acquire()
+        with deadline(0.5):
+            with pytest.raises(DeadlineExceeded):
+                bucket.acquire()
+        assert clock.now == 0
+        assert bucket.tokens == 0
+        with deadline(at=time.time() - 1):
+            with pytest.raises(DeadlineExceeded):
+                bucket.acquire()
+        with deadline(2):
+            assert bucket.acquire() == pytest.approx(1.0)
+
+
+class TestLimiter(object):
+    def test_classes(self):
+        assert ACTION_CLASSES['work_generate'] == 'work'
+        assert ACTION_CLASSES['ledger'] == 'bulk'
+        work, node = Limit(max_in_flight=1), Limit(max_in_flight=2)
+        limiter = Limiter(limits={'work': work}, node=node)
+        assert limiter._limits('work_generate') == [work, node]
+        assert limiter._limits('version') == [node]
+
+    def test_max_in_flight(self, fake_node):
+        lock = threading.Lock()
+        state = {'in_flight': 0, 'max': 0}
+
+        def handler(request):
+            with lock:
+                state['in_flight'] += 1
+                state['max'] = max(state['max'], state['in_flight'])
+            time.sleep(0.02)
+            with lock:
+                state['in_flight'] -= 1
+            return BLOCK_COUNT
+
+        fake_node['block_count'] = handler
+        metrics = Metrics()
+        rpc = client(
+            fake_node,
+            limiter=Limiter(limits={'read': Limit(max_in_flight=2)}),
+            metrics=metrics,
+        )
+        threads = [threading.Thread(target=rpc.block_count) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(fake_node.requests) == 6
+        assert state['max'] <= 2
+        assert metrics.snapshot()['block_count']['wait'] > 0
+
+    def test_rate(self, fake_node):
+        clock = FakeClock()
+        fake_node['block_count'] = BLOCK_COUNT
+        metrics = Metrics()
+        limit = Limit(rate=10, burst=1, clock=clock, sleep=clock.sleep)
+        rpc = client(
+            fake_node,
+            limiter=Limiter(node=limit),
+            metrics=metrics,
+        )
+        for _ in range(3):
+            rpc.block_count()
+        assert clock.now == pytest.approx(0.2)
+        assert metrics.snapshot()['block_count']['wait'] == pytest.approx(0.2)
+
+    def test_releases_on_errors(self, fake_node):
+        limit = Limit(max_in_flight=1)
+        rpc = client(
+            fake_node,
+            limiter=Limiter(node=limit),
+        )
+        for _ in range(2):
+            with pytest.raises(Exception):
+                rpc.block_count()
+        assert limit.enter() == 0
+
+    def test_deadline_while_waiting(self, fake_node):
+        fake_node['block_count'] = BLOCK_COUNT
+        limit = Limit(max_in_flight=1)
+        rpc = client(fake_node, limiter=Limiter(node=limit))
+        limit.enter()
+        with deadline(0.05):
+            with pytest.raises(DeadlineExceeded):
+                rpc.block_count()
+        limit.exit()
+        assert rpc.block_count() == {'count': 1, 'unchecked': 0}
+        assert fake_node.actions() == ['block_count']
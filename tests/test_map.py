@@ -0,0 +1,121 @@
+import threading
+import time
+
+import pytest
+
+from conftest import client
+from nano.rpc import RPCException
+from nano.scheduling import BULK, Scheduler, priority
+from nano.timeouts import DeadlineExceeded, deadline
+
+ACCOUNTS = ['xrb_%060d' % i for i in range(20)]
+
+
+def representative_of(request):
+    if request['account'] == 'xrb_bad':
+        return {'error': 'Bad account number'}
+    return {'representative': request['account'][::-1]}
+
+
+@pytest.fixture
+def map_node(fake_node):
+    fake_node['account_representative'] = representative_of
+    return fake_node
+
+
+class TestCall(object):
+    def test_params_are_not_modified(self, fake_node):
+        fake_node['block_count'] = {'count': '1', 'unchecked': '0'}
+        params = {}
+        fake_node.rpc.call('block_count', params)
+        assert params == {}
+
+
+class TestMap(object):
+    def test_ordered(self, map_node):
+        kwargs_list = [{'account': account} for account in ACCOUNTS]
+        results = list(map_node.rpc.map('account_representative', kwargs_list))
+        assert results == [
+            ({'account': account}, account[::-1]) for account in ACCOUNTS
+        ]
+
+    def test_unordered(self, map_node):
+        results = map_node.rpc.map(
+            map_node.rpc.account_representative,
+            ({'account': account} for account in ACCOUNTS),
+            workers=4,
+            ordered=False,
+        )
+        assert sorted(results, key=lambda r: r[0]['account']) == [
+            ({'account': account}, account[::-1]) for account in ACCOUNTS
+        ]
+
+    def test_bounded_in_flight(self, fake_node):
+        lock = threading.Lock()
+        state = {'in_flight': 0, 'max': 0}
+
+        def handler(request):
+            with lock:
+                state['in_flight'] += 1
+                state['max'] = max(state['max'], state['in_flight'])
+            time.sleep(0.01)
+            with lock:
+                state['in_flight'] -= 1
+            return representative_of(request)
+
+        fake_node['account_representative'] = handler
+        consumed = []
+        for kwargs, _ in fake_node.rpc.map(
+            'account_representative',
+            ({'account': account} for account in ACCOUNTS),
+            workers=3,
+        ):
+            consumed.append(kwargs)
+            assert len(fake_node.requests) <= len(consumed) + 3
+        assert len(consumed) == len(ACCOUNTS)
+        assert state['max'] <= 3
+
+    def test_errors(self, map_node):
+        kwargs_list = [{'account': 'xrb_a'}, {'account': 'xrb_bad'}]
+        with pytest.raises(RPCException):
+            list(map_node.rpc.map('account_representative', kwargs_list))
+
+        results = list(
+            map_node.rpc.map(
+                'account_representative', kwargs_list, return_exceptions=True
+            )
+        )
+        assert results[0] == ({'account': 'xrb_a'}, 'a_brx')
+        assert isinstance(results[1][1], RPCException)
+
+    def test_propagates_deadline(self, map_node):
+        with deadline(at=time.time() - 1):
+            results = list(
+                map_node.rpc.map(
+                    'account_representative',
+                    [{'account': 'xrb_a'}],
+                    return_exceptions=True,
+                )
+            )
+        assert isinstance(results[0][1], DeadlineExceeded)
+        assert map_node.requests == []
+
+    def test_propagates_priority(self, map_node):
+        seen = []
+
+        class RecordingScheduler(Scheduler):
+            def priority(self, action):
+                level = super(RecordingScheduler, self).priority(action)
+                seen.append(level)
+                return level
+
+        rpc = client(
+            map_node,
+            scheduler=RecordingScheduler(),
+        )
+        with priority(BULK):
+            list(rpc.map('account_representative', [{'account': 'xrb_a'}] * 3))
+        assert seen == [BULK] * 3
+
+    def test_empty(self, map_node):
+        assert list(map_node.rpc.map('account_representative', [])) == []
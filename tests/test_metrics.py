@@ -0,0 +1,97 @@
+import pytest
+import requests
+
+from conftest import FakeClock, client
+from nano.metrics import Metrics
+from nano.rpc import RPCClient, RPCException
+
+
+@pytest.fixture
+def metrics_node(fake_node):
+    fake_node.metrics = Metrics()
+    fake_node.rpc = client(
+        fake_node,
+        metrics=fake_node.metrics,
+    )
+    return fake_node
+
+
+class TestMetrics(object):
+    def test_histogram(self):
+        clock = FakeClock()
+        metrics = Metrics(buckets=(0.1, 1.0), clock=clock)
+        for elapsed in (0.05, 0.1, 0.5, 3.0):
+            clock.now = 0.0
+            started = metrics.start('ledger')
+            clock.now = elapsed
+            metrics.finish('ledger', started, 10, 100)
+        snapshot = metrics.snapshot()['ledger']
+        assert snapshot['buckets'] == [(0.1, 2), (1.0, 3), ('+Inf', 4)]
+        assert snapshot['count'] == 4
+        assert snapshot['sum'] == pytest.approx(3.65)
+        assert snapshot['request_bytes'] == 40
+        assert snapshot['response_bytes'] == 400
+        assert snapshot['in_flight'] == 0
+
+    def test_in_flight_retries_errors(self):
+        metrics = Metrics()
+        metrics.start('send')
+        metrics.retry('send')
+        metrics.error('send', 'Bad wallet')
+        metrics.error('send', 'Bad wallet')
+        snapshot = metrics.snapshot()['send']
+        assert snapshot['in_flight'] == 1
+        assert snapshot['retries'] == 1
+        assert snapshot['errors'] == {'Bad wallet': 2}
+        metrics.reset()
+        assert metrics.snapshot() == {}
+
+    def test_prometheus(self):
+        metrics = Metrics(buckets=(1.0,), clock=FakeClock())
+        metrics.finish('version', metrics.start('version'), 21, 85)
+        metrics.error('version', 'Say "hi"')
+        text = metrics.prometheus()
+        assert '# TYPE nano_rpc_request_duration_seconds histogram' in text
+        assert (
+            'nano_rpc_request_duration_seconds_bucket{action="version",le="1.0"} 1'
+            in text
+        )
+        assert (
+            'nano_rpc_request_duration_seconds_bucket{action="version",le="+Inf"} 1'
+            in text
+        )
+        assert 'nano_rpc_request_duration_seconds_count{action="version"} 1' in text
+        assert 'nano_rpc_request_bytes_total{action="version"} 21' in text
+        assert 'nano_rpc_response_bytes_total{action="version"} 85' in text
+        assert 'nano_rpc_in_flight{action="version"} 0' in text
+        assert 'nano_rpc_errors_total{action="version",error="Say \\"hi\\""} 1' in text
+        assert text.endswith('\n')
+
+
+class TestClientMetrics(object):
+    def test_success(self, metrics_node):
+        metrics_node['block_count'] = {'count': '1', 'unchecked': '0'}
+        metrics_node.rpc.block_count()
+        metrics_node.rpc.block_count()
+        snapshot = metrics_node.metrics.snapshot()['block_count']
+        assert snapshot['count'] == 2
+        assert snapshot['request_bytes'] > 0
+        assert snapshot['response_bytes'] > 0
+        assert snapshot['in_flight'] == 0
+
+    def test_rpc_error(self, metrics_node):
+        metrics_node['block_count'] = {'error': 'Internal'}
+        with pytest.raises(RPCException):
+            metrics_node.rpc.block_count()
+        with pytest.raises(RPCException):
+            metrics_node.rpc.call('block_count', raw=True)
+        assert metrics_node.metrics.snapshot()['block_count']['errors'] == {
+            'Internal': 2
+        }
+
+    def test_transport_error(self, metrics_node):
+        with pytest.raises(requests.exceptions.ConnectionError):
+            RPCClient(host='http://127.0.0.1:1', metrics=metrics_node.metrics).version()
+        snapshot = metrics_node.metrics.snapshot()['version']
+        assert snapshot['errors'] == {'ConnectionError': 1}
+        assert snapshot['in_flight'] == 0
@@ -0,0 +1,139 @@
+import json
+
+import pytest
+
+from conftest import load_mock_rpc_tests
+from nano.offline import (
+    MAX_AMOUNT,
+    OFFLINE_ACTIONS,
+    OfflineActions,
+    OfflineMismatchError,
+)
+from nano.rpc import RPCClient, RPCException
+
+mock_rpc_tests = load_mock_rpc_tests()
+
+# the validate_account_number example of the node documentation uses a
+# placeholder account with an invalid checksum
+FIXTURES = [
+    (action, test)
+    for action in sorted(OFFLINE_ACTIONS)
+    if action != 'validate_account_number'
+    for test in mock_rpc_tests[action]
+]
+
+ACCOUNT = 'xrb_1e5aqegc1jb7qe964u4adzmcezyo6o146zb8hm6dft8tkp79za3sxwjym5rx'
+KEY = '3068BB1CA04525BB0E416C485FE6A67FD52540227D267CC8B6E8DA958A7FA039'
+
+
+@pytest.fixture
+def offline_node(fake_node):
+    fake_node.rpc.offline = OfflineActions()
+    return fake_node
+
+
+class TestOfflineActions(object):
+    @pytest.mark.parametrize('action, test', FIXTURES)
+    def test_answers_like_the_node(self, action, test):
+        assert OfflineActions().answer(action, test['request']) == test['response']
+
+    @pytest.mark.parametrize('action, test', FIXTURES)
+    def test_methods(self, offline_node, action, test):
+        method = getattr(offline_node.rpc, action)
+        assert method(**test['args']) == test['expected']
+        assert offline_node.requests == []
+
+    @pytest.mark.parametrize(
+        'action, params',
+        [
+            ('account_key', {'account': ACCOUNT[:-1] + 'z'}),
+            ('account_key', {'account': 'nano_' + ACCOUNT[4:]}),
+            ('account_key', {'account': 'xrb_4' + ACCOUNT[5:]}),
+            ('account_get', {'key': KEY[:-1]}),
+            ('account_get', {'key': KEY[:-1] + 'G'}),
+            ('key_expand', {'key': 1}),
+            ('deterministic_key', {'seed': KEY, 'index': str(2**32)}),
+            ('deterministic_key', {'seed': KEY, 'index': '-1'}),
+            ('validate_account_number', {'account': 'nano_' + ACCOUNT[4:]}),
+            ('mrai_from_raw', {'amount': '01'}),
+            ('mrai_from_raw', {'amount': '1.5'}),
+            ('mrai_from_raw', {'amount': ''}),
+            ('mrai_from_raw', {'amount': str(MAX_AMOUNT + 1)}),
+            ('mrai_to_raw', {'amount': str(MAX_AMOUNT)}),
+            ('rai_to_raw', {'amount': True}),
+        ],
+    )
+    def test_leaves_doubtful_requests_to_the_node(self, action, params):
+        assert OfflineActions().answer(action, params) is None
+
+    def test_validate_account_number(self):
+        answer = OfflineActions().answer
+        params = {'account': ACCOUNT[:-1] + 'z'}
+        assert answer('validate_account_number', params) == {'valid': '0'}
+        params = {'account': ACCOUNT}
+        assert answer('validate_account_number', params) == {'valid': '1'}
+
+    def test_conversions(self):
+        answer = OfflineActions().answer
+        assert answer(
+            'mrai_from_raw', {'amount': '1999999999999999999999999999999'}
+        ) == {'amount': '1'}
+        assert answer('krai_to_raw', {'amount': 3}) == {'amount': '3' + '0' * 27}
+        assert answer('rai_from_raw', {'amount': '0'}) == {'amount': '0'}
+        assert answer('mrai_to_raw', {'amount': '340282366'}) == {
+            'amount': '340282366' + '0' * 30
+        }
+
+    def test_actions(self):
+        offline = OfflineActions(actions=['account_get'])
+        assert offline.answer('account_get', {'key': KEY}) == {'account': ACCOUNT}
+        assert offline.answer('account_key', {'account': ACCOUNT}) is None
+        assert offline.answer('version', {}) is None
+
+
+class TestClient(object):
+    def test_error_from_node(self, offline_node):
+        offline_node['account_key'] = {'error': 'Bad account number'}
+        with pytest.raises(RPCException):
+            offline_node.rpc.account_key('nano_' + ACCOUNT[4:])
+        assert offline_node.actions() == ['account_key']
+
+    def test_raw(self, offline_node):
+        body = offline_node.rpc.call('account_get', {'key': KEY}, raw=True)
+        assert json.loads(body.decode('utf-8')) == {'account': ACCOUNT}
+        assert offline_node.rpc.raw.account_get(KEY) == body
+        assert offline_node.requests == []
+
+    def test_skips_cache(self, offline_node):
+        class Cache(object):
+            def get(self, action, params):
+                raise AssertionError('cache used')
+
+        offline_node.rpc.cache = Cache()
+        assert offline_node.rpc.account_get(KEY) == ACCOUNT
+
+    def test_verify(self, mock_rpc_session):
+        rpc = RPCClient(
+            host='mock://localhost:7076',
+            session=mock_rpc_session,
+            offline=OfflineActions(verify=True),
+        )
+        assert rpc.account_key(ACCOUNT) == KEY
+        assert rpc.mrai_to_raw(1) == 10**30
+
+    def test_verify_mismatch(self, fake_node):
+        fake_node['account_get'] = {'account': ACCOUNT[:-1] + 'z'}
+        fake_node.rpc.offline = OfflineActions(verify=True)
+        with pytest.raises(OfflineMismatchError) as exc_info:
+            fake_node.rpc.account_get(KEY)
+        assert exc_info.value.offline == {'account': ACCOUNT}
+        assert exc_info.value.node == {'account': ACCOUNT[:-1] + 'z'}
+        assert KEY not in str(exc_info.value)
+
+    def test_verify_sample(self, fake_node):
+        fake_node['account_get'] = {'account': ACCOUNT}
+        draws = iter([0.5, 0.05, 0.2])
+        fake_node.rpc.offline = OfflineActions(verify=0.1, random=lambda: next(draws))
+        for _ in range(3):
+            assert fake_node.rpc.account_get(KEY) == ACCOUNT
+        assert fake_node.actions() == ['account_get']
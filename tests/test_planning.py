@@ -0,0 +1,261 @@
+import pytest
+
+from conftest import client
+from nano.chunking import Chunker
+from nano.identifiers import account_to_bytes
+from nano.iterators import MAX_ACCOUNT_KEY, account_to_key, key_to_account
+from nano.planning import Planner
+
+WALLET = '000D1BAEC8EC208142C99059B393051BAC8380F9B5A2E6B2489A277D81789F3F'
+ACCOUNTS = [key_to_account(i * (MAX_ACCOUNT_KEY // 200)) for i in range(200)]
+OPENED = ACCOUNTS[::2]
+UNOPENED = key_to_account(5)
+
+
+def balance(account):
+    return account_to_key(account) % 1000
+
+
+def pending(account):
+    return account_to_key(account) % 7 + 1
+
+
+def representative(account):
+    return ACCOUNTS[-1] if account in OPENED else None
+
+
+@pytest.fixture
+def node(fake_node):
+    def ledger(request):
+        start = account_to_key(request['account'])
+        accounts = [a for a in OPENED if account_to_key(a) >= start]
+        accounts = accounts[: int(request['count'])]
+        entries = {}
+        for account in accounts:
+            entries[account] = {
+                'frontier': account[-64:].upper(),
+                'balance': str(balance(account)),
+                'modified_timestamp': '1',
+                'block_count': '1',
+            }
+            if request.get('pending') == 'true':
+                entries[account]['pending'] = str(pending(account))
+            if request.get('representative') == 'true':
+                entries[account]['representative'] = representative(account)
+        return {'accounts': entries}
+
+    def accounts_balances(request):
+        return {
+            'balances': dict(
+                (
+                    account,
+                    {
+                        'balance': str(balance(account) if account in OPENED else 0),
+                        'pending': str(pending(account)),
+                    },
+                )
+                for account in request['accounts']
+            )
+        }
+
+    def accounts_frontiers(request):
+        return {
+            'frontiers': dict(
+                (account, account[-64:].upper())
+                for account in request['accounts']
+                if account in OPENED
+            )
+        }
+
+    def account_representative(request):
+        if request['account'] not in OPENED:
+            return {'error': 'Account not found'}
+        return {'representative': representative(request['account'])}
+
+    fake_node['ledger'] = ledger
+    fake_node['frontier_count'] = {'count': str(len(OPENED))}
+    fake_node['accounts_balances'] = accounts_balances
+    fake_node['accounts_frontiers'] = accounts_frontiers
+    fake_node['account_representative'] = account_representative
+    fake_node['account_list'] = {'accounts': ACCOUNTS[:10]}
+    fake_node['wallet_balances'] = accounts_balances({'accounts': ACCOUNTS[:10]})
+    fake_node['wallet_pending'] = {'blocks': {ACCOUNTS[0]: ['A' * 64], ACCOUNTS[1]: ''}}
+    fake_node.planner = Planner(fake_node.rpc, page_size=50)
+    return fake_node
+
+
+def expected_balances(accounts):
+    return dict(
+        (
+            account,
+            {
+                'balance': balance(account) if account in OPENED else 0,
+                'pending': pending(account),
+            },
+        )
+        for account in accounts
+    )
+
+
+class TestPlan(object):
+    def test_few_accounts_use_batch(self, node):
+        accounts = [ACCOUNTS[0], ACCOUNTS[150], ACCOUNTS[151]]
+        plan = node.planner.plan('balances', accounts)
+        assert (plan.strategy, plan.action) == ('batch', 'accounts_balances')
+        assert [p.strategy for p in plan.candidates] == ['batch', 'ledger']
+        assert plan.requests == 1
+        assert plan.items == 3
+
+    def test_many_accounts_scan_ledger(self, node):
+        plan = node.planner.plan('balances', ACCOUNTS[:150])
+        assert plan.strategy == 'ledger'
+        assert plan.params['start'] == ACCOUNTS[0]
+        assert plan.params['end'] == key_to_account(account_to_key(ACCOUNTS[149]) + 1)
+        assert plan.items == 100
+        assert plan.requests == 2
+
+    def test_wallet(self, node):
+        node['frontier_count'] = {'count': '100000'}
+        plan = node.planner.plan('balances', ACCOUNTS[:10:3], wallet=WALLET)
+        assert plan.strategy == 'batch'
+        plan = node.planner.plan('balances', ACCOUNTS[:10], wallet=WALLET)
+        assert (plan.strategy, plan.action) == ('wallet', 'wallet_balances')
+        assert plan.params['wallet'] == WALLET
+
+        plan = node.planner.plan('balances', ACCOUNTS[5:15], wallet=WALLET)
+        assert 'wallet' not in [p.strategy for p in plan.candidates]
+        assert node.actions().count('account_list') == 1
+
+    def test_chunked_batch(self, node):
+        node['frontier_count'] = {'count': '100000'}
+        node.rpc.chunker = Chunker(chunk_size=10, min_chunk_size=10)
+        plan = node.planner.plan('balances', ACCOUNTS[:10], wallet=WALLET)
+        assert plan.strategy == 'wallet'
+        assert plan.candidates[1].requests == 1
+        plan = node.planner.plan('frontiers', ACCOUNTS[:30])
+        assert [p.requests for p in plan.candidates if p.strategy == 'batch'] == [3]
+
+    def test_bytes_ids_do_not_scan(self, node):
+        node.rpc.identifiers = object()
+        plan = node.planner.plan('balances', ACCOUNTS)
+        assert plan.candidates == [plan]
+        assert plan.strategy == 'batch'
+
+    def test_duplicates(self, node):
+        plan = node.planner.plan('frontiers', ACCOUNTS[:3] * 2)
+        assert plan.params['accounts'] == ACCOUNTS[:3]
+
+    def test_unknown_query(self, node):
+        with pytest.raises(ValueError):
+            node.planner.plan('weights', ACCOUNTS)
+
+    def test_caches_and_reset(self, node):
+        node.planner.plan('balances', ACCOUNTS, wallet=WALLET)
+        node.planner.plan('balances', ACCOUNTS, wallet=WALLET)
+        assert node.actions() == ['account_list', 'frontier_count']
+        node.planner.reset()
+        node.planner.plan('balances', ACCOUNTS, wallet=WALLET)
+        assert node.actions().count('frontier_count') == 2
+
+    def test_explain(self, node):
+        plan = node.planner.plan('balances', ACCOUNTS[:150])
+        assert repr(plan) == (
+            "Plan(query='balances', strategy='ledger', action='ledger', "
+            "requests=2, items=100, cost=2.3)"
+        )
+        assert plan.explain() == '\n'.join(
+            [
+                'balances of 150 accounts',
+                '* ledger   ledger              requests=2      items=100     '
+                'cost=2.3',
+                '  batch    accounts_balances   requests=1      items=150     '
+                'cost=2.5',
+            ]
+        )
+
+
+class TestQueries(object):
+    @pytest.mark.parametrize('accounts', [ACCOUNTS[:3], ACCOUNTS[:150]])
+    def test_balances(self, node, accounts):
+        assert node.planner.balances(accounts + [UNOPENED]) == expected_balances(
+            accounts + [UNOPENED]
+        )
+
+    def test_balances_strategies(self, node):
+        node.planner.balances(ACCOUNTS[:150])
+        assert node.planner.last_plan.strategy == 'ledger'
+        ledger = [r for r in node.requests if r['action'] == 'ledger']
+        assert ledger[-1]['pending'] == 'true'
+
+        node['frontier_count'] = {'count': '100000'}
+        node.planner.reset()
+        node.planner.balances(ACCOUNTS[:10], wallet=WALLET)
+        assert node.planner.last_plan.strategy == 'wallet'
+
+    def test_balances_of_unopened_accounts_in_scan(self, node):
+        accounts = ACCOUNTS[:150] + [UNOPENED]
+        assert node.planner.balances(accounts) == expected_balances(accounts)
+        assert node.planner.last_plan.strategy == 'ledger'
+        assert node.requests[-1] == {
+            'action': 'accounts_balances',
+            'accounts': ACCOUNTS[1:150:2] + [UNOPENED],
+        }
+
+    def test_bytes_ids(self, node):
+        planner = Planner(client(node, bytes_ids=True), page_size=50)
+        accounts = ACCOUNTS[:3] + [UNOPENED]
+        assert planner.balances(accounts) == expected_balances(accounts)
+        assert planner.last_plan.strategy == 'batch'
+        keys = [account_to_bytes(account) for account in accounts]
+        assert planner.balances(keys) == dict(
+            zip(keys, expected_balances(accounts).values())
+        )
+        assert list(planner.frontiers(accounts[:2])) == [ACCOUNTS[0]]
+
+        node['frontier_count'] = {'count': '100000'}
+        assert planner.balances(ACCOUNTS[:10], wallet=WALLET) == expected_balances(
+            ACCOUNTS[:10]
+        )
+        assert planner.last_plan.strategy == 'wallet'
+
+    def test_balances_typed(self, node):
+        node.rpc.typed_results = True
+        assert node.planner.balances(ACCOUNTS[:3]) == expected_balances(ACCOUNTS[:3])
+
+    @pytest.mark.parametrize('accounts', [ACCOUNTS[:3], ACCOUNTS[:150]])
+    def test_frontiers(self, node, accounts):
+        assert node.planner.frontiers(accounts) == dict(
+            (account, account[-64:].upper())
+            for account in accounts
+            if account in OPENED
+        )
+
+    @pytest.mark.parametrize(
+        'accounts, count, strategy',
+        [(ACCOUNTS[::70], 100000, 'each'), (ACCOUNTS[:150], 100, 'ledger')],
+    )
+    def test_representatives(self, node, accounts, count, strategy):
+        node['frontier_count'] = {'count': str(count)}
+        assert node.planner.representatives(accounts) == dict(
+            (account, representative(account))
+            for account in accounts
+            if account in OPENED
+        )
+        assert node.planner.last_plan.strategy == strategy
+
+    def test_pending(self, node):
+        expected = dict((account, []) for account in ACCOUNTS[:10])
+        expected[ACCOUNTS[0]] = ['A' * 64]
+        assert node.planner.pending(ACCOUNTS[:10], wallet=WALLET, count=1) == expected
+        assert node.requests[-1] == {
+            'action': 'wallet_pending',
+            'wallet': WALLET,
+            'count': '1',
+        }
+
+        node['accounts_pending'] = {'blocks': {ACCOUNTS[0]: {'A' * 64: '1'}}}
+        assert node.planner.pending(ACCOUNTS[:2], wallet=WALLET, threshold=1) == {
+            ACCOUNTS[0]: {'A' * 64: 1},
+            ACCOUNTS[1]: {},
+        }
+        assert node.planner.last_plan.strategy == 'batch'
@@ -0,0 +1,153 @@
+import itertools
+import threading
+
+import pytest
+import requests
+
+from conftest import BLOCK_COUNT, client
+from nano.cache import MemoryBackend, ResponseCache
+from nano.limits import Limit, Limiter
+from nano.profiling import PHASES, Profiler
+from nano.retry import RetryPolicy
+from nano.rpc import RPCException
+
+
+def failing_once(response):
+    failures = [requests.exceptions.ConnectTimeout('node restarting')]
+
+    def handler(request):
+        if failures:
+            raise failures.pop()
+        return response
+
+    return handler
+
+
+def ticking_clock():
+    counter = itertools.count()
+    return lambda: float(next(counter))
+
+
+class TestProfile(object):
+    def test_phases(self, fake_node):
+        fake_node['block_count'] = BLOCK_COUNT
+        with fake_node.rpc.profile(Profiler(clock=ticking_clock())) as profiler:
+            assert fake_node.rpc.block_count() == {'count': 1, 'unchecked': 0}
+        assert profiler.snapshot() == {
+            'block_count': {
+                'calls': 1,
+                'total': 5.0,
+                'phases': {
+                    'build': 1.0,
+                    'cache': 0.0,
+                    'wait': 0.0,
+                    'encode': 1.0,
+                    'network': 1.0,
+                    'decode': 1.0,
+                    'process': 1.0,
+                },
+            }
+        }
+
+    def test_wait(self, fake_node):
+        fake_node['block_count'] = failing_once(BLOCK_COUNT)
+        rpc = client(
+            fake_node,
+            limiter=Limiter(node=Limit(max_in_flight=1)),
+            retry=RetryPolicy(sleep=lambda s: None),
+        )
+        with rpc.profile(Profiler(clock=ticking_clock())) as profiler:
+            assert rpc.block_count() == {'count': 1, 'unchecked': 0}
+        assert profiler.snapshot()['block_count']['phases'] == {
+            'build': 1.0,
+            'cache': 0.0,
+            'wait': 3.0,
+            'encode': 2.0,
+            'network': 2.0,
+            'decode': 1.0,
+            'process': 1.0,
+        }
+
+    def test_cache_hit(self, fake_node):
+        fake_node['version'] = {
+            'rpc_version': '1',
+            'store_version': '2',
+            'node_vendor': 'RaiBlocks 9.0',
+        }
+        rpc = client(
+            fake_node,
+            cache=ResponseCache(MemoryBackend()),
+        )
+        rpc.version()
+        with rpc.profile(Profiler(clock=ticking_clock())) as profiler:
+            rpc.version()
+        phases = profiler.snapshot()['version']['phases']
+        assert phases['cache'] == 1.0
+        assert phases['network'] == 0.0
+
+    def test_stops_profiling(self, fake_node):
+        fake_node['block_count'] = BLOCK_COUNT
+        with fake_node.rpc.profile() as profiler:
+            fake_node.rpc.block_count()
+        fake_node.rpc.block_count()
+        assert profiler.snapshot()['block_count']['calls'] == 1
+        assert fake_node.rpc.profiler is None
+        assert 'block_count' not in vars(fake_node.rpc)
+
+    def test_errors_are_profiled(self, fake_node):
+        fake_node['block_count'] = {'error': 'Internal'}
+        with fake_node.rpc.profile() as profiler:
+            with pytest.raises(RPCException):
+                fake_node.rpc.block_count()
+        assert profiler.snapshot()['block_count']['calls'] == 1
+
+    def test_threads(self, fake_node):
+        fake_node['block_count'] = BLOCK_COUNT
+        with fake_node.rpc.profile() as profiler:
+            threads = [
+                threading.Thread(target=fake_node.rpc.block_count) for _ in range(4)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        assert profiler.snapshot()['block_count']['calls'] == 4
+
+    def test_report(self, fake_node):
+        fake_node['block_count'] = BLOCK_COUNT
+        with fake_node.rpc.profile(Profiler(clock=ticking_clock())) as profiler:
+            fake_node.rpc.block_count()
+        header, row = profiler.report().splitlines()
+        assert header.split() == ['action', 'calls', 'total', 'ms'] + list(PHASES)
+        assert row.split() == [
+            'block_count',
+            '1',
+            '5000.0',
+            '20.0%',
+            '0.0%',
+            '0.0%',
+            '20.0%',
+            '20.0%',
+            '20.0%',
+            '20.0%',
+        ]
+
+
+class TestSampling(object):
+    @pytest.mark.parametrize('sample_rate,calls', [(0, None), (1, 3)])
+    def test_sample_rate(self, fake_node, sample_rate, calls):
+        fake_node['block_count'] = BLOCK_COUNT
+        rpc = client(
+            fake_node,
+            profiler=Profiler(sample_rate=sample_rate),
+        )
+        for _ in range(3):
+            rpc.block_count()
+        assert rpc.profiler.snapshot().get('block_count', {}).get('calls') == calls
+
+    def test_reset(self):
+        profiler = Profiler()
+        profiler.wrap('version', lambda: None)()
+        assert 'version' in profiler.snapshot()
+        profiler.reset()
+        assert profiler.snapshot() == {}
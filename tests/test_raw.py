@@ -0,0 +1,88 @@
+import json
+
+import pytest
+
+from conftest import client
+from nano.cache import MemoryBackend, ResponseCache
+from nano.rpc import RPCException
+
+ACCOUNT = 'xrb_3e3j5tkog48pnny9dmfzj1r16pg8t1e76dz5tmac6iq689wyjfpi00000000'
+BALANCES = {'balances': {ACCOUNT: {'balance': '10000', 'pending': '0'}}}
+VERSION = {'rpc_version': '1', 'store_version': '2', 'node_vendor': 'RaiBlocks 9.0'}
+
+
+class TestRawCall(object):
+    def test_returns_body(self, fake_node):
+        fake_node['accounts_balances'] = BALANCES
+        body = fake_node.rpc.call(
+            'accounts_balances', {'accounts': [ACCOUNT]}, raw=True
+        )
+        assert isinstance(body, bytes)
+        assert json.loads(body.decode('utf-8')) == BALANCES
+
+    def test_error(self, fake_node):
+        fake_node['version'] = {'error': 'Unknown command'}
+        with pytest.raises(RPCException):
+            fake_node.rpc.call('version', raw=True)
+
+    def test_error_unchecked(self, fake_node):
+        fake_node['version'] = {'error': 'Unknown command'}
+        body = fake_node.rpc.call('version', raw=True, check_errors=False)
+        assert json.loads(body.decode('utf-8')) == {'error': 'Unknown command'}
+
+    def test_error_unchecked_is_not_cached(self, fake_node):
+        block = '000D1BAEC8EC208142C99059B393051BAC8380F9B5A2E6B2489A277D81789F3F'
+        rpc = client(
+            fake_node,
+            cache=ResponseCache(MemoryBackend()),
+        )
+        fake_node['block'] = {'error': 'Block not found'}
+        rpc.call('block', {'hash': block}, raw=True, check_errors=False)
+        fake_node['block'] = {'contents': '{"type": "open"}'}
+        assert rpc.block(block) == {'type': 'open'}
+        assert rpc.block(block) == {'type': 'open'}
+        assert fake_node.actions() == ['block', 'block']
+
+    def test_error_key_inside_values_is_not_decoded(self, fake_node):
+        fake_node['version'] = {'node_vendor': '"error"'}
+        assert fake_node.rpc.call('version', raw=True)
+
+    def test_cached(self, fake_node):
+        fake_node['version'] = VERSION
+        rpc = client(
+            fake_node,
+            cache=ResponseCache(MemoryBackend()),
+        )
+        rpc.version()
+        body = rpc.call('version', raw=True)
+        assert json.loads(body.decode('utf-8')) == VERSION
+        assert rpc.raw.version() == body
+        assert fake_node.actions() == ['version']
+
+
+class TestRawMethods(object):
+    def test_skips_post_processing(self, fake_node):
+        fake_node['accounts_balances'] = BALANCES
+        body = fake_node.rpc.raw.accounts_balances([ACCOUNT])
+        assert json.loads(body.decode('utf-8')) == BALANCES
+        assert fake_node.rpc.accounts_balances([ACCOUNT]) == {
+            ACCOUNT: {'balance': 10000, 'pending': 0}
+        }
+
+    def test_error(self, fake_node):
+        fake_node['block_count'] = {'error': 'Internal'}
+        with pytest.raises(RPCException):
+            fake_node.rpc.raw.block_count()
+        fake_node['block_count'] = {'count': '1', 'unchecked': '0'}
+        assert fake_node.rpc.block_count() == {'count': 1, 'unchecked': 0}
+
+    def test_not_chunked(self, fake_node):
+        fake_node['accounts_balances'] = BALANCES
+        rpc = client(fake_node, chunker=object())
+        assert rpc.raw.accounts_balances([ACCOUNT] * 3)
+        assert fake_node.actions() == ['accounts_balances']
+
+    @pytest.mark.parametrize('name', ['call', '_chunked', 'host'])
+    def test_invalid(self, fake_node, name):
+        with pytest.raises(AttributeError):
+            getattr(fake_node.rpc.raw, name)
@@ -0,0 +1,97 @@
+import pytest
+
+from conftest import client
+from nano.profiling import Profiler
+from nano.replay import (
+    Recorder,
+    ReplayError,
+    load_recording,
+    replay_session,
+)
+from nano.rpc import RPCClient, RPCException
+from nano.streaming import stream_call
+
+ACCOUNT = 'xrb_3e3j5tkog48pnny9dmfzj1r16pg8t1e76dz5tmac6iq689wyjfpi00000000'
+
+
+@pytest.fixture
+def recording(fake_node, tmpdir):
+    path = str(tmpdir.join('traffic.jsonl'))
+    counts = iter(range(1, 100))
+    fake_node['block_count'] = lambda request: {
+        'count': str(next(counts)),
+        'unchecked': '0',
+    }
+    fake_node['accounts_balances'] = {
+        'balances': {ACCOUNT: {'balance': '10', 'pending': '0'}}
+    }
+    fake_node['version'] = {'error': 'Internal'}
+    recorder = Recorder(path)
+    rpc = client(fake_node, recorder=recorder)
+    rpc.block_count()
+    rpc.block_count()
+    rpc.accounts_balances([ACCOUNT])
+    with pytest.raises(RPCException):
+        rpc.version()
+    recorder.close()
+    return path
+
+
+class TestRecorder(object):
+    def test_entries(self, recording):
+        entries = load_recording(recording)
+        assert [entry['request']['action'] for entry in entries] == [
+            'block_count',
+            'block_count',
+            'accounts_balances',
+            'version',
+        ]
+        assert entries[2]['request']['accounts'] == [ACCOUNT]
+        assert '"balance": "10"' in entries[2]['response']
+        assert all(entry['elapsed'] >= 0 for entry in entries)
+
+    def test_appends(self, recording, fake_node):
+        recorder = Recorder(recording)
+        client(fake_node, recorder=recorder).accounts_balances([ACCOUNT])
+        recorder.close()
+        assert len(load_recording(recording)) == 5
+
+
+class TestReplay(object):
+    def test_replay(self, recording):
+        rpc = RPCClient(session=replay_session(recording, speed=None))
+        assert rpc.accounts_balances([ACCOUNT]) == {
+            ACCOUNT: {'balance': 10, 'pending': 0}
+        }
+        counts = [rpc.block_count()['count'] for _ in range(3)]
+        assert counts == [1, 2, 1]
+        with pytest.raises(RPCException):
+            rpc.version()
+
+    def test_profiled(self, recording):
+        rpc = RPCClient(session=replay_session(recording, speed=None))
+        with rpc.profile(Profiler()) as profiler:
+            assert rpc.block_count()['count'] == 1
+        assert profiler.snapshot()['block_count']['calls'] == 1
+
+    def test_missing(self, recording):
+        rpc = RPCClient(session=replay_session(recording, speed=None))
+        with pytest.raises(ReplayError):
+            rpc.accounts_balances(['xrb_other'])
+
+    @pytest.mark.parametrize('speed,expected', [(1, 0.5), (2, 0.25), (None, None)])
+    def test_speed(self, speed, expected):
+        sleeps = []
+        entries = [{'request': {'action': 'version'}, 'response': '{}', 'elapsed': 0.5}]
+        rpc = RPCClient(
+            session=replay_session(entries, speed=speed, sleep=sleeps.append)
+        )
+        rpc.call('version')
+        assert sleeps == ([expected] if expected else [])
+
+    def test_streaming(self, recording):
+        rpc = RPCClient(session=replay_session(recording, speed=None))
+        entries = list(
+            stream_call(rpc, 'accounts_balances', {'accounts': [ACCOUNT]}, chunk_size=4)
+        )
+        assert entries == [(ACCOUNT, {'balance': '10', 'pending': '0'})]
@@ -0,0 +1,103 @@
+import pickle
+
+import pytest
+
+from conftest import client
+from nano.results import (
+    Balance,
+    BlockInfo,
+    HistoryEntry,
+    LedgerEntry,
+    PendingEntry,
+    to_records,
+)
+
+ENTRY = {'hash': 'A', 'type': 'send', 'account': 'xrb_a', 'amount': 1}
+
+
+@pytest.fixture
+def typed_node(fake_node):
+    fake_node['account_history'] = {'history': [dict(ENTRY, amount='1')]}
+    fake_node['history'] = {'history': [dict(ENTRY, amount='1')]}
+    fake_node['ledger'] = {
+        'accounts': {'xrb_a': {'frontier': 'F', 'balance': '5', 'block_count': '2'}}
+    }
+    fake_node['blocks_info'] = {
+        'blocks': {'A': {'block_account': 'xrb_a', 'amount': '1', 'contents': '{}'}}
+    }
+    fake_node['pending'] = {
+        'blocks': {'A': {'amount': '1', 'source': 'xrb_b'}, 'B': '2'}
+    }
+    fake_node['accounts_balances'] = {
+        'balances': {'xrb_a': {'balance': '1', 'pending': '0'}}
+    }
+    return fake_node
+
+
+CALLS = [
+    ('account_history', {'account': 'xrb_a', 'count': 1}, HistoryEntry),
+    ('history', {'hash': 'A', 'count': 1}, HistoryEntry),
+    ('ledger', {'account': 'xrb_a', 'count': 1}, LedgerEntry),
+    ('blocks_info', {'hashes': ['A']}, BlockInfo),
+    ('pending', {'account': 'xrb_a', 'source': True}, PendingEntry),
+    ('accounts_balances', {'accounts': ['xrb_a']}, Balance),
+]
+
+
+class TestRecord(object):
+    def test_fields(self):
+        entry = HistoryEntry.from_dict(ENTRY)
+        assert entry.hash == 'A'
+        assert entry.amount == 1
+        assert entry['type'] == 'send'
+        assert not hasattr(entry, '__dict__')
+
+    def test_missing_fields(self):
+        entry = LedgerEntry(frontier='F', balance=0)
+        assert entry.weight is None
+        assert 'weight' not in entry
+        assert entry.get('weight', 1) == 1
+        with pytest.raises(KeyError):
+            entry['weight']
+        assert entry.to_dict() == {'frontier': 'F', 'balance': 0}
+
+    def test_extra_fields(self):
+        entry = HistoryEntry.from_dict(dict(ENTRY, height='7'))
+        assert entry['height'] == '7'
+        assert entry.to_dict() == dict(ENTRY, height='7')
+
+    def test_equality(self):
+        entry = HistoryEntry.from_dict(ENTRY)
+        assert entry == ENTRY
+        assert ENTRY == entry
+        assert entry == HistoryEntry.from_dict(ENTRY)
+        assert entry != dict(ENTRY, amount=2)
+        assert entry != LedgerEntry()
+        assert entry != 'A'
+
+    def test_repr(self):
+        assert repr(Balance(balance=1, pending=0)) == 'Balance(balance=1, pending=0)'
+
+    def test_pickle(self):
+        entry = HistoryEntry.from_dict(dict(ENTRY, height='7'))
+        assert pickle.loads(pickle.dumps(entry)) == entry
+
+    def test_to_records(self):
+        entries = {'A': {'balance': 1}, 'B': 2}
+        assert to_records(Balance, entries) is entries
+        assert isinstance(entries['A'], Balance)
+        assert entries['B'] == 2
+        assert isinstance(to_records(Balance, [{'balance': 1}])[0], Balance)
+
+
+class TestTypedResults(object):
+    @pytest.mark.parametrize('method,kwargs,cls', CALLS)
+    def test_typed_results(self, typed_node, method, kwargs, cls):
+        typed = client(typed_node, typed_results=True)
+        plain = typed_node.rpc
+        result = getattr(typed, method)(**kwargs)
+        expected = getattr(plain, method)(**kwargs)
+        assert result == expected
+        entries = result if isinstance(result, list) else list(result.values())
+        assert any(isinstance(entry, cls) for entry in entries)
+        assert not any(isinstance(entry, dict) for entry in entries)
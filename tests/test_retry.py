@@ -0,0 +1,151 @@
+import pytest
+import requests
+
+from conftest import BLOCK_COUNT, FakeClock, client
+from nano.metrics import Metrics
+from nano.retry import CircuitBreaker, CircuitOpenError, RetryPolicy
+from nano.rpc import RPCException
+
+SEND_ARGS = dict(
+    wallet='000D1BAEC8EC208142C99059B393051BAC8380F9B5A2E6B2489A277D81789F3F',
+    source='xrb_3e3j5tkog48pnny9dmfzj1r16pg8t1e76dz5tmac6iq689wyjfpi00000000',
+    destination='xrb_3e3j5tkog48pnny9dmfzj1r16pg8t1e76dz5tmac6iq689wyjfpi00000000',
+    amount=1000000,
+)
+
+
+def failing(failures, response, error=requests.exceptions.ReadTimeout):
+    remaining = [failures]
+
+    def handler(request):
+        if remaining[0]:
+            remaining[0] -= 1
+            raise error('node restarting')
+        return response
+
+    return handler
+
+
+class TestRetryPolicy(object):
+    def test_retries_safe_actions(self, fake_node):
+        sleeps = []
+        metrics = Metrics()
+        fake_node['block_count'] = failing(2, BLOCK_COUNT)
+        rpc = client(
+            fake_node,
+            retry=RetryPolicy(retries=3, jitter=False, sleep=sleeps.append),
+            metrics=metrics,
+        )
+        assert rpc.block_count() == {'count': 1, 'unchecked': 0}
+        assert fake_node.actions() == ['block_count'] * 3
+        assert sleeps == [0.1, 0.2]
+        assert metrics.snapshot()['block_count']['retries'] == 2
+
+    def test_gives_up(self, fake_node):
+        fake_node['block_count'] = failing(5, BLOCK_COUNT)
+        rpc = client(fake_node, retry=RetryPolicy(retries=2, sleep=lambda s: None))
+        with pytest.raises(requests.exceptions.ReadTimeout):
+            rpc.block_count()
+        assert len(fake_node.requests) == 3
+
+    def test_does_not_retry_send_without_id(self, fake_node):
+        fake_node['send'] = failing(1, {'block': 'A'})
+        rpc = client(fake_node, retry=RetryPolicy(sleep=lambda s: None))
+        with pytest.raises(requests.exceptions.ReadTimeout):
+            rpc.send(**SEND_ARGS)
+        assert len(fake_node.requests) == 1
+
+    def test_retries_send_with_id(self, fake_node):
+        fake_node['send'] = failing(1, {'block': 'A'})
+        rpc = client(fake_node, retry=RetryPolicy(sleep=lambda s: None))
+        assert rpc.send(id='payment-1', **SEND_ARGS) == 'A'
+        assert [r['id'] for r in fake_node.requests] == ['payment-1'] * 2
+
+    def test_retries_connect_timeouts_of_any_action(self, fake_node):
+        fake_node['account_create'] = failing(
+            1, {'account': 'xrb_a'}, requests.exceptions.ConnectTimeout
+        )
+        rpc = client(fake_node, retry=RetryPolicy(sleep=lambda s: None))
+        assert rpc.account_create(wallet=SEND_ARGS['wallet']) == 'xrb_a'
+
+    def test_does_not_retry_rpc_errors(self, fake_node):
+        fake_node['block_count'] = {'error': 'Internal'}
+        rpc = client(fake_node, retry=RetryPolicy(sleep=lambda s: None))
+        with pytest.raises(RPCException):
+            rpc.block_count()
+        assert len(fake_node.requests) == 1
+
+    def test_delay(self):
+        policy = RetryPolicy(backoff=1, max_backoff=3, jitter=False)
+        assert [policy.delay(attempt) for attempt in range(4)] == [1, 2, 3, 3]
+        policy.jitter = True
+        assert all(0 <= policy.delay(2) <= 3 for _ in range(10))
+
+
+class TestCircuitBreaker(object):
+    def test_opens_and_recovers(self, fake_node):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+        fake_node['block_count'] = failing(3, BLOCK_COUNT)
+        rpc = client(fake_node, breaker=breaker)
+
+        for _ in range(2):
+            with pytest.raises(requests.exceptions.ReadTimeout):
+                rpc.block_count()
+        assert breaker.state == CircuitBreaker.OPEN
+        with pytest.raises(CircuitOpenError):
+            rpc.block_count()
+        assert len(fake_node.requests) == 2
+
+        clock.now = 10
+        with pytest.raises(requests.exceptions.ReadTimeout):
+            rpc.block_count()
+        assert breaker.state == CircuitBreaker.OPEN
+        with pytest.raises(CircuitOpenError):
+            rpc.block_count()
+
+        clock.now = 20
+        assert rpc.block_count() == {'count': 1, 'unchecked': 0}
+        assert breaker.state == CircuitBreaker.CLOSED
+        assert len(fake_node.requests) == 4
+
+    def test_half_open_lets_one_trial_through(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=1, clock=clock)
+        breaker.failure()
+        clock.now = 1
+        breaker.before()
+        with pytest.raises(CircuitOpenError):
+            breaker.before()
+
+    def test_other_errors_release_half_open_trial(self, fake_node):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=1, clock=clock)
+        fake_node['block_count'] = failing(1, BLOCK_COUNT, error=KeyboardInterrupt)
+        rpc = client(fake_node, breaker=breaker)
+        breaker.failure()
+        clock.now = 1
+        with pytest.raises(KeyboardInterrupt):
+            rpc.block_count()
+        assert breaker.state == CircuitBreaker.OPEN
+        assert rpc.block_count() == {'count': 1, 'unchecked': 0}
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_rpc_errors_do_not_open(self, fake_node):
+        breaker = CircuitBreaker(failure_threshold=1)
+        fake_node['block_count'] = {'error': 'Internal'}
+        rpc = client(fake_node, breaker=breaker)
+        for _ in range(2):
+            with pytest.raises(RPCException):
+                rpc.block_count()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+    def test_open_circuit_is_not_retried(self, fake_node):
+        breaker = CircuitBreaker(failure_threshold=1)
+        fake_node['block_count'] = failing(5, BLOCK_COUNT)
+        rpc = client(
+            fake_node, breaker=breaker, retry=RetryPolicy(sleep=lambda s: None)
+        )
+        with pytest.raises(CircuitOpenError):
+            rpc.block_count()
+        assert len(fake_node.requests) == 1
@@ -8,11 +8,6 @@ from nano.rpc import RPCClient, RPCException
 mock_rpc_tests = load_mock_rpc_tests()
 
 
-@pytest.fixture
-def rpc(mock_rpc_session):
-    return RPCClient(host='mock://localhost:7076', session=mock_rpc_session)
-
-
 class TestRPCClient(object):
     @pytest.mark.parametrize(
         'arguments',
@@ -95,7 +90,7 @@ class TestRPCClient(object):
         for attr in RPCClient.__dict__:
             if attr.startswith('_'):
                 continue
-            if attr in ('call',):
+            if attr in ('call', 'map', 'profile'):
                 continue
             if attr not in mock_rpc_tests:
                 raise Exception('`%s` rpc method has no test' % attr)
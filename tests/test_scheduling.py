@@ -0,0 +1,206 @@
+import threading
+import time
+
+import pytest
+
+from conftest import FakeClock, client
+from nano.limits import Limit, Limiter
+from nano.metrics import Metrics
+from nano.retry import CircuitBreaker, RetryPolicy
+from nano.scheduling import (
+    BULK,
+    INTERACTIVE,
+    NORMAL,
+    Scheduler,
+    current_priority,
+    priority,
+)
+from nano.timeouts import DeadlineExceeded, deadline
+
+
+def wait_for(condition):
+    for _ in range(500):
+        if condition():
+            return
+        time.sleep(0.002)
+    raise AssertionError('condition not met')
+
+
+def start(target, *args):
+    thread = threading.Thread(target=target, args=args)
+    thread.daemon = True
+    thread.start()
+    return thread
+
+
+class TestPriority(object):
+    def test_context(self):
+        assert current_priority() is None
+        with priority(BULK):
+            with priority(INTERACTIVE):
+                assert current_priority() == INTERACTIVE
+            assert current_priority() == BULK
+        assert current_priority() is None
+
+    def test_defaults(self):
+        scheduler = Scheduler()
+        assert scheduler.priority('ledger') == BULK
+        assert scheduler.priority('work_generate') == BULK
+        assert scheduler.priority('account_info') == NORMAL
+        with priority(INTERACTIVE):
+            assert scheduler.priority('ledger') == INTERACTIVE
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            Scheduler(max_in_flight=2, reserved=2)
+
+
+class TestScheduler(object):
+    def test_reserved_slots(self):
+        scheduler = Scheduler(max_in_flight=2, reserved=1)
+        scheduler.acquire('ledger')
+        acquired = []
+        bulk = start(lambda: acquired.append(scheduler.acquire('ledger')))
+        wait_for(lambda: len(scheduler._waiting) == 1)
+
+        with priority(INTERACTIVE):
+            assert scheduler.acquire('account_info') == 0
+        assert scheduler.in_flight == 2
+        assert acquired == []
+
+        scheduler.release()
+        scheduler.release()
+        bulk.join(1)
+        assert len(acquired) == 1
+        assert scheduler.in_flight == 1
+
+    def test_serves_higher_priority_first(self):
+        scheduler = Scheduler(max_in_flight=2, reserved=1)
+        scheduler.acquire('account_info')
+        with priority(INTERACTIVE):
+            scheduler.acquire('account_info')
+        order = []
+
+        def run(action):
+            scheduler.acquire(action)
+            order.append(action)
+
+        bulk = start(run, 'ledger')
+        wait_for(lambda: len(scheduler._waiting) == 1)
+        normal = start(run, 'account_info')
+        wait_for(lambda: len(scheduler._waiting) == 2)
+
+        scheduler.release()
+        scheduler.release()
+        normal.join(1)
+        assert order == ['account_info']
+        scheduler.release()
+        bulk.join(1)
+        assert order == ['account_info', 'ledger']
+
+    def test_deadline(self):
+        scheduler = Scheduler(max_in_flight=2, reserved=1)
+        scheduler.acquire('ledger')
+        with deadline(0.02):
+            with pytest.raises(DeadlineExceeded):
+                scheduler.acquire('ledger')
+        assert scheduler._waiting == []
+        assert scheduler.in_flight == 1
+
+
+class TestClientScheduling(object):
+    def test_calls(self, fake_node):
+        fake_node['block_count'] = {'count': '1', 'unchecked': '0'}
+        scheduler = Scheduler(max_in_flight=2, reserved=1)
+        rpc = client(fake_node, scheduler=scheduler)
+        with priority(INTERACTIVE):
+            assert rpc.block_count() == {'count': 1, 'unchecked': 0}
+        assert rpc.block_count() == {'count': 1, 'unchecked': 0}
+        assert scheduler.in_flight == 0
+
+    def test_interactive_not_blocked_by_bulk(self, fake_node):
+        release = threading.Event()
+
+        def slow_ledger(request):
+            release.wait(2)
+            return {'accounts': {}}
+
+        fake_node['ledger'] = slow_ledger
+        fake_node['block_count'] = {'count': '1', 'unchecked': '0'}
+        scheduler = Scheduler(max_in_flight=3, reserved=1)
+        rpc = client(fake_node, scheduler=scheduler)
+        account = 'xrb_3e3j5tkog48pnny9dmfzj1r16pg8t1e76dz5tmac6iq689wyjfpi00000000'
+        bulk = [start(rpc.ledger, account, 1) for _ in range(4)]
+        wait_for(lambda: scheduler.in_flight == 2 and len(scheduler._waiting) == 2)
+
+        with priority(INTERACTIVE):
+            assert rpc.block_count() == {'count': 1, 'unchecked': 0}
+        assert fake_node.actions().count('ledger') == 2
+
+        release.set()
+        for thread in bulk:
+            thread.join(2)
+        assert fake_node.actions().count('ledger') == 4
+
+    def test_queued_requests_do_not_hold_limiter_slots(self, fake_node):
+        release = threading.Event()
+
+        def slow_ledger(request):
+            release.wait(2)
+            return {'accounts': {}}
+
+        fake_node['ledger'] = slow_ledger
+        scheduler = Scheduler(max_in_flight=2, reserved=1)
+        limit = Limit(max_in_flight=4)
+        rpc = client(fake_node, scheduler=scheduler, limiter=Limiter(node=limit))
+        account = 'xrb_3e3j5tkog48pnny9dmfzj1r16pg8t1e76dz5tmac6iq689wyjfpi00000000'
+        bulk = [start(rpc.ledger, account, 1) for _ in range(3)]
+        wait_for(lambda: len(scheduler._waiting) == 2)
+        assert scheduler.in_flight == 1
+        assert limit.in_flight == 1
+
+        release.set()
+        for thread in bulk:
+            thread.join(2)
+        assert scheduler.in_flight == 0
+        assert limit.in_flight == 0
+
+    def test_deadline_while_queued_is_not_a_failure(self, fake_node):
+        fake_node['block_count'] = {'count': '1', 'unchecked': '0'}
+        scheduler = Scheduler(max_in_flight=1, reserved=0)
+        breaker = CircuitBreaker(failure_threshold=1)
+        metrics = Metrics()
+        rpc = client(
+            fake_node,
+            scheduler=scheduler,
+            breaker=breaker,
+            metrics=metrics,
+            retry=RetryPolicy(sleep=lambda s: None),
+        )
+        scheduler.acquire('ledger')
+        with deadline(0.02):
+            with pytest.raises(DeadlineExceeded):
+                rpc.block_count()
+        assert breaker.state == CircuitBreaker.CLOSED
+        assert breaker.failures == 0
+        assert metrics.snapshot() == {}
+        assert fake_node.requests == []
+        assert scheduler.in_flight == 1
+
+    def test_deadline_while_queued_keeps_half_open_probe(self, fake_node):
+        fake_node['block_count'] = {'count': '1', 'unchecked': '0'}
+        clock = FakeClock()
+        scheduler = Scheduler(max_in_flight=1, reserved=0)
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=1, clock=clock)
+        rpc = client(fake_node, scheduler=scheduler, breaker=breaker)
+        breaker.failure()
+        clock.now = 1
+        scheduler.acquire('ledger')
+        with deadline(0.02):
+            with pytest.raises(DeadlineExceeded):
+                rpc.block_count()
+        assert breaker.state == CircuitBreaker.OPEN
+
+        scheduler.release('ledger')
+        assert rpc.block_count() == {'count': 1, 'unchecked': 0}
+        assert breaker.state == CircuitBreaker.CLOSED
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+import json
+
+import pytest
+
+from conftest import client
+from nano.limits import Limit, Limiter
+from nano.metrics import Metrics
+from nano.retry import RetryPolicy
+from nano.rpc import RPCException
+from nano.streaming import iter_entries, stream_call
+from nano.timeouts import DeadlineExceeded, deadline
+
+
+def chunked(data, size):
+    if not isinstance(data, bytes):
+        data = json.dumps(data, indent=1).encode('utf-8')
+    return [data[i : i + size] for i in range(0, len(data), size)]
+
+
+LEDGER = {
+    'accounts': dict(
+        (
+            'xrb_%060d' % i,
+            {'balance': str(10**i), 'block_count': i, 'label': u'caf\xe9 %d' % i},
+        )
+        for i in range(20)
+    )
+}
+
+
+class TestIterEntries(object):
+    @pytest.mark.parametrize('size', [1, 2, 7, 64, 100000])
+    def test_object(self, size):
+        entries = list(iter_entries(chunked(LEDGER, size)))
+        assert dict(entries) == LEDGER['accounts']
+
+    @pytest.mark.parametrize('size', [1, 3, 100000])
+    def test_array(self, size):
+        data = {'blocks': ['%064X' % i for i in range(10)] + [123456, 1.5e30, None]}
+        assert list(iter_entries(chunked(data, size))) == data['blocks']
+
+    def test_numbers_across_chunks(self):
+        chunks = [b'{"counts": [1', b'23', b'4, 5', b'6]}']
+        assert list(iter_entries(chunks)) == [1234, 56]
+
+    def test_multibyte_characters_across_chunks(self):
+        data = u'{"names": ["caf\xe9"]}'.encode('utf-8')
+        assert list(iter_entries([data[:15], data[15:]])) == [u'caf\xe9']
+
+    @pytest.mark.parametrize('body', [b'{}', b'{"blocks": ""}', b'{"blocks": {}}'])
+    def test_empty(self, body):
+        assert list(iter_entries([body])) == []
+
+    def test_scalar_members_are_skipped(self):
+        data = {'account': 'xrb_a', 'history': [{'hash': 'A'}, {'hash': 'B'}]}
+        body = json.dumps(data, sort_keys=True).encode('utf-8')
+        assert list(iter_entries([body])) == data['history']
+
+    def test_field(self):
+        body = b'{"balances": {"a": 1}, "blocks": {"b": 2}, "other": [3]}'
+        assert list(iter_entries([body], field='blocks')) == [('b', 2)]
+
+    def test_only_first_collection_is_streamed(self):
+        body = b'{"balances": {"a": 1}, "blocks": {"b": 2}}'
+        assert list(iter_entries([body])) == [('a', 1)]
+
+    def test_error(self):
+        with pytest.raises(RPCException) as e_info:
+            list(iter_entries([b'{"error": "Bad account number"}']))
+        assert e_info.match('Bad account number')
+
+    @pytest.mark.parametrize(
+        'body', [b'', b'[1]', b'{"blocks": [1, 2', b'{"blocks": [1 2]}', b'{"a"}']
+    )
+    def test_malformed(self, body):
+        with pytest.raises(ValueError):
+            list(iter_entries([body]))
+
+    def test_lazy(self):
+        def chunks():
+            yield b'{"blocks": ["A", '
+            yield b'"B", '
+            raise AssertionError('read too far')
+
+        entries = iter_entries(chunks())
+        assert next(entries) == 'A'
+
+
+class TestStreamCall(object):
+    def test_stream_call(self, fake_node):
+        fake_node['ledger'] = LEDGER
+        entries = stream_call(
+            fake_node.rpc, 'ledger', {'account': 'xrb_a', 'count': '-1'}, chunk_size=10
+        )
+        assert dict(entries) == LEDGER['accounts']
+        assert fake_node.requests == [
+            {'action': 'ledger', 'account': 'xrb_a', 'count': '-1'}
+        ]
+
+    def test_params_are_not_mutated(self, fake_node):
+        fake_node['unchecked'] = {'blocks': {}}
+        params = {'count': '1'}
+        list(stream_call(fake_node.rpc, 'unchecked', params))
+        assert params == {'count': '1'}
+
+    def test_error(self, fake_node):
+        fake_node['delegators'] = {'error': 'Bad account number'}
+        with pytest.raises(RPCException):
+            list(stream_call(fake_node.rpc, 'delegators', {'account': 'xrb_a'}))
+
+    def test_client_request_path(self, fake_node):
+        fake_node['ledger'] = LEDGER
+        limit = Limit(max_in_flight=1)
+        metrics = Metrics()
+        rpc = client(
+            fake_node,
+            limiter=Limiter(node=limit),
+            metrics=metrics,
+            retry=RetryPolicy(sleep=lambda s: None),
+        )
+        entries = stream_call(rpc, 'ledger', {'count': '-1'})
+        next(entries)
+        # the limiter slot is held while the response is read
+        assert limit.in_flight == 1
+        assert len(list(entries)) == len(LEDGER['accounts']) - 1
+        assert limit.in_flight == 0
+        assert metrics.snapshot()['ledger']['count'] == 1
+
+    def test_deadline(self, fake_node):
+        fake_node['ledger'] = LEDGER
+        limit = Limit(max_in_flight=1)
+        rpc = client(fake_node, limiter=Limiter(node=limit))
+        limit.enter()
+        with deadline(0.05):
+            with pytest.raises(DeadlineExceeded):
+                list(stream_call(rpc, 'ledger', {'count': '-1'}))
+        assert fake_node.requests == []
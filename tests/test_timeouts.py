@@ -0,0 +1,194 @@
+import time
+
+import pytest
+import requests
+
+from conftest import BLOCK_COUNT, client
+from nano.iterators import iter_account_history
+from nano.retry import CircuitBreaker
+from nano.rpc import RPCClient
+from nano.timeouts import (
+    DeadlineExceeded,
+    TimeoutPolicy,
+    current_deadline,
+    deadline,
+    remaining,
+    resolve_deadline,
+)
+
+ACCOUNT = 'xrb_3e3j5tkog48pnny9dmfzj1r16pg8t1e76dz5tmac6iq689wyjfpi00000000'
+
+
+class RecordingSession(object):
+    def __init__(self, session):
+        self.session = session
+        self.timeouts = []
+
+    def post(self, *args, **kwargs):
+        self.timeouts.append(kwargs['timeout'])
+        return self.session.post(*args, **kwargs)
+
+
+@pytest.fixture
+def recording_node(fake_node):
+    fake_node['block_count'] = BLOCK_COUNT
+    fake_node['work_generate'] = {'work': '2bf29ef00786a6bc'}
+    fake_node['payment_wait'] = {'status': 'success'}
+    fake_node.recording = RecordingSession(fake_node.session)
+    return fake_node
+
+
+class TestTimeoutPolicy(object):
+    def test_fixed(self):
+        policy = TimeoutPolicy()
+        assert policy.timeout('work_generate', {}, 3) == 120
+        assert policy.timeout('version', {}, 3) == 3
+        assert policy.timeout('payment_wait', {'timeout': '10000'}, 3) == 13
+        assert policy.timeout('payment_wait', {}, None) is None
+
+    def test_adaptive(self):
+        policy = TimeoutPolicy(adaptive=True, min_samples=5, multiplier=3)
+        for _ in range(4):
+            policy.observe('version', 0.1)
+        assert policy.timeout('version', {}, 3) == 3
+        policy.observe('version', 0.4)
+        assert policy.timeout('version', {}, 3) == pytest.approx(1.2)
+        assert policy.timeout('work_generate', {}, 3) == 120
+
+    def test_adaptive_bounds(self):
+        policy = TimeoutPolicy(adaptive=True, min_samples=1, min_timeout=0.5)
+        policy.observe('version', 0.01)
+        policy.observe('ledger', 100)
+        assert policy.timeout('version', {}, 3) == 0.5
+        assert policy.timeout('ledger', {}, 3) == 30
+
+    def test_window(self):
+        policy = TimeoutPolicy(
+            adaptive=True, window=3, min_samples=1, percentile=1, min_timeout=0
+        )
+        for latency in (5, 1, 1, 1):
+            policy.observe('version', latency)
+        assert policy.timeout('version', {}, 30) == pytest.approx(3)
+
+    def test_not_adaptive_ignores_latencies(self):
+        policy = TimeoutPolicy(min_samples=1)
+        policy.observe('version', 0.01)
+        assert policy.timeout('version', {}, 3) == 3
+
+
+class TestDeadline(object):
+    def test_nesting(self):
+        assert current_deadline() is None
+        with deadline(10) as outer:
+            with deadline(100) as inner:
+                assert inner == outer
+            with deadline(1) as inner:
+                assert inner < outer
+            assert current_deadline() == outer
+        assert current_deadline() is None
+
+    def test_remaining(self):
+        assert remaining(3) == 3
+        with deadline(1):
+            assert 0 < remaining(3) <= 1
+            assert 0 < remaining(None) <= 1
+        with deadline(at=time.time() - 1):
+            with pytest.raises(DeadlineExceeded):
+                remaining(3)
+
+    def test_resolve(self):
+        assert resolve_deadline(None) is None
+        with deadline(1) as at:
+            assert resolve_deadline(None) == at
+            assert resolve_deadline(10) == at
+
+
+class TestClientTimeouts(object):
+    def test_default_timeout(self, recording_node):
+        RPCClient(
+            host='mock://localhost:7076', session=recording_node.recording, timeout=7
+        ).block_count()
+        assert recording_node.recording.timeouts == [7]
+
+    def test_policy(self, recording_node):
+        rpc = RPCClient(
+            host='mock://localhost:7076',
+            session=recording_node.recording,
+            timeouts=TimeoutPolicy(),
+        )
+        rpc.block_count()
+        rpc.work_generate(hash='A' * 64)
+        rpc.payment_wait(account=ACCOUNT, amount=1, timeout=1000)
+        assert recording_node.recording.timeouts == [3, 120, 4]
+
+    def test_adaptive(self, recording_node):
+        policy = TimeoutPolicy(adaptive=True, min_samples=3, min_timeout=0.25)
+        rpc = RPCClient(
+            host='mock://localhost:7076',
+            session=recording_node.recording,
+            timeouts=policy,
+        )
+        for _ in range(4):
+            rpc.block_count()
+        assert recording_node.recording.timeouts[:3] == [3, 3, 3]
+        assert recording_node.recording.timeouts[3] == 0.25
+
+    def test_adaptive_recovers_after_timeouts(self, recording_node):
+        policy = TimeoutPolicy(
+            adaptive=True, window=3, min_samples=3, multiplier=2, min_timeout=0.25
+        )
+        rpc = client(recording_node, timeouts=policy)
+        for _ in range(3):
+            rpc.block_count()
+        assert policy.timeout('block_count', {}, 3) == 0.25
+
+        def slow(request):
+            raise requests.exceptions.ReadTimeout('node busy')
+
+        recording_node['block_count'] = slow
+        timeouts = []
+        for _ in range(4):
+            timeouts.append(policy.timeout('block_count', {}, 3))
+            with pytest.raises(requests.exceptions.ReadTimeout):
+                rpc.block_count()
+        # every timeout doubles the next one up to the timeout of the client
+        assert timeouts == [0.25, 0.5, 1.0, 2.0]
+        assert policy.timeout('block_count', {}, 3) == 3
+
+    def test_deadline(self, recording_node):
+        rpc = RPCClient(host='mock://localhost:7076', session=recording_node.recording)
+        with deadline(1):
+            rpc.block_count()
+        assert recording_node.recording.timeouts[0] <= 1
+        with deadline(at=time.time() - 1):
+            with pytest.raises(DeadlineExceeded):
+                rpc.block_count()
+        assert len(recording_node.requests) == 1
+
+    def test_deadline_does_not_open_circuit(self, recording_node):
+        breaker = CircuitBreaker(failure_threshold=1)
+        rpc = client(
+            recording_node,
+            breaker=breaker,
+        )
+        with deadline(at=time.time() - 1):
+            with pytest.raises(DeadlineExceeded):
+                rpc.block_count()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+
+class TestIteratorDeadline(object):
+    def test_expired(self, fake_node):
+        fake_node['account_history'] = {'history': []}
+        with pytest.raises(DeadlineExceeded):
+            list(iter_account_history(fake_node.rpc, ACCOUNT, deadline=0))
+        assert fake_node.requests == []
+
+    def test_within_deadline(self, fake_node):
+        fake_node['account_history'] = {
+            'history': [
+                {'hash': 'A', 'type': 'send', 'account': ACCOUNT, 'amount': '1'}
+            ]
+        }
+        entries = list(iter_account_history(fake_node.rpc, ACCOUNT, deadline=10))
+        assert [entry['hash'] for entry in entries] == ['A']